@@ -0,0 +1,376 @@
+import sys
+import os
+import types
+import time
+import datetime
+import json
+import argparse
+import platform
+import statistics
+import subprocess
+import importlib
+
+
+# benchmark measures how long the word clock takes to start, to draw a frame, to run the transition at every five
+# minute slot of a day, to change color and brightness, and to scale the face to the window. The results are written
+# as JSON, so they can be kept and compared across versions.
+#
+# The benchmark can run against the real Tk, which needs a display (a virtual one such as Xvfb works, for example
+# "xvfb-run python benchmark.py --tk"), or against a stub Tk (the default when there is no display), which does no
+# drawing at all. The stub measures the cost of the clock's own Python code, and the real Tk adds the cost of drawing.
+#
+# All times in the results are in milliseconds.
+
+
+# StubWidget, StubTk, StubCanvas and StubFont stand in for the parts of tkinter the clock uses, so that the clock can
+# be run without a display. Every call which would go to Tk is counted in calls.
+class StubWidget:
+    calls = 0
+
+    def __init__(self, master=None, **options):
+        self.master = master
+        self.options = options
+
+    def pack(self, **options):
+        StubWidget.calls += 1
+        return None
+
+    def grid(self, **options):
+        StubWidget.calls += 1
+        return
+
+    def configure(self, **options):
+        StubWidget.calls += 1
+        self.options.update(options)
+        return
+
+    config = configure
+
+    def __setitem__(self, key, value):
+        StubWidget.calls += 1
+        self.options[key] = value
+        return
+
+    def bind(self, sequence=None, func=None, add=None):
+        return
+
+
+class StubTk(StubWidget):
+    def __init__(self):
+        super().__init__()
+        self.jobs = 0
+
+    def title(self, text):
+        return
+
+    def after(self, ms, func=None, *args):
+        self.jobs = self.jobs + 1
+        return "after#%d" % self.jobs
+
+    def after_cancel(self, job):
+        return
+
+    def update_idletasks(self):
+        StubWidget.calls += 1
+        return
+
+    def update(self):
+        StubWidget.calls += 1
+        return
+
+    def mainloop(self):
+        return
+
+    def destroy(self):
+        return
+
+
+class StubCanvas(StubWidget):
+    def __init__(self, master=None, **options):
+        super().__init__(master, **options)
+        self.items = 0
+
+    def create_text(self, x, y, **options):
+        StubWidget.calls += 1
+        self.items = self.items + 1
+        return self.items
+
+    def itemconfigure(self, tagOrId, **options):
+        StubWidget.calls += 1
+        return
+
+    def dtag(self, tagOrId, tagToDelete=None):
+        StubWidget.calls += 1
+        return
+
+    def addtag_withtag(self, newTag, tagOrId):
+        StubWidget.calls += 1
+        return
+
+    def coords(self, tagOrId, *coordinates):
+        StubWidget.calls += 1
+        return
+
+    def after(self, ms, func=None, *args):
+        return "after#canvas"
+
+    def after_cancel(self, job):
+        return
+
+
+# StubFont measures text in proportion to its size in pixels, 12 pixels by default, like a real font would.
+class StubFont:
+    def __init__(self, family="stub", size=-12):
+        self.pixels = abs(size)
+
+    def measure(self, text):
+        return round(len(text) * self.pixels * 5 / 6)
+
+    def metrics(self, option):
+        return round(self.pixels * 5 / 4)
+
+    def actual(self, option=None):
+        return "stub"
+
+
+# installStubTk puts the stub in place of tkinter, so that the clock picks it up when it is imported.
+def installStubTk():
+    tkinter = types.ModuleType("tkinter")
+    tkinter.Tk = StubTk
+    tkinter.Frame = StubWidget
+    tkinter.Label = StubWidget
+    tkinter.Button = StubWidget
+    tkinter.Canvas = StubCanvas
+    tkinter.RIGHT = "right"
+    tkinter.TkVersion = "stub"
+    tkinter.__all__ = ["Tk", "Frame", "Label", "Button", "Canvas", "RIGHT"]
+    font = types.ModuleType("tkinter.font")
+    font.nametofont = lambda name, root=None: StubFont()
+    font.Font = StubFont
+    tkinter.font = font
+    tkinter.ttk = types.ModuleType("tkinter.ttk")
+    sys.modules["tkinter"] = tkinter
+    sys.modules["tkinter.font"] = font
+    sys.modules["tkinter.ttk"] = tkinter.ttk
+    return
+
+
+# summarize turns a list of times in seconds into a summary in milliseconds.
+def summarize(values):
+    if len(values) == 0:
+        return None
+    ordered = sorted(values)
+    return {"count": len(ordered),
+            "min": round(ordered[0] * 1000, 4),
+            "median": round(statistics.median(ordered) * 1000, 4),
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 4),
+            "max": round(ordered[-1] * 1000, 4),
+            "mean": round(statistics.fmean(ordered) * 1000, 4)}
+
+
+# runFrames runs every queued timeline of the application to the end, as fast as possible, timing every frame
+# (including asking Tk to draw it). It returns the frame times, and the time in seconds the frames would have taken to
+# play out in real time.
+def runFrames(root, app):
+    frameTimes = []
+    nominal = 0.0
+    while True:
+        frameStart = time.perf_counter()
+        delay = app.animator.step()
+        if delay is None:
+            break
+        root.update_idletasks()
+        frameTimes.append(time.perf_counter() - frameStart)
+        nominal = nominal + delay / 1000
+    return frameTimes, nominal
+
+
+# benchStartup measures, from nothing, how long it takes to create the Tk root and the application (construct), to
+# paint the time (firstPaint, see the start function of the application), and until nothing is left to animate
+# (fullFace).
+def benchStartup(wordclock, backend, start, repeat):
+    construct = []
+    firstPaint = []
+    fullFace = []
+    for i in range(0, repeat):
+        began = time.perf_counter()
+        root = wordclock.Tk()
+        app = wordclock.Application(master=root, backend=backend, clock=wordclock.wordface.VirtualClock(start))
+        construct.append(time.perf_counter() - began)
+        app.start()
+        firstPaint.append(time.perf_counter() - began)
+        app.animator.flush()
+        fullFace.append(time.perf_counter() - began)
+        root.destroy()
+    return {"construct": summarize(construct), "firstPaint": summarize(firstPaint), "fullFace": summarize(fullFace)}
+
+
+# benchTransitions runs the transition at every five minute slot of the day on a virtual clock. For every slot, work is
+# the time spent running the transition as fast as possible, and duration is how long the transition plays out in real
+# time. The frame times of every frame drawn are also summarized. writesSaved is the number of letter color writes the
+# clock did not have to pass on to Tk (see CoalescingRenderer), which is none for plain transitions (see benchBursts).
+def benchTransitions(wordclock, backend, start):
+    root = wordclock.Tk()
+    clock = wordclock.wordface.VirtualClock(start)
+    app = wordclock.Application(master=root, backend=backend, clock=clock)
+    app.updatetime()
+    app.animator.flush()
+    slots = []
+    allFrames = []
+    for slot in range(0, wordclock.wordface.Slots):
+        clock.advance(wordclock.wordface.secondsToBoundary(clock.now(), app.resolution))
+        began = time.perf_counter()
+        app.updatetime()
+        frameTimes, nominal = runFrames(root, app)
+        work = time.perf_counter() - began
+        allFrames.extend(frameTimes)
+        slots.append({"time": clock.now().strftime("%H:%M"), "frames": len(frameTimes),
+                      "work": round(work * 1000, 4), "duration": round(nominal * 1000, 4)})
+    saved = app.renderer.getSaved()
+    root.destroy()
+    return {"slots": slots,
+            "work": summarize([slot["work"] / 1000 for slot in slots if slot["frames"] > 0]),
+            "duration": summarize([slot["duration"] / 1000 for slot in slots if slot["frames"] > 0]),
+            "frame": summarize(allFrames),
+            "writesSaved": saved}
+
+
+# benchChanges presses the color button once for every color, and the brightness button once for every brightness,
+# with a full face lit. blocking is how long the button press itself took, work is the time spent running the change as
+# fast as possible, and duration is how long the change plays out in real time.
+def benchChanges(wordclock, backend, start):
+    root = wordclock.Tk()
+    app = wordclock.Application(master=root, backend=backend, clock=wordclock.wordface.VirtualClock(start))
+    app.updatetime()
+    app.animator.flush()
+    results = {}
+    for name, press, count in (("color", app.changeColor, len(app.colorOptions)),
+                               ("brightness", app.changeBrightness, len(app.colorOptions[0]))):
+        blocking = []
+        work = []
+        duration = []
+        for i in range(0, count):
+            began = time.perf_counter()
+            press()
+            blocking.append(time.perf_counter() - began)
+            began = time.perf_counter()
+            frameTimes, nominal = runFrames(root, app)
+            work.append(time.perf_counter() - began)
+            duration.append(nominal)
+        results[name] = {"blocking": summarize(blocking), "work": summarize(work), "duration": summarize(duration)}
+    root.destroy()
+    return results
+
+
+# benchBursts replays bursts of button presses in the middle of a transition, as a user clicking quickly does: the
+# color and brightness buttons in one frame, and the brightness button again in the next, which sends most letters
+# back the way they came. Every burst is run to the end. writes is the number of letter color writes the clock asked
+# for, written the number passed on to Tk, and saved the difference (see CoalescingRenderer). A plain transition
+# saves nothing, as every fade already writes each letter once per frame, so this is where the savings show.
+def benchBursts(wordclock, backend, start, bursts=6):
+    root = wordclock.Tk()
+    clock = wordclock.wordface.VirtualClock(start)
+    app = wordclock.Application(master=root, backend=backend, clock=clock)
+    app.updatetime()
+    app.animator.flush()
+    renderer = app.renderer
+    writes = renderer.writes
+    written = renderer.written
+    calls = renderer.calls
+    for i in range(0, bursts):
+        clock.advance(wordclock.wordface.secondsToBoundary(clock.now(), app.resolution))
+        app.updatetime()
+        app.animator.step()
+        app.changeColor()
+        app.changeBrightness()
+        app.animator.step()
+        app.changeBrightness()
+        runFrames(root, app)
+    results = {"bursts": bursts, "writes": renderer.writes - writes, "written": renderer.written - written,
+               "saved": (renderer.writes - writes) - (renderer.written - written), "calls": renderer.calls - calls}
+    root.destroy()
+    return results
+
+
+# benchResize scales the face to a range of window sizes, from a small window to an 8K screen, twice over, as a
+# resizable window or fullscreen kiosk does (see CanvasRenderer). For every size, work is the time the scaling took,
+# calls the calls it made to Tk, and fontSize the size of the font chosen. fonts is the number of fonts created in
+# all, and drag how many times the face was scaled for a drag of the window edge through dragEvents sizes (the
+# debounce timer is run by hand at the end, as the stub Tk does not run timers).
+def benchResize(wordclock, start):
+    root = wordclock.Tk()
+    app = wordclock.Application(master=root, clock=wordclock.wordface.VirtualClock(start), scalable=True)
+    app.updatetime()
+    app.animator.flush()
+    renderer = app.renderer.renderer
+    sizes = []
+    for size in ((640, 480), (1280, 720), (1920, 1080), (3840, 2160), (7680, 4320)) * 2:
+        renderer.newSize = size
+        calls = renderer.calls
+        began = time.perf_counter()
+        renderer.resize()
+        sizes.append({"size": "%dx%d" % size, "work": round((time.perf_counter() - began) * 1000, 4),
+                      "calls": renderer.calls - calls, "fontSize": renderer.fontSize})
+    resizes = renderer.resizes
+    dragEvents = 50
+    for i in range(0, dragEvents):
+        renderer.canvasResized(types.SimpleNamespace(width=800 + i * 10, height=600 + i * 5))
+    renderer.resize()
+    root.destroy()
+    return {"sizes": sizes, "fonts": len(wordclock.Fonts), "dragEvents": dragEvents,
+            "drag": renderer.resizes - resizes}
+
+
+# gitVersion returns the short hash of the checked out commit, or None if git can not tell.
+def gitVersion():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Word Clock benchmark")
+    parser.add_argument("--tk", action="store_true", help="use the real Tk (needs a display, such as Xvfb)")
+    parser.add_argument("--stub", action="store_true", help="use the stub Tk (the default when there is no display)")
+    parser.add_argument("--backend", choices=("canvas", "label"), default="canvas",
+                        help="rendering backend for the clock face")
+    parser.add_argument("--repeat", type=int, default=10, help="number of times to measure startup")
+    parser.add_argument("--output", help="file to write the JSON results to (default: standard output)")
+    args = parser.parse_args(argv)
+
+    stub = args.stub or (not args.tk and os.environ.get("DISPLAY") is None and sys.platform.startswith("linux"))
+    if stub:
+        installStubTk()
+    wordclock = importlib.import_module("wordclockv2")
+
+    # The benchmark always starts from the same fixed time, so that runs can be compared.
+    start = datetime.datetime(2024, 1, 1, 0, 0)
+    StubWidget.calls = 0
+    results = {"startup": benchStartup(wordclock, args.backend, start, args.repeat),
+               "transitions": benchTransitions(wordclock, args.backend, start),
+               "changes": benchChanges(wordclock, args.backend, start),
+               "bursts": benchBursts(wordclock, args.backend, start)}
+    if args.backend == "canvas":
+        results["resize"] = benchResize(wordclock, start)
+    report = {"benchmark": "wordclock",
+              "version": gitVersion(),
+              "date": datetime.datetime.now().isoformat(timespec="seconds"),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "tk": "stub" if stub else str(wordclock.TkVersion),
+              "backend": args.backend,
+              "results": results}
+    if stub:
+        report["stubCalls"] = StubWidget.calls
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, "w") as output:
+            output.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,662 +1,434 @@
 from tkinter import *
 from tkinter import ttk
+import tkinter.font
 import time
+import math
 import datetime
+import sys
+import argparse
+import json
+import logging
+import zoneinfo
+import wordface
+import wordlayout
+import wordcolor
+import wordengine
+import wordstream
+import wordshm
+import wordcontrol
+
+
+# LabelRenderer and CanvasRenderer are the two rendering backends for the clock face. Both have the same functions, so
+# the rest of the clock does not need to know which one is in use:
+#   setGridSize(columns, rows): called once, before any letters are added.
+#   addLetter(text, column, row): draws a letter in the inactive color (#333333) and returns its item.
+#   setColor(item, color): recolors a single letter.
+#   setGroup(tag, items): makes the given letter items the members of a named group, replacing any earlier members.
+#   setGroupColor(tag, color): recolors every letter in a named group at once.
+# Each renderer also counts the calls it makes to Tk in calls, for the instrumentation (see the Metrics class).
+#
+# LabelRenderer is the original backend, which creates one Tk Label per letter and places it with grid on the canvas.
+# Every letter is its own widget, so recoloring a group means one Tk call per letter.
+class LabelRenderer:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.groups = {}
+        self.calls = 0
+
+    def setGridSize(self, columns, rows):
+        return
 
+    def addLetter(self, text, column, row):
+        label = Label(self.canvas, text=text, fg="#333333", bg="#000000", padx=15, pady=5)
+        label.grid(row=row, column=column)
+        self.calls = self.calls + 2
+        return label
+
+    def setColor(self, item, color):
+        item["fg"] = color
+        self.calls = self.calls + 1
+        return
+
+    def setGroup(self, tag, items):
+        self.groups[tag] = tuple(items)
+        return
+
+    def setGroupColor(self, tag, color):
+        items = self.groups.get(tag, ())
+        for item in items:
+            item["fg"] = color
+        self.calls = self.calls + len(items)
+        return
 
-# Letter class is used for each letter in the clock. When an instance is created, the letter defined is immediately
-# added to the canvas object in the inactive color (#333333). The class has functions for setting and getting activity,
-# where activity is defined as true depending on the time. In most cases #333333 is inactive,
-# and all other colors are active, however this is not the case when brightness has been set to
-# fully dimmed. When this is the case, the clock is still expected to keep track of time, so that
-# when the brightness is turned back up, the time will automatically be correct. Active status is used in
-# features such as change brightness and change color, so the function knows which letters to change colors and which
-# to ignore. Active status is changed by the word class automatically when changing colors of member letters.
-class Letter:
-    def __init__(self, canvas, text, column, row):
+
+# Fonts holds the fonts the letters are drawn in when the face is scaled (see CanvasRenderer), by family and size in
+# pixels, together with their metrics, as (font, width of a "W", line height), so that every size is only created
+# and measured once in the life of the process. Sizes are rounded down to one of fontSteps sizes for every doubling
+# (see fontSize), so there are only a few dozen of them between the smallest window and a 4K screen.
+Fonts = {}
+fontSteps = 8
+minimumFontSize = 6
+
+
+# fontSize returns the largest font size of the steps in Fonts which is not above the given size in pixels.
+def fontSize(pixels):
+    step = math.floor(math.log2(max(pixels, minimumFontSize)) * fontSteps)
+    return max(minimumFontSize, int(2 ** (step / fontSteps)))
+
+
+# getFont returns the font of the given family and size in pixels, with its metrics (see Fonts).
+def getFont(family, size):
+    font = Fonts.get((family, size))
+    if font is None:
+        font = tkinter.font.Font(family=family, size=-size)
+        font = (font, font.measure("W"), font.metrics("linespace"))
+        Fonts[(family, size)] = font
+    return font
+
+
+# CanvasRenderer draws the letters as text items directly on the canvas, rather than as Label widgets. The cells are
+# sized from the default Tk font, with the same padding the labels use, so the face looks the same as with
+# LabelRenderer. Groups are canvas tags, so a whole group of letters, such as a word or all the letters fading in
+# during a transition, is recolored by a single itemconfigure call, no matter how many letters are in the group.
+#
+# When scalable is True, the face is scaled to fit the canvas whenever it changes size, for a resizable window or a
+# fullscreen kiosk. The size changes are debounced: the face is only scaled once the canvas has kept the same size
+# for debounce milliseconds, so dragging the edge of the window or rotating the screen scales it once. Scaling moves
+# every letter to its new cell and switches every letter to a font of the nearest size which fits the cells at once
+# (see Fonts), so it costs the same number of Tk calls, one per letter and one for the font, at any size of screen.
+# resizes counts the times the face was scaled, and fontSize is the size of the font chosen the last time, or None
+# before the first time.
+class CanvasRenderer:
+    def __init__(self, canvas, scalable=False, debounce=100):
         self.canvas = canvas
-        self.text = text
-        self.color = "#333333"
-        self.active = False
-        self.label = Label(self.canvas, text=self.text,
-                           fg=self.color, bg="#000000",
-                           padx=15, pady=5)
-        self.label.grid(row=row, column=column)
-
-    def setActive(self, active):
-        self.active = active
+        self.font = tkinter.font.nametofont("TkDefaultFont")
+        self.cellWidth = self.font.measure("W") + 2 * 15
+        self.cellHeight = self.font.metrics("linespace") + 2 * 5
+        self.calls = 0
+        self.columns = 0
+        self.rows = 0
+        self.cells = {}  # The column and row of every letter, by item
+        self.scale = 1.0
+        self.left = 0.0  # Where the top left cell is drawn, to center the face on the canvas
+        self.top = 0.0
+        self.debounce = debounce
+        self.size = None  # The size of the canvas the face was last scaled to, as (width, height)
+        self.newSize = None
+        self.resizeJob = None
+        self.resizes = 0
+        self.fontSize = None
+        if scalable:
+            self.family = self.font.actual("family")
+            self.canvas.bind("<Configure>", self.canvasResized)
+
+    def setGridSize(self, columns, rows):
+        self.columns = columns
+        self.rows = rows
+        self.canvas.configure(width=columns * self.cellWidth, height=rows * self.cellHeight)
+        self.calls = self.calls + 1
         return
 
-    def getActive(self):
-        return self.active
+    def addLetter(self, text, column, row):
+        self.calls = self.calls + 1
+        x, y = self.cellCenter(column, row)
+        item = self.canvas.create_text(x, y, text=text, fill="#333333", font=self.font, tags=("letter",))
+        self.cells[item] = (column, row)
+        return item
+
+    # cellCenter returns the canvas position of the center of the cell at the given column and row.
+    def cellCenter(self, column, row):
+        return (self.left + (column + 0.5) * self.cellWidth * self.scale,
+                self.top + (row + 0.5) * self.cellHeight * self.scale)
+
+    # canvasResized is bound to the <Configure> event of the canvas, and scales the face (see resize) once the canvas
+    # has stopped changing size for debounce milliseconds.
+    def canvasResized(self, event):
+        self.newSize = (event.width, event.height)
+        if self.resizeJob is not None:
+            self.canvas.after_cancel(self.resizeJob)
+        self.resizeJob = self.canvas.after(self.debounce, self.resize)
+        return
 
-    def setColor(self, newcolor):
-        self.label["fg"] = newcolor
+    # resize scales the face to fit the canvas at its new size, with the largest font which fits the cells.
+    def resize(self):
+        self.resizeJob = None
+        if self.newSize == self.size or self.columns == 0:
+            return
+        self.size = self.newSize
+        width, height = self.size
+        self.scale = min(width / (self.columns * self.cellWidth), height / (self.rows * self.cellHeight))
+        self.left = (width - self.columns * self.cellWidth * self.scale) / 2
+        self.top = (height - self.rows * self.cellHeight * self.scale) / 2
+        letterWidth = (self.cellWidth - 2 * 15) * self.scale
+        lineHeight = (self.cellHeight - 2 * 5) * self.scale
+        size = fontSize(lineHeight)
+        font, fontWidth, fontHeight = getFont(self.family, size)
+        while size > minimumFontSize and (fontWidth > letterWidth or fontHeight > lineHeight):
+            size = fontSize(size - 1)
+            font, fontWidth, fontHeight = getFont(self.family, size)
+        self.fontSize = size
+        if font is not self.font:
+            self.font = font
+            self.canvas.itemconfigure("letter", font=font)
+            self.calls = self.calls + 1
+        for item, (column, row) in self.cells.items():
+            self.canvas.coords(item, *self.cellCenter(column, row))
+        self.calls = self.calls + len(self.cells)
+        self.resizes = self.resizes + 1
         return
 
+    def setColor(self, item, color):
+        self.canvas.itemconfigure(item, fill=color)
+        self.calls = self.calls + 1
+        return
 
-# Word class groups individual letter instances into a known word. Minimum of two letters (AM, PM)) and maximum of
-# eight letters (MIDNIGHT). When an instance is created, it is immediately assumed to be inactive. Activity here works
-# the same as it does in the Letter class, with the primary exception being that the word class manages its own
-# activity, whereas in the Letter class, the letter is told if it is active or not by external functions. Active
-# is still defined as all colors other than #333333, except in cases where brightness is fully dimmed. If the
-# fade_to_white function has been run, it is assumed that the word is active, even if the color is #333333.
-class Word:
-    def __init__(self, letter1, letter2, letter3=None, letter4=None, letter5=None, letter6=None, letter7=None,
-                 letter8=None, master=None):
-        self.letter1 = letter1
-        self.letter2 = letter2
-        self.letter3 = letter3
-        self.letter4 = letter4
-        self.letter5 = letter5
-        self.letter6 = letter6
-        self.letter7 = letter7
-        self.letter8 = letter8
-        self.master = master
-        self.active = False
-
-    def setActive(self, active):
-        self.active = active
-
-    def getActive(self):
-        return self.active
-
-    # The fade_to_white function fades the letters in the word from #333333 to the selected color. The minutes argument
-    # is not used here, but is included to facilitate using instances of Word and instances of HStatement or MStatment
-    # in the same context, which do require a minutes argument in their respective fade_to_white functions.
-    #
-    # fade_to_white works by treating the Red, Green, and Blue components of a hexadecimal color code as sliders. First,
-    # the selected color is evaluated to see which of the three components are included in the selected color. For
-    # example, if blue is a component, then the last two digits of the code will be either FF (for fully bright) or
-    # AA (for fully dimmed). Once its determined that blue is a component, a multiple of the value "04" will be added to
-    # the starting value of "33" for each iteration of the loop, to gradually "slide" the  blue component up to its
-    # final value of "FF" or "AA". If blue is determined to NOT be a component of the selected color (the last two
-    # digits of the code will be "00"), then a multiple of the value of "01" will be SUBTRACTED from the starting value
-    # of "33" for each iteration of the loop, to gradually slide the blue component DOWN to its final value of "00".
-    # These three components are added up to yield the current color code and the appropriate letters have their new
-    # colors set.
-    #
-    # Because hexadecimal color codes require six digits, but an actual hexadecimal number could be truncated of its
-    # leading digits if they are 0 and therefore not significant, the color code is checked for length and has these
-    # leading digits added if necessary.
-    #
-    # The tkinter app is updated after each new color is set, and a delay is applied, to provide the visual fade.
-    def fade_to_white(self, color, minutes=0):
-        i = 1
-        while not self.active:  # Only run if the word is off. If the word is on, do not run.
-            if color[0] == "F":  # Red is a component
-                red = (int("040000", 16) * i) + int("330000", 16)
-            elif color[0] == "A":  # Red is a component, and dimming is active
-                red = (int("020000", 16) * i) + int("330000", 16)
-            elif color[0] == "0":  # Red is not a component
-                red = int("330000", 16) - (int("010000", 16) * i)
-            else:  # the clock is off
-                red = int("330000", 16)
-            if color[2] == "F":  # Green is a component
-                green = (int("000400", 16) * i) + int("003300", 16)
-            elif color[2] == "A":  # Green is a component and dimming is active
-                green = (int("000200", 16) * i) + int("003300", 16)
-            elif color[2] == "0":  # Green is not a component
-                green = int("003300", 16) - (int("000100", 16) * i)
-            else:  # Clock is off
-                green = int("003300", 16)
-            if color[4] == "F":  # Blue is a component
-                blue = (int("000004", 16) * i) + int("000033", 16)
-            elif color[4] == "A":  # Blue is a component, and dimming is active
-                blue = (int("000002", 16) * i) + int("000033", 16)
-            elif color[4] == "0":  # Blue is not a component
-                blue = int("000033", 16) - (int("000001", 16) * i)
-            else:  # Clock is off
-                blue = int("000033", 16)
-                i = 51
-            newcolorhex = hex(red+green+blue)  # Combine all newly calculated RBG values into new hex code.
-            if len(newcolorhex) == 8:  # Concatenate string together, with appropriate leading zeros as needed.
-                finalcolorhex = "#" + newcolorhex[2:8]
-            elif len(newcolorhex) == 7:
-                finalcolorhex = "#0" + newcolorhex[2:7]
-            elif len(newcolorhex) == 6:
-                finalcolorhex = "#00" + newcolorhex[2:6]
-            else:
-                finalcolorhex = "#333333"
-            self.letter1.setColor(finalcolorhex)
-            self.letter1.setActive(True)
-            self.letter2.setColor(finalcolorhex)
-            self.letter2.setActive(True)
-            if self.letter3 is not None:
-                self.letter3.setColor(finalcolorhex)
-                self.letter3.setActive(True)
-            if self.letter4 is not None:
-                self.letter4.setColor(finalcolorhex)
-                self.letter4.setActive(True)
-            if self.letter5 is not None:
-                self.letter5.setColor(finalcolorhex)
-                self.letter5.setActive(True)
-            if self.letter6 is not None:
-                self.letter6.setColor(finalcolorhex)
-                self.letter6.setActive(True)
-            if self.letter7 is not None:
-                self.letter7.setColor(finalcolorhex)
-                self.letter7.setActive(True)
-            if self.letter8 is not None:
-                self.letter8.setColor(finalcolorhex)
-                self.letter8.setActive(True)
-            i = i + 1
-            if i is 52:  # If done, set word active status.
-                self.setActive(True)
-            time.sleep(0.03)
-            self.master.update_idletasks()
-            self.master.update()
+    def setGroup(self, tag, items):
+        self.canvas.dtag(tag, tag)
+        self.calls = self.calls + 1
+        for item in items:
+            self.canvas.addtag_withtag(tag, item)
+            self.calls = self.calls + 1
         return
 
-    # fade_to_grey works very similar to fade_to_white, but in reverse. See fade_to_white for more details.
-    def fade_to_grey(self, color, minutes=0):
-        i = 1
-        while self.active:  # Only run this if the word is on. If the word is already off, do not run again.
-            if color[0] == "F":  # Red is a component
-                red = int("FF0000", 16) - (int("040000", 16) * i)
-            elif color[0] == "A":  # Red is a component and dimming is active
-                red = int("AA0000", 16) - (int("020000", 16) * i)
-            elif color[0] == "0":  # Red is not a component
-                red = (int("010000", 16) * i) + int("000000", 16)
-            else:  # Clock is off
-                red = int("330000", 16)
-            if color[2] == "F":  # Green is a component
-                green = int("00FF00", 16) - (int("000400", 16) * i)
-            elif color[2] == "A":  # Green is a component and dimming is active
-                green = int("00AA00", 16) - (int("000200", 16) * i)
-            elif color[2] == "0":  # Green is not a component
-                green = (int("000100", 16) * i) + int("000000", 16)
-            else:  # Clock is off
-                green = int("003300", 16)
-            if color[4] == "F":  # Blue is a component
-                blue = int("0000FF", 16) - (int("000004", 16) * i)
-            elif color[4] == "A":  # Blue is a component and dimming is active
-                blue = int("0000AA", 16) - (int("000002", 16) * i)
-            elif color[4] == "0":  # Blue is not a component
-                blue = (int("000001", 16) * i) + int("000000", 16)
-            else:  # Clock is off
-                blue = int("000033", 16)
-                i = 51
-            newcolorhex = hex(red+green+blue)  # Combine all newly calculated RBG values into new hex code.
-            if len(newcolorhex) == 8:  # Concatenate string together, with appropriate leading zeros as needed.
-                finalcolorhex = "#" + newcolorhex[2:8]
-            elif len(newcolorhex) == 7:
-                finalcolorhex = "#0" + newcolorhex[2:7]
-            elif len(newcolorhex) == 6:
-                finalcolorhex = "#00" + newcolorhex[2:6]
-            else:
-                finalcolorhex = "#333333"
-            self.letter1.setColor(finalcolorhex)
-            self.letter1.setActive(False)
-            self.letter2.setColor(finalcolorhex)
-            self.letter2.setActive(False)
-            if self.letter3 is not None:
-                self.letter3.setColor(finalcolorhex)
-                self.letter3.setActive(False)
-            if self.letter4 is not None:
-                self.letter4.setColor(finalcolorhex)
-                self.letter4.setActive(False)
-            if self.letter5 is not None:
-                self.letter5.setColor(finalcolorhex)
-                self.letter5.setActive(False)
-            if self.letter6 is not None:
-                self.letter6.setColor(finalcolorhex)
-                self.letter6.setActive(False)
-            if self.letter7 is not None:
-                self.letter7.setColor(finalcolorhex)
-                self.letter7.setActive(False)
-            if self.letter8 is not None:
-                self.letter8.setColor(finalcolorhex)
-                self.letter8.setActive(False)
-            i = i + 1
-            if i is 52:
-                self.setActive(False)  # If done, set word active status.
-            time.sleep(0.03)
-            self.master.update_idletasks()
-            self.master.update()
+    def setGroupColor(self, tag, color):
+        self.canvas.itemconfigure(tag, fill=color)
+        self.calls = self.calls + 1
         return
 
 
-# The HStatement class is a collection of words which together comprise an "Hour Statement", such as "ONE O'CLOCK PM".
-# This class is very similar to but with notable differences from MStatement, which is defined as a collection of
-# words to comprise a "Minute Statement". Activity works the same in the statement classes as it does in the Word
-# class.
-class HStatement:
-    def __init__(self, word1, word2, word3):
-        self.word1 = word1
-        self.word2 = word2
-        self.word3 = word3
-        self.active = False
-
-    def setActive(self, active):
-        self.active = active
-
-    def getActive(self):
-        return self.active
-
-    # fade_to_white is running the fade_to_white functions of the word class (see those functions for more details). The
-    # minutes value is used to determine if "O'CLOCK" should be shown. O'CLOCK is always word2, and is only active when
-    # minutes = 0, or when a digital clock is displaying :00 through :04.
-    #
-    # fade_to_white in the HStatement class is also setting its own active state. This active state is referenced by
-    # the updatetime function to determine when to run fade_to_white or fade_to_grey.
-    def fade_to_white(self, color, minutes=0):
-        self.word1.fade_to_white(color)
-        if minutes is 0:
-            self.word2.fade_to_white(color)
-        else:
-            self.word2.fade_to_grey(color)
-        self.word3.fade_to_white(color)
-        self.setActive(True)
-
-    # fade_to_grey is running the fade_to_grey functions of the word class (see those functions for more details). The
-    # hour value is used to determine if PM or AM should be deactivated. AM or PM, which as always word3, should only
-    # be deactivated if the time is NOON or MIDNIGHT. All other hours should leave AM or PM active, to prevent
-    # unwanted blinking between hours.
-    def fade_to_grey(self, color, hour):
-        self.word1.fade_to_grey(color)
-        self.word2.fade_to_grey(color)
-        if hour is 24 or hour is 0:
-            self.word3.fade_to_grey(color)
-        self.setActive(False)
-
-
-# The MStatement class is a collection of words which together comprise an "Minute Statement", such as "IT'S HALF PAST".
-# This class is very similar to but with notable differences from HStatement, which is defined as a collection of
-# words to comprise an "Hour Statement". Activity works the same in the statement classes as it does in the Word
-# class.
-class MStatement:
-    def __init__(self, word1, word2, word3):
-        self.word1 = word1
-        self.word2 = word2
-        self.word3 = word3
-        self.active = False
-
-    def setActive(self, active):
-        self.active = active
-
-    def getActive(self):
-        return self.active
-
-    # fade_to_white is running the fade_to_white functions of the word class (see those functions for more details).
-    #
-    # fade_to_white in the MStatement class is also setting its own active state. This active state is referenced by
-    # the updatetime function to determine when to run fade_to_white or fade_to_grey.
-    def fade_to_white(self, color):
-        self.word1.fade_to_white(color)
-        self.word2.fade_to_white(color)
-        self.word3.fade_to_white(color)
-        self.setActive(True)
-
-    # fade_to_grey is running the fade_to_grey functions of the word class (see those functions for more details).
-    #
-    # fade_to_grey never greys out word1, as word1 is always IT'S, and IT'S is always active.
-    # fade_to_grey only greys out word3 when minutes is either 8 or 0, or :40-:44, :00-:04 on the clock. These are the
-    # only times that the clock changes from saying "PAST" to "TIL", or "TIL" to nothing. Otherwise, PAST/TIL are left
-    # active to prevent unwanted blinking.
-    def fade_to_grey(self, color, minutes):
-        self.word2.fade_to_grey(color)
-        if minutes is 8 or minutes is 0:
-            self.word3.fade_to_grey(color)
-        self.setActive(False)
-
-
-class Application(Frame):
-
-    def __init__(self, master=None):
-        super().__init__(master)
+# createRenderer creates the black canvas the face is drawn on, in the given frame, and returns the renderer for the
+# given backend, "canvas" for CanvasRenderer or "label" for LabelRenderer, drawing on it. When scalable is True, the
+# frame fills the window, and the face is scaled to fit it (see CanvasRenderer).
+def createRenderer(frame, backend, scalable=False):
+    if scalable:
+        frame.pack(fill="both", expand=True)
+    frame.CanvasBG = Canvas(frame, width=1000, height=1000, bd=0, highlightthickness=0, relief='ridge')
+    frame.CanvasBG.configure(background='black')
+    frame.CanvasBG.pack(side="left", fill="both", expand=True)
+    if backend == "label":
+        return LabelRenderer(frame.CanvasBG)
+    return CanvasRenderer(frame.CanvasBG, scalable)
+
+
+# createButtons creates the two buttons in the bottom right of the window, one for adjusting brightness, which runs the
+# function changeBrightness, and one for adjusting color, which runs the function changeColor.
+def createButtons(master, changeColor, changeBrightness):
+    Button(master, text="color", command=changeColor, bg="#000000", fg="#333333", borderwidth=0,
+           activeforeground="#FFFFFF", activebackground="#000000").pack(side=RIGHT)
+    Button(master, text="brightness", command=changeBrightness, bg="#000000", fg="#333333", borderwidth=0,
+           activeforeground="#FFFFFF", activebackground="#000000").pack(side=RIGHT)
+    return
+
+
+class Application(Frame, wordengine.WordClock):
+
+    # The backend argument selects the rendering backend for the clock face, "canvas" for CanvasRenderer or "label" for
+    # LabelRenderer. outputs are any other renderers the face is drawn with at the same time, such as a CellRenderer
+    # for streaming to LED panels (see wordstream.py). The other arguments are passed on to WordClock (see
+    # wordengine.py): the clock the time is read from, whether the built-in instrumentation is turned on, how the
+    # letters fade from one color to another, and the frame rate and length of the fades. When scalable is True, the
+    # face is scaled to fit the window (see CanvasRenderer).
+    def __init__(self, master=None, backend="canvas", clock=None, instrument=False, blending="linear", easing="smooth",
+                 outputs=(), fps=33, fade=0.75, scalable=False):
+        Frame.__init__(self, master)
         self.pack()
         self.master = master
-        self.CanvasBG = Canvas(self, width=1000, height=1000, bd=0, highlightthickness=0, relief='ridge')
-        self.CanvasBG.configure(background='black')
-        self.CanvasBG.pack(side="left", fill="both", expand=True)
-        # Color options are as follows:
-        #   #FFFFFF: WHITE, #AAAAAA: DIMMED WHITE, #333333: OFF
-        #   #00FF00: GREEN, #00AA00: DIMMED GREEN, #333333: OFF
-        #   #FF0000: RED, #AA0000: DIMMED RED, #333333: OFF
-        #   #FF00FF: VIOLET, #AA00AA: DIMMED VIOLET, #333333: OFF
-        #   #00FFFF: INDIGO, #00AAAA: DIMMED INDIGO, #333333: OFF
-        #   #FFFF00: YELLOW, #AAAAAA: DIMMED YELLOW, #333333: OFF
-        #   #0000FF: BLUE, #0000AA: DIMMED BLUE, #333333: OFF
-        self.colorOptions = (("FFFFFF", "AAAAAA", "333333"), ("00FF00", "00AA00", "333333"),
-                             ("FF0000", "AA0000", "333333"), ("FF00FF", "AA00AA", "333333"),
-                             ("00FFFF", "00AAAA", "333333"), ("FFFF00", "AAAA00", "333333"),
-                             ("0000FF", "0000AA", "333333"))
-        self.colorSelection = 0  # Initialized at white
-        self.brightnessSelection = 0  # Initialized at brightest
-        self.color = self.colorOptions[self.colorSelection][self.brightnessSelection]
-
-        # Letters is the array of letter instances. There are 100 letters. Two letter instances also include an
-        # apostrophe.
-        self.Letters = []
-        self.Letters.append((Letter(self.CanvasBG, text="I", column=0, row=0),
-                             Letter(self.CanvasBG, text="T'", column=1, row=0),
-                             Letter(self.CanvasBG, text="S", column=2, row=0),
-                             Letter(self.CanvasBG, text="Q", column=3, row=0),
-                             Letter(self.CanvasBG, text="U", column=4, row=0),
-                             Letter(self.CanvasBG, text="A", column=5, row=0),
-                             Letter(self.CanvasBG, text="R", column=6, row=0),
-                             Letter(self.CanvasBG, text="T", column=7, row=0),
-                             Letter(self.CanvasBG, text="E", column=8, row=0),
-                             Letter(self.CanvasBG, text="R", column=9, row=0)))
-        self.Letters.append((Letter(self.CanvasBG, text="H", column=0, row=1),
-                             Letter(self.CanvasBG, text="A", column=1, row=1),
-                             Letter(self.CanvasBG, text="L", column=2, row=1),
-                             Letter(self.CanvasBG, text="F", column=3, row=1),
-                             Letter(self.CanvasBG, text="T", column=4, row=1),
-                             Letter(self.CanvasBG, text="W", column=5, row=1),
-                             Letter(self.CanvasBG, text="E", column=6, row=1),
-                             Letter(self.CanvasBG, text="N", column=7, row=1),
-                             Letter(self.CanvasBG, text="T", column=8, row=1),
-                             Letter(self.CanvasBG, text="Y", column=9, row=1)))
-        self.Letters.append((Letter(self.CanvasBG, text="F", column=0, row=2),
-                             Letter(self.CanvasBG, text="I", column=1, row=2),
-                             Letter(self.CanvasBG, text="V", column=2, row=2),
-                             Letter(self.CanvasBG, text="E", column=3, row=2),
-                             Letter(self.CanvasBG, text="T", column=4, row=2),
-                             Letter(self.CanvasBG, text="E", column=5, row=2),
-                             Letter(self.CanvasBG, text="N", column=6, row=2),
-                             Letter(self.CanvasBG, text="T", column=7, row=2),
-                             Letter(self.CanvasBG, text="I", column=8, row=2),
-                             Letter(self.CanvasBG, text="L", column=9, row=2)))
-        self.Letters.append((Letter(self.CanvasBG, text="P", column=0, row=3),
-                             Letter(self.CanvasBG, text="A", column=1, row=3),
-                             Letter(self.CanvasBG, text="S", column=2, row=3),
-                             Letter(self.CanvasBG, text="T", column=3, row=3),
-                             Letter(self.CanvasBG, text="T", column=4, row=3),
-                             Letter(self.CanvasBG, text="W", column=5, row=3),
-                             Letter(self.CanvasBG, text="E", column=6, row=3),
-                             Letter(self.CanvasBG, text="L", column=7, row=3),
-                             Letter(self.CanvasBG, text="V", column=8, row=3),
-                             Letter(self.CanvasBG, text="E", column=9, row=3)))
-        self.Letters.append((Letter(self.CanvasBG, text="T", column=0, row=4),
-                             Letter(self.CanvasBG, text="W", column=1, row=4),
-                             Letter(self.CanvasBG, text="O", column=2, row=4),
-                             Letter(self.CanvasBG, text="S", column=3, row=4),
-                             Letter(self.CanvasBG, text="I", column=4, row=4),
-                             Letter(self.CanvasBG, text="X", column=5, row=4),
-                             Letter(self.CanvasBG, text="F", column=6, row=4),
-                             Letter(self.CanvasBG, text="O", column=7, row=4),
-                             Letter(self.CanvasBG, text="U", column=8, row=4),
-                             Letter(self.CanvasBG, text="R", column=9, row=4)))
-        self.Letters.append((Letter(self.CanvasBG, text="T", column=0, row=5),
-                             Letter(self.CanvasBG, text="H", column=1, row=5),
-                             Letter(self.CanvasBG, text="R", column=2, row=5),
-                             Letter(self.CanvasBG, text="E", column=3, row=5),
-                             Letter(self.CanvasBG, text="E", column=4, row=5),
-                             Letter(self.CanvasBG, text="E", column=5, row=5),
-                             Letter(self.CanvasBG, text="I", column=6, row=5),
-                             Letter(self.CanvasBG, text="G", column=7, row=5),
-                             Letter(self.CanvasBG, text="H", column=8, row=5),
-                             Letter(self.CanvasBG, text="T", column=9, row=5)))
-        self.Letters.append((Letter(self.CanvasBG, text="E", column=0, row=6),
-                             Letter(self.CanvasBG, text="L", column=1, row=6),
-                             Letter(self.CanvasBG, text="E", column=2, row=6),
-                             Letter(self.CanvasBG, text="V", column=3, row=6),
-                             Letter(self.CanvasBG, text="E", column=4, row=6),
-                             Letter(self.CanvasBG, text="N", column=5, row=6),
-                             Letter(self.CanvasBG, text="O", column=6, row=6),
-                             Letter(self.CanvasBG, text="O", column=7, row=6),
-                             Letter(self.CanvasBG, text="N", column=8, row=6),
-                             Letter(self.CanvasBG, text="E", column=9, row=6)))
-        self.Letters.append((Letter(self.CanvasBG, text="F", column=0, row=7),
-                             Letter(self.CanvasBG, text="I", column=1, row=7),
-                             Letter(self.CanvasBG, text="V", column=2, row=7),
-                             Letter(self.CanvasBG, text="E", column=3, row=7),
-                             Letter(self.CanvasBG, text="N", column=4, row=7),
-                             Letter(self.CanvasBG, text="I", column=5, row=7),
-                             Letter(self.CanvasBG, text="N", column=6, row=7),
-                             Letter(self.CanvasBG, text="E", column=7, row=7),
-                             Letter(self.CanvasBG, text="Z", column=8, row=7),
-                             Letter(self.CanvasBG, text="N", column=9, row=7)))
-        self.Letters.append((Letter(self.CanvasBG, text="M", column=0, row=8),
-                             Letter(self.CanvasBG, text="I", column=1, row=8),
-                             Letter(self.CanvasBG, text="D", column=2, row=8),
-                             Letter(self.CanvasBG, text="N", column=3, row=8),
-                             Letter(self.CanvasBG, text="I", column=4, row=8),
-                             Letter(self.CanvasBG, text="G", column=5, row=8),
-                             Letter(self.CanvasBG, text="H", column=6, row=8),
-                             Letter(self.CanvasBG, text="T", column=7, row=8),
-                             Letter(self.CanvasBG, text="B", column=8, row=8),
-                             Letter(self.CanvasBG, text="J", column=9, row=8)))
-        self.Letters.append((Letter(self.CanvasBG, text="O'", column=0, row=9),
-                             Letter(self.CanvasBG, text="C", column=1, row=9),
-                             Letter(self.CanvasBG, text="L", column=2, row=9),
-                             Letter(self.CanvasBG, text="O", column=3, row=9),
-                             Letter(self.CanvasBG, text="C", column=4, row=9),
-                             Letter(self.CanvasBG, text="K", column=5, row=9),
-                             Letter(self.CanvasBG, text="A", column=6, row=9),
-                             Letter(self.CanvasBG, text="M", column=7, row=9),
-                             Letter(self.CanvasBG, text="P", column=8, row=9),
-                             Letter(self.CanvasBG, text="M", column=9, row=9)))
-
-        # There are two buttons, one for adjusting brightness, which runs the function changeBrightness (defined later)
-        # and one for adjusting color, which runs the function changeColor (defined later)
-        self.buttonColor = Button(self.master, text="color", command=self.changeColor, bg="#000000", fg="#333333",
-                                  borderwidth=0, activeforeground="#FFFFFF", activebackground="#000000").pack(
-            side=RIGHT)
-        self.buttonBrightness = Button(self.master, text="brightness", command=self.changeBrightness, bg="#000000",
-                                       fg="#333333", borderwidth=0, activeforeground="#FFFFFF",
-                                       activebackground="#000000").pack(side=RIGHT)
-
-        # The word instances here are individually defined. There are two "FIVE"'s, and two "TEN"'s. FIVE_1 and TEN_1
-        # are each used in minute statements, FIVE_2 and TEN_2 are each used in hour statements. Two are necessary
-        # for the cases of "IT'S FIVE TIL FIVE PM" for example. All other words are unique.
-        #
-        # There are 25 words, with several letter overlaps between them. For the letters which overlap, it's expected
-        # for the letter to blink off and blink on during a transition, and not stay on.
-        self.wordHALF = Word(self.Letters[1][0], self.Letters[1][1], self.Letters[1][2], self.Letters[1][3],
-                             master=self.master)
-        self.wordMIDNIGHT = Word(self.Letters[8][0], self.Letters[8][1], self.Letters[8][2], self.Letters[8][3],
-                                 self.Letters[8][4], self.Letters[8][5], self.Letters[8][6], self.Letters[8][7],
-                                 master=self.master)
-        self.wordITS = Word(self.Letters[0][0], self.Letters[0][1], self.Letters[0][2], master=self.master)
-        self.wordQUARTER = Word(self.Letters[0][3], self.Letters[0][4], self.Letters[0][5], self.Letters[0][6],
-                                self.Letters[0][7], self.Letters[0][8], self.Letters[0][9], master=self.master)
-        self.wordTWENTY = Word(self.Letters[1][4], self.Letters[1][5], self.Letters[1][6], self.Letters[1][7],
-                               self.Letters[1][8], self.Letters[1][9], master=self.master)
-        self.wordFIVE_1 = Word(self.Letters[2][0], self.Letters[2][1], self.Letters[2][2], self.Letters[2][3],
-                               master=self.master)
-        self.wordTEN_1 = Word(self.Letters[2][4], self.Letters[2][5], self.Letters[2][6], master=self.master)
-        self.wordTIL = Word(self.Letters[2][7], self.Letters[2][8], self.Letters[2][9], master=self.master)
-        self.wordPAST = Word(self.Letters[3][0], self.Letters[3][1], self.Letters[3][2], self.Letters[3][3],
-                             master=self.master)
-        self.wordTWELVE = Word(self.Letters[3][4], self.Letters[3][5], self.Letters[3][6], self.Letters[3][7],
-                               self.Letters[3][8], self.Letters[3][9], master=self.master)
-        self.wordTWO = Word(self.Letters[4][0], self.Letters[4][1], self.Letters[4][2], master=self.master)
-        self.wordSIX = Word(self.Letters[4][3], self.Letters[4][4], self.Letters[4][5], master=self.master)
-        self.wordFOUR = Word(self.Letters[4][6], self.Letters[4][7], self.Letters[4][8], self.Letters[4][9],
-                             master=self.master)
-        self.wordTHREE = Word(self.Letters[5][0], self.Letters[5][1], self.Letters[5][2], self.Letters[5][3],
-                              self.Letters[5][4], master=self.master)
-        self.wordEIGHT = Word(self.Letters[5][5], self.Letters[5][6], self.Letters[5][7], self.Letters[5][8],
-                              self.Letters[5][9], master=self.master)
-        self.wordELEVEN = Word(self.Letters[6][0], self.Letters[6][1], self.Letters[6][2], self.Letters[6][3],
-                               self.Letters[6][4], self.Letters[6][5], master=self.master)
-        self.wordNOON = Word(self.Letters[6][5], self.Letters[6][6], self.Letters[6][7], self.Letters[6][8],
-                             master=self.master)
-        self.wordONE = Word(self.Letters[6][7], self.Letters[6][8], self.Letters[6][9], master=self.master)
-        self.wordFIVE_2 = Word(self.Letters[7][0], self.Letters[7][1], self.Letters[7][2], self.Letters[7][3],
-                               master=self.master)
-        self.wordTEN_2 = Word(self.Letters[5][9], self.Letters[6][9], self.Letters[7][9], master=self.master)
-        self.wordSEVEN = Word(self.Letters[4][3], self.Letters[5][3], self.Letters[6][3], self.Letters[7][3],
-                              self.Letters[8][3], master=self.master)
-        self.wordNINE = Word(self.Letters[7][4], self.Letters[7][5], self.Letters[7][6], self.Letters[7][7],
-                             master=self.master)
-        self.wordOCLOCK = Word(self.Letters[9][0], self.Letters[9][1], self.Letters[9][2], self.Letters[9][3],
-                               self.Letters[9][4], self.Letters[9][5], master=self.master)
-        self.wordPM = Word(self.Letters[9][8], self.Letters[9][9], master=self.master)
-        self.wordAM = Word(self.Letters[9][6], self.Letters[9][7], master=self.master)
-
-        # Hours is the array of HStatement instances. There are two exceptions, MIDNIGHT and NOON, which were one word
-        # each and as such did not require a full HStatement instance. These have been added to the array in a
-        # specific order, so that the actual hour value can be used when calling the correct HStatement in the
-        # updatetime function defined below.
-        self.Hours = []
-        self.Hours.append(self.wordMIDNIGHT)
-        self.Hours.append(HStatement(self.wordONE, self.wordOCLOCK, self.wordAM))
-        self.Hours.append(HStatement(self.wordTWO, self.wordOCLOCK, self.wordAM))
-        self.Hours.append(HStatement(self.wordTHREE, self.wordOCLOCK, self.wordAM))
-        self.Hours.append(HStatement(self.wordFOUR, self.wordOCLOCK, self.wordAM))
-        self.Hours.append(HStatement(self.wordFIVE_2, self.wordOCLOCK, self.wordAM))
-        self.Hours.append(HStatement(self.wordSIX, self.wordOCLOCK, self.wordAM))
-        self.Hours.append(HStatement(self.wordSEVEN, self.wordOCLOCK, self.wordAM))
-        self.Hours.append(HStatement(self.wordEIGHT, self.wordOCLOCK, self.wordAM))
-        self.Hours.append(HStatement(self.wordNINE, self.wordOCLOCK, self.wordAM))
-        self.Hours.append(HStatement(self.wordTEN_2, self.wordOCLOCK, self.wordAM))
-        self.Hours.append(HStatement(self.wordELEVEN, self.wordOCLOCK, self.wordAM))
-        self.Hours.append(self.wordNOON)
-        self.Hours.append(HStatement(self.wordONE, self.wordOCLOCK, self.wordPM))
-        self.Hours.append(HStatement(self.wordTWO, self.wordOCLOCK, self.wordPM))
-        self.Hours.append(HStatement(self.wordTHREE, self.wordOCLOCK, self.wordPM))
-        self.Hours.append(HStatement(self.wordFOUR, self.wordOCLOCK, self.wordPM))
-        self.Hours.append(HStatement(self.wordFIVE_2, self.wordOCLOCK, self.wordPM))
-        self.Hours.append(HStatement(self.wordSIX, self.wordOCLOCK, self.wordPM))
-        self.Hours.append(HStatement(self.wordSEVEN, self.wordOCLOCK, self.wordPM))
-        self.Hours.append(HStatement(self.wordEIGHT, self.wordOCLOCK, self.wordPM))
-        self.Hours.append(HStatement(self.wordNINE, self.wordOCLOCK, self.wordPM))
-        self.Hours.append(HStatement(self.wordTEN_2, self.wordOCLOCK, self.wordPM))
-        self.Hours.append(HStatement(self.wordELEVEN, self.wordOCLOCK, self.wordPM))
-
-        # Minutes is the array of MStatement instances. There is one exception, ITS, which is only one word, and did
-        # not required a full MStatement instance. These have been added to the array in a specific order, so that the
-        # actual minutes value can be used when calling the correct MStatement in the updatetime function defined
-        # below. ITS TWENTY PAST and ITS HALF PAST were added twice, because the minute value increments in
-        # five, but there is no TWENTY-FIVE PAST or THIRTY-FIVE PAST.
-        self.Minutes = []
-        self.Minutes.append(self.wordITS)
-        self.Minutes.append(MStatement(self.wordITS, self.wordFIVE_1, self.wordPAST))
-        self.Minutes.append(MStatement(self.wordITS, self.wordTEN_1, self.wordPAST))
-        self.Minutes.append(MStatement(self.wordITS, self.wordQUARTER, self.wordPAST))
-        self.Minutes.append(MStatement(self.wordITS, self.wordTWENTY, self.wordPAST))
-        self.Minutes.append(MStatement(self.wordITS, self.wordTWENTY, self.wordPAST))
-        self.Minutes.append(MStatement(self.wordITS, self.wordHALF, self.wordPAST))
-        self.Minutes.append(MStatement(self.wordITS, self.wordHALF, self.wordPAST))
-        self.Minutes.append(MStatement(self.wordITS, self.wordTWENTY, self.wordTIL))
-        self.Minutes.append(MStatement(self.wordITS, self.wordQUARTER, self.wordTIL))
-        self.Minutes.append(MStatement(self.wordITS, self.wordTEN_1, self.wordTIL))
-        self.Minutes.append(MStatement(self.wordITS, self.wordFIVE_1, self.wordTIL))
-
-    # adjustMinutes takes the actual minutes value, and modifies it to the correct index needed for the Minutes array.
-    def adjustMinutes(self, minutes):
-        return int(minutes / 5)
-
-    # adjustHours takes the actual hour and minutes value, and modifies it to the correct index needed for the Hours
-    # array. The next hour is called when the clock read :40 or higher, because at that point the minute statement will
-    # be reading "ITS TWENTY TIL" or less.
-    def adjustHours(self, hour, minutes):
-        if minutes < 8:
-            return hour
-        else:
-            return hour + 1
-
-    # changeColor uses loopAdd (see loopAdd function definition for more details) to shift the color selection to the
-    # next color in the array, and then updates all active letters to the newly selected color. Active letters are
-    # added to a temporary array, which is looped through, so that there is no delay between updated letters, other
-    # than the configured delay for visual effect.
-    def changeColor(self):
-        activeLetters = []
-        self.colorSelection = self.loopAdd(len(self.colorOptions), self.colorSelection)
-        self.color = self.colorOptions[self.colorSelection][self.brightnessSelection]
-        for i in range(0, 10):
-            for j in range(0, 10):
-                if self.Letters[i][j].getActive() is True:
-                    activeLetters.append(self.Letters[i][j])
-        for i in range(0, len(activeLetters)):
-            activeLetters[i].setColor("#" + str(self.colorOptions[self.colorSelection][self.brightnessSelection]))
-            self.master.update_idletasks()
-            self.master.update()
-            time.sleep(0.12)
-
-    # changeBrightness uses loopAdd (see loopAdd function definition for more details) to shift the brightness selection
-    # to the next (dim) color in the array, and then updates all active letters to the newly selected color. Active
-    # letters are added to a temporary array, which is looped through, so that there is no delay between updated
-    # letters, other than the configured delay for visual effect.
-    def changeBrightness(self):
-        activeLetters = []
-        self.brightnessSelection = self.loopAdd(len(self.colorOptions[self.colorSelection]), self.brightnessSelection)
-        self.color = self.colorOptions[self.colorSelection][self.brightnessSelection]
-        for i in range(0, 10):
-            for j in range(0, 10):
-                if self.Letters[i][j].getActive() is True:
-                    activeLetters.append(self.Letters[i][j])
-        for i in range(0, len(activeLetters)):
-            activeLetters[i].setColor("#" + str(self.colorOptions[self.colorSelection][self.brightnessSelection]))
-            self.master.update_idletasks()
-            self.master.update()
-            time.sleep(0.12)
-
-    # loopAdd takes the length of an array (maxloop) and the current index of the array being used (currentvalue) and
-    # increments UP to the next value. If the currentvalue is the max value of the array, then loopAdd returns 0 to go
-    # back to the beginning of the array. loopAdd is used in changeBrightness and changeColor in order to loop through
-    # the options of the colors and brightness.
-    def loopAdd(self, maxloop, currentvalue):
-        if currentvalue < maxloop - 1:
-            return currentvalue + 1
-        else:
-            return 0
-
-    # loopSub takes the length of an array (maxloop) and the current index of the array being used (currentvalue) and
-    # increments DOWN to the next value. If the currentvalue is 0, then loopSub retrns the max value of the array to go
-    # back to the beginning. loopSub is used in updatetime to calculate the last hour and minute value, which is then
-    # used to run fade_to_grey on the last HStatement and MStatement.
-    def loopSub(self, maxloop, currentvalue):
-        if currentvalue is 0:
-            return maxloop - 1
-        else:
-            return currentvalue - 1
-
-    # updatetime is the "bread and butter" of the program. This is where the time is evaluated, and the correct
-    # HStatement and MStatement are faded to grey and color as appropriate.
-    #
-    # First, the minutes and hour are adjusted to correspond to the correct index in the Hours and Minutes arrays. This
-    # is done by adjustMinutes and adjustHours. Because the minute statement is updated roughly every 5 minutes, the
-    # minutes value is divided by 5. Because the hour statement changes the hour word at the :40 minute mark rather
-    # than the :00 minute mark, the hour statement has to be bumped up at :40 minutes.
-    #
-    # Next, the last minute and last hour have to be calculated. For most cases, this will just be the adjusted minutes
-    # and the adjusted hours - 1, but for cases where the current hour and/or minutes are 0, loopSub is ran to return
-    # the max value in those cases, if appropriate.
-    #
-    # Finally, fade_to_grey is ran on the last minute and hour to turn them off, before turning on the current minute
-    # and hour statement. fade_to_grey is only ran if the statement is currently active, so it should only be ran at
-    # the time of change and not again. This prevents "blinking" behavior every time the clock re-checks the time, but
-    # the time has not actually changed.
-    #
-    # fade_to_white is run every time, because once the statement is active, running fade_to_white again will not cause
-    # any undesired behavior. The fade_to_white function in the word class is smart enough to only run if the word is
-    # inactive, so as long as fade_to_grey was not run mistakenly, then fade_to_white can be run without any harm.
-    #
-    # updatetime is scheduled to run every 30 seconds. It does not actually run every 30 seconds. If a change in time
-    # has occurred, updatetime will actually take quite awhile to run, accounting for all the delay times in fading
-    # for every individual word. The 30 second time starts counting at the end of the last execution of updatetime, so
-    # including run time for the execution, this can mean a delay of up to 50 seconds. This is why the function is
-    # scheduled for every 30, this ensures that that the longest time the app will take to update on a change in time is
-    # 29 seconds.
-    def updatetime(self):
-        minutes = self.adjustMinutes(int(time.strftime('%M', time.localtime())))
-        hour = self.adjustHours(int(time.strftime('%H', time.localtime())), minutes)
-        lastminute = self.loopSub(len(self.Minutes), minutes)
-        if self.Minutes[lastminute].getActive() is True:
-            self.Minutes[lastminute].fade_to_grey(self.color, minutes)
-        self.Minutes[minutes].fade_to_white(self.color)
-        lasthour = self.loopSub(len(self.Hours), hour)
-        if self.Hours[lasthour].getActive() is True:
-            self.Hours[lasthour].fade_to_grey(self.color, hour)
-        self.Hours[hour].fade_to_white(self.color, minutes)
-        self.master.after(30000, self.updatetime)
-
-
-# main function creates an instance of Tk, and the application class defined above. Then it runs updatetime on the
-# instance of Application.
-def main():
+        renderer = createRenderer(self, backend, scalable)
+        if len(outputs) > 0:
+            renderer = wordengine.FanoutRenderer((renderer,) + tuple(outputs))
+        wordengine.WordClock.__init__(self, master, renderer, clock, instrument, blending, easing, fps=fps, fade=fade)
+        createButtons(self.master, self.changeColor, self.changeBrightness)
+
+
+# WorkerApplication is the same window as Application, with the clock itself run by the given RenderWorker (see
+# wordengine.py) on a thread of its own, so that the Tk thread only draws the letters which changed, and a slow frame
+# never holds up the buttons. The clock is a plain WordClock, wordclock, scheduled on the worker, and the buttons hand
+# the clicks to the worker thread. The arguments are the same as those of Application.
+class WorkerApplication(Frame):
+    def __init__(self, master, worker, backend="canvas", clock=None, instrument=False, blending="linear",
+                 easing="smooth", outputs=(), fps=33, fade=0.75, scalable=False):
+        Frame.__init__(self, master)
+        self.pack()
+        self.master = master
+        self.worker = worker
+        output = worker.output(createRenderer(self, backend, scalable))
+        renderer = output
+        if len(outputs) > 0:
+            renderer = wordengine.FanoutRenderer((output,) + tuple(outputs))
+        self.wordclock = wordengine.WordClock(worker.scheduler, renderer, clock, instrument, blending, easing, fps=fps,
+                                              fade=fade)
+        self.wordclock.animator.frameEnd.append(output.publish)
+        createButtons(self.master, lambda: worker.call(self.wordclock.changeColor),
+                      lambda: worker.call(self.wordclock.changeBrightness))
+
+
+# replay drives the given application through every boundary where the face can change (every five minutes, or every
+# minute with minute dots) from start to end (both datetimes) on the given VirtualClock, as fast as the renderer can
+# go, instead of waiting in real time. For every slot, one line of JSON is written to output with the local time, the
+# slot, the words and mask which are lit, whether the transition was animated, the number of frames it took, and how
+# long it took to run in seconds. A summary line follows at the end.
+def replay(app, clock, start, end, output):
+    timestamp = start.timestamp()
+    clock.advance(timestamp - clock.time())
+    slots = 0
+    began = time.perf_counter()
+    while clock.time() <= end.timestamp():
+        now = clock.now()
+        transitionStart = time.perf_counter()
+        app.updatetime()
+        frames = app.animator.flush()
+        seconds = time.perf_counter() - transitionStart
+        output.write(json.dumps({"time": now.isoformat(), "slot": app.lastSlot,
+                                 "words": wordface.slotWords(app.lastSlot),
+                                 "mask": hex(wordface.SlotMasks[app.lastSlot]),
+                                 "animated": frames > 1, "frames": frames,
+                                 "seconds": round(seconds, 6)}) + "\n")
+        slots = slots + 1
+        clock.advance(wordface.secondsToBoundary(clock.now(), app.resolution))
+    elapsed = time.perf_counter() - began
+    output.write(json.dumps({"slots": slots, "seconds": round(elapsed, 6),
+                             "slotsPerSecond": round(slots / elapsed, 1) if elapsed > 0 else None}) + "\n")
+
+
+# addColors adds the colors given with --color to the application, and selects the first of them.
+def addColors(app, colors):
+    for i, color in enumerate(colors):
+        app.addColor(color, select=i == 0)
+
+
+# main function creates an instance of Tk, and the application class defined above. Then it starts the instance of
+# Application (see start), which paints the current time before the Tk mainloop is entered.
+#
+# With --replay, the clock is instead driven by a VirtualClock through every slot from --start to --end (a full day
+# from --start by default) as fast as possible, and the results are written to standard output (see replay). --tz sets
+# the time zone shown, for example to replay a daylight saving change in a given zone. --stats turns on the built-in
+# instrumentation, and logs the collected numbers to standard error every so many seconds (see reportStats). --color
+# adds a color of your own to the color button, and starts on it (it can be given more than once), and --blend and
+# --easing choose how the letters fade (see wordcolor.py), and --fps and --fade how smoothly and for how long (see
+# Animator in wordengine.py). --intro plays an intro animation after the time is first shown (see start). --layout
+# shows another face, such as the German one in layouts/german.json, and --dots adds minute dots to it (see
+# wordlayout.py). --stream sends the face to LED panels over UDP as well (see wordstream.py), and can be given more
+# than once. --framebuffer shares the face with other programs through a memory mapped file (see wordshm.py), and
+# --control lets other programs change the color and brightness and follow the state of the clock (see
+# wordcontrol.py). --worker runs the clock on a thread of its own (see WorkerApplication). --schedule dims the clock
+# and turns it off and on again at the times given (see setSchedule in wordengine.py). --resizable scales the face to
+# fit the window, and --fullscreen fills the screen with it (see CanvasRenderer).
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Word Clock")
+    parser.add_argument("--backend", choices=("canvas", "label"), default="canvas",
+                        help="rendering backend for the clock face")
+    parser.add_argument("--layout", metavar="FILE",
+                        help="layout of the face, such as layouts/german.json (default: the English face)")
+    parser.add_argument("--dots", action="store_true",
+                        help="light a minute dot in a corner of the face for every minute past the words shown")
+    parser.add_argument("--tz", help="time zone to show, such as Europe/Berlin (default: the local time zone)")
+    parser.add_argument("--stats", type=float, metavar="SECONDS",
+                        help="turn on instrumentation, and log the collected numbers every SECONDS seconds")
+    parser.add_argument("--color", action="append", default=[], type=wordcolor.normalColor, metavar="RRGGBB",
+                        help="add a color to the color button and start on it, such as FF8800 (may be repeated)")
+    parser.add_argument("--blend", choices=sorted(wordcolor.Blendings), default="linear",
+                        help="how colors are mixed during a fade (default: linear)")
+    parser.add_argument("--easing", choices=sorted(wordcolor.Easings), default="smooth",
+                        help="how a fade moves along over time (default: smooth)")
+    parser.add_argument("--fps", type=float, default=33, help="frames per second of the fades (default: 33)")
+    parser.add_argument("--fade", type=float, default=0.75, metavar="SECONDS",
+                        help="how long a transition takes, in seconds (default: 0.75)")
+    parser.add_argument("--intro", choices=("none", "sweep"), default="none",
+                        help="intro animation to play after the time is first shown (default: none)")
+    parser.add_argument("--schedule", type=wordengine.parseSchedule, metavar="HH:MM=LEVEL,...",
+                        help="brightness schedule, such as 22:00=dim,00:30=off,07:00=bright")
+    parser.add_argument("--stream", action="append", default=[], type=wordstream.parseAddress, metavar="HOST:PORT",
+                        help="also send the face to an LED panel listening on HOST:PORT (may be repeated)")
+    parser.add_argument("--framebuffer", metavar="PATH",
+                        help="also write the face to a shared memory framebuffer at PATH, such as /dev/shm/wordclock")
+    parser.add_argument("--control", type=wordcontrol.parseControl, metavar="PORT|PATH",
+                        help="serve the control API on localhost:PORT, or on the Unix socket PATH")
+    parser.add_argument("--resizable", action="store_true",
+                        help="scale the face to fit the window when it is resized (canvas backend only)")
+    parser.add_argument("--fullscreen", action="store_true",
+                        help="fill the screen with the face, scaled to fit, as for a kiosk (canvas backend only)")
+    parser.add_argument("--worker", action="store_true",
+                        help="work out the frames on a thread of their own, apart from the window")
+    parser.add_argument("--replay", action="store_true", help="replay a range of time as fast as possible")
+    parser.add_argument("--start", type=datetime.datetime.fromisoformat,
+                        help="start of the replay, such as 2024-03-31T00:00 (default: today at midnight)")
+    parser.add_argument("--end", type=datetime.datetime.fromisoformat,
+                        help="end of the replay (default: 24 hours after the start)")
+    args = parser.parse_args(argv)
+    scalable = args.resizable or args.fullscreen
+    if scalable and args.backend != "canvas":
+        parser.error("--resizable and --fullscreen need the canvas backend")
+    if args.layout is not None or args.dots:
+        path = args.layout or wordlayout.DefaultLayout
+        try:
+            wordface.useLayout(wordlayout.loadLayout(path, dots=args.dots))
+        except (OSError, ValueError) as error:
+            parser.error("%s: %s" % (path, error))
+    tz = None
+    if args.tz is not None:
+        tz = zoneinfo.ZoneInfo(args.tz)
+
     root = Tk()
     root.title("Word Clock")
     root.configure(background='black')
-    app = Application(master=root)
-    app.updatetime()
+    if args.fullscreen:
+        root.attributes("-fullscreen", True)
+    if args.replay:
+        start = args.start
+        if start is None:
+            start = datetime.datetime.combine(datetime.date.today(), datetime.time())
+        if start.tzinfo is None and tz is not None:
+            start = start.replace(tzinfo=tz)
+        end = args.end
+        if end is None:
+            end = start + datetime.timedelta(hours=24) - datetime.timedelta(minutes=wordface.Resolution)
+        elif end.tzinfo is None and tz is not None:
+            end = end.replace(tzinfo=tz)
+        clock = wordface.VirtualClock(start, tz)
+        app = Application(master=root, backend=args.backend, clock=clock, blending=args.blend, easing=args.easing,
+                          fps=args.fps, fade=args.fade)
+        addColors(app, args.color)
+        if args.schedule is not None:
+            app.setSchedule(args.schedule)
+        replay(app, clock, start, end, sys.stdout)
+        root.destroy()
+        return
+    outputs = ()
+    if len(args.stream) > 0 or args.framebuffer is not None:
+        outputs = (wordengine.CellRenderer(),)
+    worker = None
+    if args.worker:
+        worker = wordengine.RenderWorker(root)
+        app = WorkerApplication(root, worker, backend=args.backend, clock=wordface.SystemClock(tz),
+                                instrument=args.stats is not None, blending=args.blend, easing=args.easing,
+                                outputs=outputs, fps=args.fps, fade=args.fade, scalable=scalable)
+        wordclock = app.wordclock
+    else:
+        app = Application(master=root, backend=args.backend, clock=wordface.SystemClock(tz),
+                          instrument=args.stats is not None, blending=args.blend, easing=args.easing, outputs=outputs,
+                          fps=args.fps, fade=args.fade, scalable=scalable)
+        wordclock = app
+    addColors(wordclock, args.color)
+    if args.schedule is not None:
+        wordclock.setSchedule(args.schedule)
+    if len(args.stream) > 0:
+        wordstream.UdpStream(wordclock.master, wordclock.animator, outputs[0], args.stream)
+    if args.framebuffer is not None:
+        framebuffer = wordshm.SharedFramebuffer(args.framebuffer, wordshm.Cells, wordface.Columns, wordface.Rows)
+        wordshm.FramebufferOutput(wordclock.animator, outputs[0], framebuffer)
+    if args.control is not None:
+        wordcontrol.ControlServer(wordclock, args.control)
+    if args.stats is not None:
+        logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+        wordclock.master.after(int(args.stats * 1000), wordclock.reportStats, args.stats)
+    wordclock.start(args.intro)
+    if worker is not None:
+        worker.start()
     root.mainloop()
+    if worker is not None:
+        worker.stop()
 
 
-# run it!
-main()
+# run it! (only when run as a script, so that tools such as benchmark.py can import the Application class)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# wordcolor is the color math of the clock, kept apart from the Tk application so that every renderer can use it. It
+# works out the colors a letter steps through when it fades from one color to another, for any two 24 bit colors.
+#
+# A fade is made of two choices:
+#   blending: how the two colors are mixed. "srgb" mixes the hexadecimal values directly, the way the clock always has,
+#   which makes fades look uneven, because the values are not proportional to how bright the color looks. "linear"
+#   mixes the colors in linear light, which is how light actually adds up, and is the default. "oklab" mixes the colors
+#   in the OKLab perceptual color space, which keeps the steps even to the eye and the hue steady along the way.
+#   easing: how the fade moves along over time. "linear" moves at an even pace, "in" starts slow, "out" ends slow, and
+#   "smooth" (the default) starts and ends slow.
+#
+# Colors are given as "#rrggbb" or "rrggbb" strings, in upper or lower case, and palettes are returned as lower case
+# "#rrggbb" strings, ready to be handed to Tk.
+
+
+# parseColor turns a color string into a tuple of its red, green and blue values, from 0 to 255.
+def parseColor(color):
+    color = color.lstrip("#")
+    if len(color) != 6:
+        raise ValueError("colors are given as six hexadecimal digits, such as #FF8800, not %r" % color)
+    return int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16)
+
+
+# formatColor turns a tuple of red, green and blue values back into a "#rrggbb" string.
+def formatColor(rgb):
+    return "#%02x%02x%02x" % rgb
+
+
+# normalColor returns the color in the form it is written in colorOptions: six upper case digits without the "#".
+def normalColor(color):
+    return "%02X%02X%02X" % parseColor(color)
+
+
+# dimColor returns the dimmed version of a color, with every component scaled the same way FF is dimmed to AA in
+# colorOptions.
+def dimColor(color):
+    red, green, blue = parseColor(color)
+    return "%02X%02X%02X" % (red * 0xAA // 0xFF, green * 0xAA // 0xFF, blue * 0xAA // 0xFF)
+
+
+# linearToSrgb converts a single component from linear light (0.0 to 1.0, clamped to that range) to the sRGB values
+# used by colors (0 to 255).
+def linearToSrgb(value):
+    value = min(1.0, max(0.0, value))
+    if value <= 0.0031308:
+        encoded = value * 12.92
+    else:
+        encoded = 1.055 * value ** (1 / 2.4) - 0.055
+    return int(round(encoded * 255))
+
+
+# srgbValueToLinear converts a single component from the sRGB values used by colors (0 to 255) to linear light (0.0 to
+# 1.0). It is only used to fill linearTable.
+def srgbValueToLinear(value):
+    value = value / 255
+    if value <= 0.04045:
+        return value / 12.92
+    return ((value + 0.055) / 1.055) ** 2.4
+
+
+# linearTable holds the linear light value of every sRGB value, as there are only 256 of them.
+linearTable = tuple(srgbValueToLinear(value) for value in range(0, 256))
+
+
+# srgbToLinear converts a single component from the sRGB values used by colors (0 to 255) to linear light (0.0 to
+# 1.0), looked up from linearTable.
+def srgbToLinear(value):
+    return linearTable[value]
+
+
+# toOklab converts a color from red, green and blue values to the OKLab color space, as (lightness, a, b).
+def toOklab(rgb):
+    red, green, blue = (linearTable[value] for value in rgb)
+    l = (0.4122214708 * red + 0.5363325363 * green + 0.0514459929 * blue) ** (1 / 3)
+    m = (0.2119034982 * red + 0.6806995451 * green + 0.1073969566 * blue) ** (1 / 3)
+    s = (0.0883024619 * red + 0.2817188376 * green + 0.6299787005 * blue) ** (1 / 3)
+    return (0.2104542553 * l + 0.7936177850 * m - 0.0040720468 * s,
+            1.9779984951 * l - 2.4285922050 * m + 0.4505937099 * s,
+            0.0259040371 * l + 0.7827717662 * m - 0.8086757660 * s)
+
+
+# fromOklab converts a color from the OKLab color space back to red, green and blue values.
+def fromOklab(lab):
+    lightness, a, b = lab
+    l = (lightness + 0.3963377774 * a + 0.2158037573 * b) ** 3
+    m = (lightness - 0.1055613458 * a - 0.0638541728 * b) ** 3
+    s = (lightness - 0.0894841775 * a - 1.2914855480 * b) ** 3
+    return (linearToSrgb(4.0767416621 * l - 3.3077115913 * m + 0.2309699292 * s),
+            linearToSrgb(-1.2684380046 * l + 2.6097574011 * m - 0.3413193965 * s),
+            linearToSrgb(-0.0041960863 * l - 0.7034186147 * m + 1.7076147010 * s))
+
+
+# Blendings maps the name of every blending to the pair of functions which convert a color into the space it is mixed
+# in, and back.
+Blendings = {"srgb": (lambda rgb: rgb, lambda mixed: tuple(int(round(value)) for value in mixed)),
+             "linear": (lambda rgb: tuple(linearTable[value] for value in rgb),
+                        lambda mixed: tuple(linearToSrgb(value) for value in mixed)),
+             "oklab": (toOklab, fromOklab)}
+
+# Easings maps the name of every easing to the function which turns the share of the fade's time which has passed
+# (0.0 to 1.0) into the share of the way from the start color to the target color.
+Easings = {"linear": lambda t: t,
+           "in": lambda t: t * t,
+           "out": lambda t: t * (2 - t),
+           "smooth": lambda t: t * t * (3 - 2 * t)}
+
+
+# blend returns the color the given share (0.0 to 1.0) of the way from the start color to the target color, mixed with
+# the given blending. Both colors are tuples of red, green and blue values.
+def blend(start, target, share, blending="linear"):
+    encode, decode = Blendings[blending]
+    startMixed = encode(start)
+    targetMixed = encode(target)
+    return decode(tuple(startValue + (targetValue - startValue) * share
+                        for startValue, targetValue in zip(startMixed, targetMixed)))
+
+
+# fadePalettes is the palette cache used by fadePalette. It is keyed by (start color, target color, step count,
+# blending, easing), and holds the ready to use "#rrggbb" color codes for every step of the fade between the two
+# colors. Fades which are redirected halfway start from colors in between, so to keep the cache from growing without
+# end, no more palettes are added once it holds paletteLimit of them.
+fadePalettes = {}
+paletteLimit = 4096
+
+
+# fadePalette returns the colors a letter steps through when fading from the start color to the target color in the
+# given number of steps, using the given blending and easing. The last step is always exactly the target color. This
+# works the same for every color, including the "off" color #333333, so fading to or from off takes the same number of
+# steps as any other fade.
+#
+# Each palette is only computed the first time it is asked for, and is then kept in fadePalettes, so the fades
+# themselves only have to index into a table.
+def fadePalette(start, target, steps, blending="linear", easing="smooth"):
+    key = (start, target, steps, blending, easing)
+    palette = fadePalettes.get(key)
+    if palette is None:
+        startColor = parseColor(start)
+        targetColor = parseColor(target)
+        ease = Easings[easing]
+        colors = []
+        for i in range(1, steps):
+            colors.append(formatColor(blend(startColor, targetColor, ease(i / steps), blending)))
+        colors.append(formatColor(targetColor))
+        palette = tuple(colors)
+        if len(fadePalettes) < paletteLimit:
+            fadePalettes[key] = palette
+    return palette
+
+
+# buildPalettes fills the palette cache with the palettes for every pair of the given colors, so that no palette has to
+# be computed while the clock is animating.
+def buildPalettes(colors, steps, blending="linear", easing="smooth"):
+    for start in colors:
+        for target in colors:
+            fadePalette(start, target, steps, blending, easing)
+
+
+# addPalettes fills the palette cache with the palettes from and to the given new colors, for every one of the given
+# colors the cache was already filled for (see buildPalettes) and every new color, so that adding a color only costs
+# the palettes it takes part in, however many colors there are already.
+def addPalettes(newColors, colors, steps, blending="linear", easing="smooth"):
+    newColors = set(newColors)
+    for new in newColors:
+        for other in newColors | set(colors):
+            fadePalette(new, other, steps, blending, easing)
+            fadePalette(other, new, steps, blending, easing)
+
+
+# dropPalettes removes every palette from or to any of the given colors from the palette cache, to make room for the
+# palettes of colors which are still in use.
+def dropPalettes(colors):
+    colors = set(colors)
+    for key in [key for key in fadePalettes if key[0] in colors or key[1] in colors]:
+        del fadePalettes[key]
+    return
@@ -0,0 +1,260 @@
+import os
+import json
+import asyncio
+import threading
+import wordface
+import wordcolor
+
+
+# wordcontrol lets other programs on the same machine, such as a fleet manager, control a running clock and follow
+# what it shows, over HTTP on a localhost port or on a Unix socket. The server runs on an asyncio event loop in a
+# thread of its own, next to the Tk mainloop (or the Scheduler of a clock without Tk), so requests never hold up the
+# animation, and the clock itself is only ever touched from its own thread.
+#
+# Every request is a single HTTP/1.1 request on a connection of its own, with JSON bodies:
+#   GET /state: the state of the clock (see faceState).
+#   POST /color with {"color": "FF8800"}: switch to any color (see selectColor in wordengine.py).
+#   POST /brightness with {"brightness": 1}: switch to a brightness, 0 for fully bright, 1 for dimmed and 2 for off.
+#   GET /events: a stream of server-sent events (text/event-stream), with the state as the data of an event every time
+#   it changes, starting with the state as it is.
+# Commands are answered with 202 Accepted as soon as they are read, and applied on the clock's thread on its next turn
+# of the event loop. Every command which arrives before then is merged into the same update, with the last color and
+# the last brightness asked for winning, so a burst of commands results in a single fade to the final state. Bad
+# requests are answered with 400 and {"error": message}.
+#
+# For example, with --control 8765:
+#   curl -d '{"color": "FF8800"}' localhost:8765/color
+#   curl -N localhost:8765/events
+# or with --control /run/wordclock.sock, curl --unix-socket /run/wordclock.sock http://clock/state.
+Statuses = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large"}
+bodyLimit = 65536
+
+
+# parseControl turns the address given with --control into a port number on localhost (if it is all digits) or the
+# path of a Unix socket.
+def parseControl(address):
+    if address.isdigit():
+        return int(address)
+    return address
+
+
+# contentLength returns the Content-Length of a request, given its headers by lower case name, 0 if there is none, or
+# None if it is not a number.
+def contentLength(headers):
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        return None
+    if length < 0:
+        return None
+    return length
+
+
+# faceState returns the state of the given WordClock as a dictionary, as sent by the control server: the slot shown
+# and its words, the mask of the letters lit (see wordface.py), the color the lit letters are showing (or fading to),
+# the selected color and brightness, and the color options to choose from.
+def faceState(wordclock):
+    slot = wordclock.lastSlot
+    words = []
+    if slot is not None:
+        words = wordface.slotWords(slot)
+    return {"slot": slot, "words": words, "mask": hex(wordclock.face.active), "color": "#" + wordclock.color.lower(),
+            "colorIndex": wordclock.colorSelection, "brightness": wordclock.brightnessSelection,
+            "colors": ["#" + options[0].lower() for options in wordclock.colorOptions]}
+
+
+# ControlServer class serves the control API for the given WordClock on the given address, a port number or the
+# path of a Unix socket (see parseControl). The server starts listening before the constructor returns, and an
+# OSError is raised if it cannot. commands counts the commands received, and updates the merged updates applied.
+class ControlServer:
+    def __init__(self, wordclock, address):
+        self.wordclock = wordclock
+        self.address = address
+        self.lock = threading.Lock()
+        self.pending = {}  # The merged commands waiting to be applied, by name
+        self.scheduled = False  # Whether apply is scheduled on the clock's thread
+        self.commands = 0
+        self.updates = 0
+        self.state = faceState(wordclock)
+        self.shown = None  # What the state was worked out from, see frame
+        self.subscribers = set()  # A queue for every client following /events
+        self.loop = asyncio.new_event_loop()
+        self.server = None
+        self.error = None
+        started = threading.Event()
+        self.thread = threading.Thread(target=self.run, args=(started,), name="wordcontrol", daemon=True)
+        self.thread.start()
+        started.wait()
+        if self.error is not None:
+            raise self.error
+        wordclock.animator.frameEnd.append(self.frame)
+
+    # run runs the event loop of the server, in its own thread.
+    def run(self, started):
+        asyncio.set_event_loop(self.loop)
+        try:
+            if isinstance(self.address, int):
+                self.server = self.loop.run_until_complete(asyncio.start_server(self.handle, "127.0.0.1",
+                                                                                self.address))
+            else:
+                self.server = self.loop.run_until_complete(asyncio.start_unix_server(self.handle, self.address))
+        except OSError as error:
+            self.error = error
+            started.set()
+            return
+        started.set()
+        self.loop.run_forever()
+        self.server.close()
+
+    # command notes down a command from a client, merged with any other commands waiting, and schedules apply on the
+    # clock's thread, unless it is already scheduled. If it cannot be scheduled, because the Tk mainloop is not
+    # running, the command is left waiting, and the next command tries again.
+    def command(self, name, value):
+        with self.lock:
+            self.pending[name] = value
+            self.commands = self.commands + 1
+            if self.scheduled:
+                return
+            self.scheduled = True
+        try:
+            self.wordclock.master.after(0, self.apply)
+        except RuntimeError:
+            with self.lock:
+                self.scheduled = False
+        return
+
+    # apply applies the commands waiting, on the clock's thread, as a single update.
+    def apply(self):
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+            self.scheduled = False
+        if "color" in pending:
+            self.wordclock.selectColor(pending["color"])
+        if "brightness" in pending:
+            self.wordclock.selectBrightness(pending["brightness"])
+        self.updates = self.updates + 1
+        return
+
+    # frame is called at the end of every frame of the animator, on the clock's thread. Anything which changes the
+    # state also starts a fade, so the state only needs to be checked here, and is sent to the subscribers when it
+    # has changed.
+    def frame(self):
+        wordclock = self.wordclock
+        shown = (wordclock.lastSlot, wordclock.face.active, wordclock.color, wordclock.colorSelection,
+                 wordclock.brightnessSelection, len(wordclock.colorOptions))
+        if shown == self.shown:
+            return
+        self.shown = shown
+        self.state = faceState(wordclock)
+        self.loop.call_soon_threadsafe(self.publish, self.state)
+        return
+
+    # publish sends the state to every subscriber, on the server's thread. A subscriber which has not kept up only
+    # gets the latest state.
+    def publish(self, state):
+        for queue in self.subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(state)
+        return
+
+    # handle reads a request from a client, and answers it. A request which cannot be read, because of a malformed
+    # request line or Content-Length, is answered with 400.
+    async def handle(self, reader, writer):
+        try:
+            request = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line.strip() == b"":
+                    break
+                name, separator, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = contentLength(headers)
+            if len(request) != 3:
+                self.respond(writer, 400, {"error": "the request line is not METHOD PATH VERSION"})
+            elif length is None:
+                self.respond(writer, 400, {"error": "the Content-Length is not a number"})
+            elif length > bodyLimit:
+                self.respond(writer, 413, {"error": "request body too large"})
+            elif request[:2] == ["GET", "/events"]:
+                await self.stream(reader, writer)
+            else:
+                method, path, version = request
+                body = b""
+                if length > 0:
+                    body = await reader.readexactly(length)
+                status, result = self.route(method, path, body)
+                self.respond(writer, status, result)
+            await writer.drain()
+        except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    # route answers a request other than /events, and returns the status and the JSON to answer with.
+    def route(self, method, path, body):
+        routes = {"/state": "GET", "/color": "POST", "/brightness": "POST"}
+        if path not in routes:
+            return 404, {"error": "no such path %s" % path}
+        if method != routes[path]:
+            return 405, {"error": "%s only takes %s" % (path, routes[path])}
+        if path == "/state":
+            return 200, self.state
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            return 400, {"error": "the body is not JSON"}
+        if not isinstance(request, dict):
+            return 400, {"error": "the body is not a JSON object"}
+        if path == "/color":
+            try:
+                color = wordcolor.normalColor(str(request.get("color")))
+            except ValueError:
+                return 400, {"error": "colors are given as RRGGBB, not %r" % request.get("color")}
+            self.command("color", color)
+        else:
+            brightness = request.get("brightness")
+            if brightness not in (0, 1, 2) or isinstance(brightness, bool):
+                return 400, {"error": "brightness is 0, 1 or 2, not %r" % brightness}
+            self.command("brightness", brightness)
+        return 202, {"accepted": path[1:]}
+
+    def respond(self, writer, status, result):
+        body = json.dumps(result).encode()
+        writer.write(("HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n"
+                      "Connection: close\r\n\r\n" % (status, Statuses[status], len(body))).encode() + body)
+        return
+
+    # stream sends the state to a client following /events, every time it changes, until the client goes away. The
+    # client never sends anything more, so the end of its side of the connection is watched for at the same time, and
+    # the client stops being a subscriber as soon as it closes the connection, not only on the next change.
+    async def stream(self, reader, writer):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Connection: close\r\n\r\n")
+        queue = asyncio.Queue(maxsize=1)
+        queue.put_nowait(self.state)
+        self.subscribers.add(queue)
+        closed = asyncio.ensure_future(reader.read(1))
+        try:
+            while True:
+                getting = asyncio.ensure_future(queue.get())
+                await asyncio.wait((getting, closed), return_when=asyncio.FIRST_COMPLETED)
+                if closed.done():
+                    getting.cancel()
+                    break
+                writer.write(b"event: state\ndata: " + json.dumps(getting.result()).encode() + b"\n\n")
+                await writer.drain()
+        finally:
+            closed.cancel()
+            self.subscribers.discard(queue)
+
+    # close stops the server, and removes its Unix socket, if it has one.
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        if not isinstance(self.address, int) and os.path.exists(self.address):
+            os.remove(self.address)
+        return
@@ -0,0 +1,1394 @@
+import time
+import math
+import datetime
+import collections
+import heapq
+import threading
+import logging
+import wordface
+import wordcolor
+
+
+# wordengine is the animation engine of the clock, kept apart from the Tk application so that the clock face can be
+# animated and drawn without Tk, for example by the raster renderer in wordraster.py. It holds everything between the
+# time and the renderer: the letters and words of the face, the fades, the frame scheduler, and WordClock, which works
+# out what the face should show and when. The Tk application in wordclockv2.py is a WordClock with a Tk window around
+# it.
+
+
+# Scheduler class stands in for the Tk root when there is no Tk. It has the same after, after_cancel and
+# update_idletasks functions the animator and WordClock use, and a mainloop which runs whatever is scheduled at the
+# right time until quit is called (or nothing is scheduled any more). Like the Tk root, after may also be called from
+# other threads (see wordcontrol.py), and the mainloop wakes up at once for whatever they schedule. When wait is True,
+# the mainloop does not return when nothing is scheduled, but sleeps until something is, like the Tk mainloop, for a
+# clock which may have nothing to do for hours while it is off (see RenderWorker).
+class Scheduler:
+    def __init__(self, wait=False):
+        self.wait = wait
+        self.jobs = []  # A heap of (due, number, function, args), by time.monotonic()
+        self.cancelled = set()
+        self.jobsMade = 0
+        self.running = False
+        self.condition = threading.Condition()
+
+    def after(self, ms, function, *args):
+        with self.condition:
+            self.jobsMade = self.jobsMade + 1
+            heapq.heappush(self.jobs, (time.monotonic() + ms / 1000, self.jobsMade, function, args))
+            self.condition.notify()
+            return self.jobsMade
+
+    def after_cancel(self, job):
+        with self.condition:
+            self.cancelled.add(job)
+        return
+
+    def update_idletasks(self):
+        return
+
+    def mainloop(self):
+        self.running = True
+        while True:
+            with self.condition:
+                if self.running and len(self.jobs) == 0 and self.wait:
+                    self.condition.wait()
+                    continue
+                if not self.running or len(self.jobs) == 0:
+                    break
+                due, job, function, args = self.jobs[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self.condition.wait(wait)
+                    continue
+                heapq.heappop(self.jobs)
+                if job in self.cancelled:
+                    self.cancelled.discard(job)
+                    continue
+            function(*args)
+        self.running = False
+        return
+
+    def quit(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        return
+
+
+# SharedFrames class stands in for the master of the animators of many clock faces (see ClockGroup), so that all of
+# them are stepped together, in a single frame scheduled on the real master (the Tk root or a Scheduler), rather than
+# each scheduling frames of its own. Every function scheduled with after is run on the next shared frame. The frame is
+# scheduled by the first function asked for after the last frame, with the wait that function asked for, and the
+# waits of the rest are ignored: the animators all ask for the same frame delay, so they join the frame already due.
+# frames counts the shared frames run.
+class SharedFrames:
+    def __init__(self, master):
+        self.master = master
+        self.waiting = {}  # The functions to run on the next frame, as (function, args), by job
+        self.jobsMade = 0
+        self.job = None
+        self.frames = 0
+
+    def after(self, ms, function, *args):
+        self.jobsMade = self.jobsMade + 1
+        self.waiting[self.jobsMade] = (function, args)
+        if self.job is None:
+            self.job = self.master.after(ms, self.frame)
+        return self.jobsMade
+
+    def after_cancel(self, job):
+        self.waiting.pop(job, None)
+        if len(self.waiting) == 0 and self.job is not None:
+            self.master.after_cancel(self.job)
+            self.job = None
+        return
+
+    def update_idletasks(self):
+        self.master.update_idletasks()
+        return
+
+    def frame(self):
+        self.job = None
+        waiting = self.waiting
+        self.waiting = {}
+        for function, args in waiting.values():
+            function(*args)
+        self.frames = self.frames + 1
+        return
+
+
+# Metrics class holds the numbers collected by the built-in instrumentation of the clock, which is used to find out
+# why a display stutters. It is only created when instrumentation is turned on (see the instrument argument of the
+# WordClock class). When it is off, the animator and application only check that metrics is None, so there is next
+# to no cost.
+#
+# The following are collected since the last reset:
+#   frames, frameTime, maxFrameTime: how many frames the animator ran, and how long they took in total and at most.
+#   missedFrames: frames which started or finished too late to keep to the frame interval (see frame).
+#   tkCalls, maxFrameCalls: the calls made to Tk by the renderer, in total and at most in a single frame.
+#   writesSaved: letter color writes which were dropped because they changed nothing (see CoalescingRenderer).
+#   transitions, startLag, maxStartLag: transitions started by updatetime, and how long after the minute boundary they
+#   were started, in total and at most.
+#   updates, updateTime: runs of updatetime, and how long they took in total.
+#   changes, changeTime: color and brightness changes, and how long the button presses took in total.
+# The CPU time used by the process is read when the numbers are reported, and is never reset.
+class Metrics:
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.frameTime = 0.0
+        self.maxFrameTime = 0.0
+        self.missedFrames = 0
+        self.tkCalls = 0
+        self.maxFrameCalls = 0
+        self.transitions = 0
+        self.startLag = 0.0
+        self.maxStartLag = 0.0
+        self.updates = 0
+        self.updateTime = 0.0
+        self.changes = 0
+        self.changeTime = 0.0
+        self.callsAtReset = self.renderer.calls
+        self.savedAtReset = self.renderer.getSaved()
+        return
+
+    # frame records one frame of the animator. lateness is how long after it was due the frame started, and interval
+    # is the time the frame had before the next one. A frame is missed when it started more than a frame late, or when
+    # it took longer than its interval.
+    def frame(self, duration, lateness, calls, interval):
+        self.frames = self.frames + 1
+        self.frameTime = self.frameTime + duration
+        self.maxFrameTime = max(self.maxFrameTime, duration)
+        if lateness > interval or duration > interval:
+            self.missedFrames = self.missedFrames + 1
+        self.maxFrameCalls = max(self.maxFrameCalls, calls)
+        return
+
+    def transitionStarted(self, lag):
+        self.transitions = self.transitions + 1
+        self.startLag = self.startLag + lag
+        self.maxStartLag = max(self.maxStartLag, lag)
+        return
+
+    def update(self, duration):
+        self.updates = self.updates + 1
+        self.updateTime = self.updateTime + duration
+        return
+
+    def change(self, duration):
+        self.changes = self.changes + 1
+        self.changeTime = self.changeTime + duration
+        return
+
+    # snapshot returns the numbers collected since the last reset as a dictionary, with times in milliseconds.
+    def snapshot(self):
+        self.tkCalls = self.renderer.calls - self.callsAtReset
+        return {"frames": self.frames,
+                "meanFrameMs": round(self.frameTime / self.frames * 1000, 3) if self.frames > 0 else None,
+                "maxFrameMs": round(self.maxFrameTime * 1000, 3),
+                "missedFrames": self.missedFrames,
+                "tkCalls": self.tkCalls,
+                "tkCallsPerFrame": round(self.tkCalls / self.frames, 1) if self.frames > 0 else None,
+                "maxFrameCalls": self.maxFrameCalls,
+                "writesSaved": self.renderer.getSaved() - self.savedAtReset,
+                "transitions": self.transitions,
+                "meanStartLagMs": round(self.startLag / self.transitions * 1000, 3) if self.transitions > 0 else None,
+                "maxStartLagMs": round(self.maxStartLag * 1000, 3),
+                "updates": self.updates,
+                "updateMs": round(self.updateTime * 1000, 3),
+                "changes": self.changes,
+                "changeMs": round(self.changeTime * 1000, 3),
+                "cpuSeconds": round(time.process_time(), 3)}
+
+    # logLine returns the numbers of snapshot as a single line of text, for the periodic log.
+    def logLine(self):
+        return " ".join("%s=%s" % (name, value) for name, value in self.snapshot().items())
+
+
+# Animator class is the central frame scheduler for the clock. Nothing that animates is allowed to sleep or to call
+# update() on the Tk root by itself. Instead, every animation is queued on the animator as a timeline, which is a
+# generator that does one frame of work each time it is stepped and then yields. The animator steps the timeline at the
+# front of the queue once per frame, using the after() method of the Tk root (or of a Scheduler), so control always
+# goes back to the mainloop between frames and the window keeps repainting and handling clicks.
+#
+# A timeline may yield None to be stepped again on the next frame, or yield a number of milliseconds to wait before it
+# is stepped again. Timelines are run one after another, in the order they were queued, so queued fades happen in the
+# same order as they were requested. When a timeline is finished, the next one is started in the same frame. When the
+# queue is empty, the animator stops scheduling itself until something new is queued.
+#
+# frameEnd is a list of functions which are called at the end of every frame, such as the flush of the renderer (see
+# CoalescingRenderer), so that whatever a frame changed is drawn once, after all of its work is done.
+#
+# Every frame has a time, frameAt, in seconds, which is what the fades go by (see Fader), rather than by counting
+# frames. tick runs the frames at the time of the given monotonic clock (a function like time.monotonic, plus skew,
+# see step), and schedules every frame for
+# frameDelay milliseconds after the time of the frame before, however long the frame took to run. When a frame is
+# late anyway, for example on a machine which is too busy, the fades skip ahead to where they should be by then, so
+# they still end on time, and the frames in between are dropped. Dropped frames are counted in dropped, and logged as
+# a warning, at most every reportInterval seconds, with how long the frames took to run against the frame budget of
+# frameDelay milliseconds.
+#
+# When metrics is set (see the Metrics class), every frame run by tick is timed and counted.
+class Animator:
+    def __init__(self, master, frameDelay=30, monotonic=time.monotonic):
+        self.master = master
+        self.frameDelay = frameDelay  # Milliseconds between frames
+        self.monotonic = monotonic
+        self.timelines = collections.deque()
+        self.frameEnd = []
+        self.job = None
+        self.metrics = None
+        self.due = 0.0  # When the next frame is due, by time.monotonic(), only kept up while metrics is set
+        self.frameAt = 0.0  # The time of the frame being run, or of the last frame run
+        self.skew = 0.0  # How far the time of the frames is ahead of the monotonic clock
+        self.expected = None  # When the next frame is meant to run, while tick keeps the frames going
+        self.dropped = 0
+        self.reportInterval = 10.0
+        self.lastReport = None
+        self.droppedSince = 0  # Frames dropped since the last warning, which took up to slowest seconds to run
+        self.slowest = 0.0
+        self.lastDuration = 0.0
+
+    def queue(self, timeline):
+        self.timelines.append(timeline)
+        if self.job is None:
+            self.job = self.master.after(0, self.tick)
+            if self.metrics is not None:
+                self.due = time.monotonic()
+        return
+
+    def getBusy(self):
+        return len(self.timelines) > 0
+
+    # step runs one frame right away, at the time now. The timeline at the front of the queue is stepped, and the number
+    # of milliseconds it asked to wait before the next frame is returned. If a timeline is finished, the next one is
+    # started in the same frame. If there is nothing left to run, None is returned.
+    #
+    # Without now, the frame is run frameDelay milliseconds after the last one, as if it had been run right on time, so
+    # flush (and anything else stepping the animator by itself) runs the same frames as tick would, only faster. skew
+    # then moves the time of the frames which tick runs after it on, so that they carry on from there.
+    def step(self, now=None):
+        if now is None:
+            now = self.frameAt + self.frameDelay / 1000
+            self.skew = now - self.monotonic()
+        self.frameAt = now
+        delay = None
+        while delay is None and len(self.timelines) > 0:
+            try:
+                delay = next(self.timelines[0])
+                if delay is None:
+                    delay = self.frameDelay
+            except StopIteration:
+                self.timelines.popleft()
+        for function in self.frameEnd:
+            function()
+        return delay
+
+    # flush runs every queued timeline to the end right away, as fast as the renderer can draw, ignoring any waits the
+    # timelines ask for. Tk is asked to draw after every frame. flush is used by the replay mode, and returns the number
+    # of frames it ran.
+    def flush(self):
+        if self.job is not None:
+            self.master.after_cancel(self.job)
+            self.job = None
+        frames = 0
+        while self.step() is not None:
+            frames = frames + 1
+            self.master.update_idletasks()
+        return frames
+
+    # tick runs one frame from the Tk event loop (see step), and schedules the next frame for however long the timeline
+    # asked to wait, counted from the time of this frame. Frames which should have been run since the frame tick
+    # expected to run are counted as dropped.
+    def tick(self):
+        self.job = None
+        started = self.monotonic()
+        now = max(started + self.skew, self.frameAt)
+        if self.expected is not None:
+            dropped = round((now - self.expected) * 1000 / self.frameDelay)
+            if dropped > 0:
+                self.dropFrames(dropped)
+        if self.metrics is None:
+            delay = self.step(now)
+        else:
+            delay = self.measuredStep(now)
+        finished = self.monotonic()
+        self.lastDuration = finished - started
+        self.expected = None
+        if delay is not None:
+            self.expected = now + delay / 1000
+            self.job = self.master.after(max(0, math.ceil((self.expected - self.skew - finished) * 1000)), self.tick)
+        return
+
+    # dropFrames counts the given number of dropped frames, and logs a warning about them, unless one was logged less
+    # than reportInterval seconds ago, in which case they are left for the next warning.
+    def dropFrames(self, dropped):
+        self.dropped = self.dropped + dropped
+        self.droppedSince = self.droppedSince + dropped
+        self.slowest = max(self.slowest, self.lastDuration)
+        now = time.monotonic()
+        if self.lastReport is None or now - self.lastReport >= self.reportInterval:
+            logging.getLogger("wordclock").warning(
+                "dropped %d frames: frames took up to %.1f ms to run, of a frame budget of %d ms (%.0f frames per "
+                "second)", self.droppedSince, self.slowest * 1000, self.frameDelay, 1000 / self.frameDelay)
+            self.lastReport = now
+            self.droppedSince = 0
+            self.slowest = 0.0
+        return
+
+    # measuredStep runs step, and records the frame on metrics.
+    def measuredStep(self, now):
+        started = time.monotonic()
+        calls = self.metrics.renderer.calls
+        delay = self.step(now)
+        if delay is not None:
+            finished = time.monotonic()
+            self.metrics.frame(finished - started, started - self.due, self.metrics.renderer.calls - calls,
+                               delay / 1000)
+            self.due = started + delay / 1000
+        return delay
+
+
+# CoalescingRenderer sits between the clock and one of the renderers above, with the same functions, and combines the
+# color writes made during a frame. setColor and setGroupColor only note down the color asked for, and flush (called
+# by the animator at the end of every frame) works out the final color of every letter written during the frame, which
+# is the last color written to it. Only the letters whose final color differs from the color they are showing are
+# passed on to the renderer: a whole group at once, when every letter of the group ends up the same color and more
+# than one of them changes, and any other letters one by one.
+#
+# On a plain transition this saves nothing, since the fader already writes every fading letter once per frame (see
+# Fader), so the renderer is mostly a safety net, keeping any frame from drawing a letter twice or drawing a color it
+# already shows. It does save writes when fades are redirected halfway, as in a burst of clicks which sends letters
+# back the way they came, where steps land on colors the letters already show (see benchBursts in benchmark.py).
+#
+# setGroup changes which letters are in a group, so anything noted down before it is flushed first. writes counts
+# every letter color write asked for, and written every letter color write passed on to the renderer, so getSaved
+# returns how many writes were saved.
+class CoalescingRenderer:
+    def __init__(self, renderer):
+        self.renderer = renderer
+        self.groups = {}  # The items in every group, by tag
+        self.shown = {}  # The color every item is showing, by item
+        self.pending = []  # The color writes noted down since the last flush, in order, as (tag, item, color)
+        self.writes = 0
+        self.written = 0
+
+    @property
+    def calls(self):
+        return self.renderer.calls
+
+    def getSaved(self):
+        return self.writes - self.written
+
+    def setGridSize(self, columns, rows):
+        self.renderer.setGridSize(columns, rows)
+        return
+
+    def addLetter(self, text, column, row):
+        item = self.renderer.addLetter(text, column, row)
+        self.shown[item] = "#333333"
+        return item
+
+    def setColor(self, item, color):
+        self.pending.append((None, item, color))
+        self.writes = self.writes + 1
+        return
+
+    def setGroup(self, tag, items):
+        self.flush()
+        self.groups[tag] = tuple(items)
+        self.renderer.setGroup(tag, self.groups[tag])
+        return
+
+    def setGroupColor(self, tag, color):
+        self.pending.append((tag, None, color))
+        self.writes = self.writes + len(self.groups.get(tag, ()))
+        return
+
+    def flush(self):
+        if len(self.pending) == 0:
+            return
+        pending = self.pending
+        self.pending = []
+        done = set()  # The items whose final color is already known
+        for tag, item, color in reversed(pending):  # The last write of every item is its final color
+            if tag is None:
+                if item not in done:
+                    done.add(item)
+                    if self.shown[item] != color:
+                        self.renderer.setColor(item, color)
+                        self.shown[item] = color
+                        self.written = self.written + 1
+                continue
+            members = self.groups.get(tag, ())
+            fresh = [member for member in members if member not in done]
+            done.update(fresh)
+            dirty = [member for member in fresh if self.shown[member] != color]
+            if len(dirty) > 1 and len(fresh) == len(members):
+                self.renderer.setGroupColor(tag, color)
+                self.written = self.written + len(members)
+            else:
+                for member in dirty:
+                    self.renderer.setColor(member, color)
+                self.written = self.written + len(dirty)
+            for member in dirty:
+                self.shown[member] = color
+        return
+
+
+# CellRenderer is a rendering backend which keeps the color of every letter of the face, rather than drawing it, for
+# outputs which send or share the letter colors themselves, such as the LED stream in wordstream.py. cells is a
+# bytearray of the red, green and blue values of every letter, three bytes per letter, by letter index (see
+# letterIndex in wordface.py), and items are letter indexes.
+class CellRenderer:
+    def __init__(self):
+        self.cells = bytearray(b"\x33\x33\x33" * wordface.Cells)
+        self.groups = {}
+        self.calls = 0
+
+    def setGridSize(self, columns, rows):
+        return
+
+    def addLetter(self, text, column, row):
+        return wordface.letterIndex(row, column)
+
+    def setColor(self, item, color):
+        self.cells[item * 3:item * 3 + 3] = bytes.fromhex(color[1:])
+        self.calls = self.calls + 1
+        return
+
+    def setGroup(self, tag, items):
+        self.groups[tag] = tuple(items)
+        return
+
+    def setGroupColor(self, tag, color):
+        rgb = bytes.fromhex(color[1:])
+        for item in self.groups.get(tag, ()):
+            self.cells[item * 3:item * 3 + 3] = rgb
+        self.calls = self.calls + 1
+        return
+
+    # getFrame returns a copy of the cells as they are now.
+    def getFrame(self):
+        return bytes(self.cells)
+
+
+# FanoutRenderer draws the face with several renderers at once, for example on the Tk canvas and on LED panels (see
+# CellRenderer). Every call is passed on to each of the renderers, the items of a letter are the tuple of its items
+# in each renderer, and calls adds up the calls of all of them.
+class FanoutRenderer:
+    def __init__(self, renderers):
+        self.renderers = tuple(renderers)
+
+    @property
+    def calls(self):
+        return sum(renderer.calls for renderer in self.renderers)
+
+    def setGridSize(self, columns, rows):
+        for renderer in self.renderers:
+            renderer.setGridSize(columns, rows)
+        return
+
+    def addLetter(self, text, column, row):
+        return tuple(renderer.addLetter(text, column, row) for renderer in self.renderers)
+
+    def setColor(self, item, color):
+        for renderer, rendererItem in zip(self.renderers, item):
+            renderer.setColor(rendererItem, color)
+        return
+
+    def setGroup(self, tag, items):
+        items = tuple(items)
+        for i, renderer in enumerate(self.renderers):
+            renderer.setGroup(tag, (item[i] for item in items))
+        return
+
+    def setGroupColor(self, tag, color):
+        for renderer in self.renderers:
+            renderer.setGroupColor(tag, color)
+        return
+
+
+# RenderWorker class runs clock faces on a thread of their own, so that working out their frames (the wake ups, the
+# transition plans, the fades and their colors) never competes with input and drawing on the Tk thread. The faces are
+# scheduled on scheduler, a Scheduler run by the worker thread, and draw with a WorkerRenderer (see output) around the
+# renderer they are shown with. At the end of every frame, the colors which changed in it are published to the worker,
+# and applied to the renderers on the thread of master (the Tk root) on its next turn of the event loop. Frames
+# published before then are merged into the same update, with the last color of every letter winning, so the pending
+# update never holds more than one color per letter, and a Tk thread which falls behind skips the stale frames rather
+# than drawing them late. published counts the frames published, dropped the frames merged into a later one, and
+# applied the updates applied.
+#
+# The faces have to be made and started on the Tk thread, before start is called, and anything done to them from then
+# on, such as a click on a button, has to be handed to the worker thread with call.
+class RenderWorker:
+    def __init__(self, master):
+        self.master = master
+        self.scheduler = Scheduler(wait=True)
+        self.lock = threading.Lock()
+        self.pending = {}  # The colors waiting to be applied, by item, by WorkerRenderer
+        self.scheduled = False  # Whether apply is scheduled on master
+        self.published = 0
+        self.dropped = 0
+        self.applied = 0
+        self.thread = None
+
+    # output returns a WorkerRenderer for a face run by the worker, shown with the given renderer.
+    def output(self, renderer):
+        return WorkerRenderer(self, renderer)
+
+    # call runs the given function with the given arguments on the worker thread, as soon as it is free.
+    def call(self, function, *args):
+        self.scheduler.after(0, function, *args)
+        return
+
+    # start applies whatever the faces have drawn so far, so they are shown as soon as the Tk mainloop is entered, and
+    # starts the worker thread. Anything published before the mainloop is running cannot be scheduled on master yet
+    # (see publish), so apply is also scheduled for when the mainloop starts.
+    def start(self):
+        self.apply()
+        self.master.after(0, self.apply)
+        self.thread = threading.Thread(target=self.scheduler.mainloop, name="wordrender", daemon=True)
+        self.thread.start()
+        return
+
+    # publish hands the colors which changed in a frame of a face to the master thread, merged with any which are
+    # still waiting, and schedules apply on master, unless it is already scheduled. If it cannot be scheduled, because
+    # the Tk mainloop is not running (yet, or any more), the colors are left waiting, and the next publish tries again.
+    def publish(self, output, changes):
+        with self.lock:
+            self.published = self.published + 1
+            if output in self.pending:
+                self.pending[output].update(changes)
+                self.dropped = self.dropped + 1
+            else:
+                self.pending[output] = changes
+            if self.scheduled:
+                return
+            self.scheduled = True
+        try:
+            self.master.after(0, self.apply)
+        except RuntimeError:
+            with self.lock:
+                self.scheduled = False
+        return
+
+    # apply applies the colors waiting to the renderers, on the master thread.
+    def apply(self):
+        with self.lock:
+            pending = self.pending
+            self.pending = {}
+            self.scheduled = False
+        for output, changes in pending.items():
+            for item, color in changes.items():
+                output.renderer.setColor(item, color)
+        self.applied = self.applied + 1
+        return
+
+    # stop stops the worker thread, once whatever it is running has returned.
+    def stop(self):
+        self.scheduler.quit()
+        if self.thread is not None:
+            self.thread.join()
+        return
+
+
+# WorkerRenderer is the renderer of a face run by a RenderWorker, around the renderer it is shown with. Letters are
+# added to that renderer right away, on the thread the face is made on, but colors are only noted down, by item, and
+# publish (which has to be called at the end of every frame of the face's animator) hands them to the worker. Groups
+# are kept by the WorkerRenderer, and recoloring one notes down the color of every letter in it. calls counts the
+# colors noted down.
+class WorkerRenderer:
+    def __init__(self, worker, renderer):
+        self.worker = worker
+        self.renderer = renderer
+        self.groups = {}
+        self.changes = {}  # The colors written since the last frame, by item
+        self.calls = 0
+
+    def setGridSize(self, columns, rows):
+        self.renderer.setGridSize(columns, rows)
+        return
+
+    def addLetter(self, text, column, row):
+        return self.renderer.addLetter(text, column, row)
+
+    def setColor(self, item, color):
+        self.changes[item] = color
+        self.calls = self.calls + 1
+        return
+
+    def setGroup(self, tag, items):
+        self.groups[tag] = tuple(items)
+        return
+
+    def setGroupColor(self, tag, color):
+        for item in self.groups.get(tag, ()):
+            self.changes[item] = color
+        self.calls = self.calls + 1
+        return
+
+    def publish(self):
+        if len(self.changes) == 0:
+            return
+        changes = self.changes
+        self.changes = {}
+        self.worker.publish(self, changes)
+        return
+
+
+# Letter class is used for each letter in the clock. When an instance is created, the letter defined is immediately
+# drawn by the renderer in the inactive color (#333333). The class has functions for setting and getting activity,
+# where activity is defined as true depending on the time. In most cases #333333 is inactive,
+# and all other colors are active, however this is not the case when brightness has been set to
+# fully dimmed. When this is the case, the clock is still expected to keep track of time, so that
+# when the brightness is turned back up, the time will automatically be correct. Active status is used in
+# features such as change brightness and change color, so the function knows which letters to change colors and which
+# to ignore. Active status is changed by the transition planner (see the plan function in the WordClock class).
+#
+# color is the color the letter was showing when it last stopped fading, and target is the color it is fading to (or
+# showing, when it is not fading). track is the fade the letter is part of, if any (see the Fader class). While a letter
+# is fading, the color it is showing right now is kept by its track rather than by the letter, so getColor is used to
+# read it.
+#
+# The letter does not keep its activity, color and target itself. They are kept in the flat arrays of the face it
+# belongs to, at the letter's index (see the Face class in wordface.py), and the letter only reads and writes them.
+class Letter:
+    __slots__ = ("renderer", "face", "index", "text", "track", "item")
+
+    def __init__(self, renderer, face, text, column, row):
+        self.renderer = renderer
+        self.face = face
+        self.index = wordface.letterIndex(row, column)
+        self.text = text
+        self.track = None
+        self.item = self.renderer.addLetter(self.text, column, row)
+
+    @property
+    def color(self):
+        return self.face.getColor(self.index)
+
+    @color.setter
+    def color(self, color):
+        self.face.setColor(self.index, color)
+
+    @property
+    def target(self):
+        return self.face.getTarget(self.index)
+
+    @target.setter
+    def target(self, color):
+        self.face.setTarget(self.index, color)
+
+    def setActive(self, active):
+        self.face.setActive(self.index, active)
+        return
+
+    def getActive(self):
+        return self.face.getActive(self.index)
+
+    def setColor(self, newcolor):
+        self.renderer.setColor(self.item, newcolor)
+        return
+
+    def getColor(self):
+        if self.track is not None and self.track.frame > 0:
+            return self.track.palette[self.track.frame - 1]
+        return self.color
+
+
+# Plans holds the transition plans worked out so far, by mask, the cells looked at (None for every cell) and size of
+# the face (see Cells in wordface.py), shared by every clock face in the process. The plan for a mask is the tuple of
+# the letter indexes of the cells which are lit in it and the tuple of those which are not, which is all retarget
+# needs to know to fade a face to that mask. Faces showing the same slot (in the same time zone, or another with the
+# same face) use the same plan, and so do faces moving on from the same slot to the same slot, whose plan only holds
+# the cells which changed. Plans is cleared if it ever holds planLimit plans.
+Plans = {}
+planLimit = 4096
+
+
+# targetPlan returns the transition plan for the given mask, for the cells in the mask cells, or every cell if cells
+# is None (see Plans).
+def targetPlan(mask, cells=None):
+    key = (mask, cells, wordface.Cells)
+    plan = Plans.get(key)
+    if plan is None:
+        if len(Plans) >= planLimit:
+            Plans.clear()
+        if cells is None:
+            lit = tuple(wordface.maskIndexes(mask))
+            plan = (lit, tuple(index for index in range(0, wordface.Cells) if not mask >> index & 1))
+        else:
+            plan = (tuple(wordface.maskIndexes(cells & mask)), tuple(wordface.maskIndexes(cells & ~mask)))
+        Plans[key] = plan
+    return plan
+
+
+# Word class groups individual letter instances into a known word. Minimum of two letters (AM, PM)) and maximum of
+# eight letters (MIDNIGHT), in order. Words do not fade themselves, and which words are lit for a given time is worked
+# out by wordface (see wordface.py). Words are used to give each word its own renderer group.
+class Word:
+    __slots__ = ("name", "letters")
+
+    def __init__(self, name, letters):
+        self.name = name
+        self.letters = tuple(letters)
+
+
+# Track class is a single fade run by the Fader: a set of letters which all started from the same color at the same
+# time, and so all show the same color of the same palette on every frame. Each track is a renderer group of its own
+# (named by tag), so a whole track is recolored at once, and the color its letters are showing is only kept once, by
+# the track (frame is the number of palette colors shown so far, and started the time of the frame it started in).
+class Track:
+    __slots__ = ("tag", "palette", "frame", "started", "letters")
+
+    def __init__(self, tag, palette, started, letters):
+        self.tag = tag
+        self.palette = palette
+        self.frame = 0
+        self.started = started
+        self.letters = set(letters)
+
+    def getRemaining(self):
+        return len(self.palette) - self.frame
+
+
+# Fader class runs every color fade of the letters on the face, and lets any fade be redirected at any time.
+#
+# fadeTo starts fading the given letters to a new color. Letters which are already fading are taken out of their old
+# fade, and start the new fade from whatever color they are showing right now, so a fade can be redirected halfway
+# without the letter jumping. Letters starting from the same color are put into the same track (see the Track class).
+# step runs one frame of every track, and drops the tracks which are done.
+#
+# The fades go by the time of the frames of the given animator (see Animator), not by the number of frames run: a
+# palette has a color for every frame of the fade, and every track shows the color for the time of the frame, so a
+# track skips any colors of frames which were dropped, and a fade always takes the same time.
+#
+# The palettes come from wordcolor (see fadePalette in wordcolor.py), mixed with the given blending and easing. Moving a
+# track along a frame is a single index into its palette and a single recolor of its group, and the letters themselves
+# are only touched when they join or leave a track. So the cost of a frame only depends on the number of tracks, which
+# is rarely more than three, and not on how many letters are fading.
+class Fader:
+    def __init__(self, renderer, animator, blending="linear", easing="smooth"):
+        self.renderer = renderer
+        self.animator = animator
+        self.blending = blending
+        self.easing = easing
+        self.tracks = []
+        self.tracksMade = 0
+
+    def getBusy(self):
+        return len(self.tracks) > 0
+
+    def fadeTo(self, letters, color, frames):
+        target = color.lower()
+        oldTracks = set()
+        starts = {}
+        for letter in letters:
+            if letter.track is not None:
+                letter.color = letter.getColor()
+                letter.track.letters.discard(letter)
+                oldTracks.add(letter.track)
+                letter.track = None
+            letter.target = target
+            if letter.color != target:
+                starts.setdefault(letter.color, []).append(letter)
+        for track in oldTracks:  # Regroup whatever is left of the tracks the letters were taken out of
+            self.renderer.setGroup(track.tag, (letter.item for letter in track.letters))
+            if len(track.letters) == 0:
+                self.tracks.remove(track)
+        for start, group in starts.items():
+            self.tracksMade = self.tracksMade + 1
+            palette = wordcolor.fadePalette(start[1:].upper(), target[1:].upper(), frames, self.blending, self.easing)
+            track = Track("fade%d" % self.tracksMade, palette, self.animator.frameAt, group)
+            for letter in group:
+                letter.track = track
+            self.renderer.setGroup(track.tag, (letter.item for letter in group))
+            self.tracks.append(track)
+        return
+
+    # step runs one frame of every fade, and returns True if there are still fades left to run.
+    def step(self):
+        now = self.animator.frameAt
+        interval = self.animator.frameDelay / 1000
+        finished = []
+        for track in self.tracks:
+            frame = min(len(track.palette), round((now - track.started) / interval) + 1)
+            if frame > track.frame:
+                self.renderer.setGroupColor(track.tag, track.palette[frame - 1])
+                track.frame = frame
+            if track.frame == len(track.palette):
+                finished.append(track)
+        for track in finished:
+            for letter in track.letters:
+                letter.color = track.palette[-1]
+                letter.track = None
+            self.renderer.setGroup(track.tag, ())
+            self.tracks.remove(track)
+        return len(self.tracks) > 0
+
+
+# Brightnesses are the names of the brightness selections of a clock, in order: fully bright, dimmed and off. When a
+# clock is off, nothing is shown and nothing is animated, and it does not wake up at all until its brightness is
+# changed, by a click, the control API or its brightness schedule (see selectBrightness).
+Brightnesses = ("bright", "dim", "off")
+Off = 2
+
+
+# parseSchedule turns a brightness schedule given as text, such as "22:00=dim,00:30=off,07:00=bright", into a tuple of
+# (minute of the day, brightness) in order of the time of day, for setSchedule. A ValueError is raised if the text is
+# not a schedule.
+def parseSchedule(text):
+    schedule = []
+    for entry in text.split(","):
+        when, separator, name = entry.strip().partition("=")
+        hour, separator, minute = when.partition(":")
+        if not (hour.isdigit() and minute.isdigit() and int(hour) < 24 and int(minute) < 60):
+            raise ValueError("schedule times are given as HH:MM, not %r" % when)
+        if name not in Brightnesses:
+            raise ValueError("brightness is %s, not %r" % (", ".join(Brightnesses), name))
+        schedule.append((int(hour) * 60 + int(minute), Brightnesses.index(name)))
+    return tuple(sorted(schedule))
+
+
+# WordClock class is the clock itself, without any window around it: the letters and words of the face, the color and
+# brightness selection, the transition planner, and the wake ups at every boundary where the face can change. It draws
+# the face with whichever renderer it is given, and schedules everything on the given master, so the same clock runs
+# in the Tk application (see Application in wordclockv2.py) and without Tk.
+class WordClock:
+
+    # master is what the animator and the wake ups are scheduled on: the Tk root, or a Scheduler when there is no Tk.
+    # renderer is the rendering backend the letters are drawn by (see the renderers in wordclockv2.py and
+    # wordraster.py). The clock argument is the clock the time is read from, see SystemClock and VirtualClock in
+    # wordface.py. The real system clock is used by default. When instrument is True, the built-in instrumentation is
+    # turned on, see the Metrics class and reportStats. blending and easing choose how the letters fade from one color
+    # to another, see wordcolor.py. frames is what the animator schedules its frames on, such as SharedFrames for a
+    # face sharing its frames with other faces (see ClockGroup), or master by default. fps is the number of frames
+    # the fades are run at every second, and fade the number of seconds a transition takes.
+    def __init__(self, master, renderer, clock=None, instrument=False, blending="linear", easing="smooth", frames=None,
+                 fps=33, fade=0.75):
+        self.master = master
+        if frames is None:
+            frames = master
+        if clock is None:
+            clock = wordface.SystemClock()
+        self.clock = clock
+        # Color options are as follows:
+        #   #FFFFFF: WHITE, #AAAAAA: DIMMED WHITE, #333333: OFF
+        #   #00FF00: GREEN, #00AA00: DIMMED GREEN, #333333: OFF
+        #   #FF0000: RED, #AA0000: DIMMED RED, #333333: OFF
+        #   #FF00FF: VIOLET, #AA00AA: DIMMED VIOLET, #333333: OFF
+        #   #00FFFF: INDIGO, #00AAAA: DIMMED INDIGO, #333333: OFF
+        #   #FFFF00: YELLOW, #AAAAAA: DIMMED YELLOW, #333333: OFF
+        #   #0000FF: BLUE, #0000AA: DIMMED BLUE, #333333: OFF
+        # Any other color can be added with addColor. customColor is the index of the color option used for colors
+        # picked with selectColor which are not one of the color options, or None until there has been one.
+        self.colorOptions = (("FFFFFF", "AAAAAA", "333333"), ("00FF00", "00AA00", "333333"),
+                             ("FF0000", "AA0000", "333333"), ("FF00FF", "AA00AA", "333333"),
+                             ("00FFFF", "00AAAA", "333333"), ("FFFF00", "AAAA00", "333333"),
+                             ("0000FF", "0000AA", "333333"))
+        self.colorSelection = 0  # Initialized at white
+        self.brightnessSelection = 0  # Initialized at brightest
+        self.color = self.colorOptions[self.colorSelection][self.brightnessSelection]
+        self.customColor = None
+
+        # The animator runs every fade and color change queued by the functions below, one frame at a time from the
+        # event loop. See the Animator class for more details.
+        self.animator = Animator(frames, round(1000 / fps), self.clock.monotonic)
+        self.transitionFrames = max(1, round(fade * fps))  # 25 frames, or 0.75 seconds at 30 ms per frame, by default
+        self.blending = blending
+        self.easing = easing
+        wordcolor.buildPalettes(set(color for colors in self.colorOptions for color in colors), self.transitionFrames,
+                                self.blending, self.easing)
+
+        # Every change of the face, whether a new time, color or brightness, only asks for the letters to be faded to
+        # their new target colors on the next frame (see requestRetarget). pendingFrames holds the length of the fade
+        # asked for until then, and pendingCells the mask of the letters whose target may have changed, or None for
+        # every letter. fading is True while the fade loop is queued on the animator.
+        self.pendingFrames = None
+        self.pendingCells = 0
+        self.fading = False
+
+        # updatetime only wakes up at the minute boundaries where the face can change (see updatetime). resolution is
+        # the number of minutes between those boundaries, five on the English face, or one with minute dots (see
+        # Resolution in wordface.py). lastWake holds the wall clock and monotonic clock readings of the last wake up,
+        # and lastSlot the slot shown since then, which are used to notice when the wall clock has jumped. Any jump of
+        # more than jumpTolerance seconds is treated as a wall clock change. deadline is the monotonic clock reading
+        # of the next wake up of updatetime (see scheduleUpdate).
+        self.resolution = wordface.Resolution
+        self.updateJob = None
+        self.deadline = None
+        self.lastWake = None
+        self.lastSlot = None
+        self.jumpTolerance = 2.0
+
+        # schedule is the brightness schedule of the clock (see setSchedule), and scheduleApplied the last time one of
+        # its entries came round, as (date, entry), so that every entry is only applied once when it comes round, and
+        # any change of brightness in between is left alone. ownWakes is False when the clock is woken by a ClockGroup
+        # rather than scheduling its own wake ups.
+        self.schedule = ()
+        self.scheduleApplied = None
+        self.ownWakes = True
+
+        # The renderer is wrapped in a CoalescingRenderer, which the animator flushes at the end of every frame.
+        self.renderer = CoalescingRenderer(renderer)
+        self.animator.frameEnd.append(self.renderer.flush)
+        self.renderer.setGridSize(wordface.Columns, wordface.Rows)
+        self.fader = Fader(self.renderer, self.animator, self.blending, self.easing)
+
+        # face holds the activity and colors of every letter (see the Face class in wordface.py). Letters is the array
+        # of letter instances, one tuple per row, built from the letter grid in wordface. There are 100 letters on the
+        # English face. Two letter instances also include an apostrophe.
+        self.face = wordface.Face()
+        self.Letters = []
+        for row in range(0, wordface.Rows):
+            self.Letters.append(tuple(Letter(self.renderer, self.face, text=wordface.Letters[row][column],
+                                             column=column, row=row)
+                                      for column in range(0, wordface.Columns)))
+
+        # Words holds a Word instance for every word in wordface, by name. Each word is also a renderer group, so it can
+        # be recolored all at once.
+        self.Words = {}
+        for name, indexes in wordface.WordIndexes.items():
+            self.Words[name] = Word(name, (self.getLetter(index) for index in indexes))
+            self.renderer.setGroup("word" + name, (letter.item for letter in self.Words[name].letters))
+
+        # intros holds the intro animations which can be played after the time is first shown, by name (see start).
+        self.intros = {"sweep": self.introSweep}
+
+        # The instrumentation is set up last, so that building the face is not counted.
+        self.metrics = None
+        if instrument:
+            self.metrics = Metrics(self.renderer)
+            self.animator.metrics = self.metrics
+
+    # changeColor uses loopAdd (see loopAdd function definition for more details) to shift the color selection to the
+    # next color in the array, and then asks for all active letters to be faded to the newly selected color (see
+    # requestRetarget). changeColor itself returns right away. Several clicks before the next frame only move the
+    # selection along, and the letters fade straight to the last color selected.
+    def changeColor(self):
+        started = time.perf_counter()
+        self.colorSelection = self.loopAdd(len(self.colorOptions), self.colorSelection)
+        self.color = self.colorOptions[self.colorSelection][self.brightnessSelection]
+        self.requestRetarget(self.transitionFrames)
+        if self.metrics is not None:
+            self.metrics.change(time.perf_counter() - started)
+
+    # changeBrightness uses loopAdd (see loopAdd function definition for more details) to shift the brightness selection
+    # to the next (dim) color in the array, and then asks for all active letters to be faded to the newly selected color
+    # (see requestRetarget). changeBrightness itself returns right away, and clicks are merged the same way as in
+    # changeColor.
+    def changeBrightness(self):
+        started = time.perf_counter()
+        previous = self.brightnessSelection
+        self.brightnessSelection = self.loopAdd(len(self.colorOptions[self.colorSelection]), self.brightnessSelection)
+        self.color = self.colorOptions[self.colorSelection][self.brightnessSelection]
+        self.requestRetarget(self.transitionFrames)
+        self.brightnessChanged(previous)
+        if self.metrics is not None:
+            self.metrics.change(time.perf_counter() - started)
+
+    # addColor adds any 24 bit color (such as "#FF8800") to the end of the color options, together with its dimmed
+    # version (see dimColor in wordcolor.py) and off, and returns its index. Only the palettes to and from the new
+    # colors are built (see addPalettes in wordcolor.py). If select is True, the clock switches to the new color right
+    # away.
+    def addColor(self, color, select=False):
+        color = wordcolor.normalColor(color)
+        options = (color, wordcolor.dimColor(color), "333333")
+        wordcolor.addPalettes(options, set(option for colors in self.colorOptions for option in colors),
+                              self.transitionFrames, self.blending, self.easing)
+        self.colorOptions = self.colorOptions + (options,)
+        if select:
+            self.colorSelection = len(self.colorOptions) - 1
+            self.color = self.colorOptions[self.colorSelection][self.brightnessSelection]
+            self.requestRetarget(self.transitionFrames)
+        return len(self.colorOptions) - 1
+
+    # replaceColor replaces the color option with the given index by the given color, its dimmed version and off, the
+    # same way as addColor. The palettes of the colors it replaces are dropped, unless another color option still
+    # uses them, and only the palettes to and from the new colors are built.
+    def replaceColor(self, index, color):
+        color = wordcolor.normalColor(color)
+        options = (color, wordcolor.dimColor(color), "333333")
+        others = self.colorOptions[:index] + self.colorOptions[index + 1:]
+        kept = set(option for colors in others for option in colors)
+        wordcolor.dropPalettes(set(self.colorOptions[index]) - kept - set(options))
+        wordcolor.addPalettes(options, kept, self.transitionFrames, self.blending, self.easing)
+        self.colorOptions = self.colorOptions[:index] + (options,) + self.colorOptions[index + 1:]
+        if self.colorSelection == index:
+            self.color = self.colorOptions[self.colorSelection][self.brightnessSelection]
+            self.requestRetarget(self.transitionFrames)
+        return
+
+    # selectColor switches to the given color (such as "FF8800"), and asks for the lit letters to be faded to it, the
+    # same way as changeColor. A color which is not one of the color options is added to them the first time (see
+    # addColor), and after that takes the place of the color added before, so picking any number of colors does not
+    # grow the color options, or the palettes which have to be built for a new color (see replaceColor).
+    def selectColor(self, color):
+        started = time.perf_counter()
+        color = wordcolor.normalColor(color)
+        for index, options in enumerate(self.colorOptions):
+            if options[0] == color:
+                break
+        else:
+            if self.customColor is None:
+                self.customColor = self.addColor(color)
+            else:
+                self.replaceColor(self.customColor, color)
+            index = self.customColor
+        self.colorSelection = index
+        self.color = self.colorOptions[self.colorSelection][self.brightnessSelection]
+        self.requestRetarget(self.transitionFrames)
+        if self.metrics is not None:
+            self.metrics.change(time.perf_counter() - started)
+        return
+
+    # selectBrightness switches to the given brightness (0 for fully bright, 1 for dimmed and 2 for off), the same way
+    # as changeBrightness.
+    def selectBrightness(self, brightness):
+        started = time.perf_counter()
+        previous = self.brightnessSelection
+        self.brightnessSelection = brightness
+        self.color = self.colorOptions[self.colorSelection][self.brightnessSelection]
+        self.requestRetarget(self.transitionFrames)
+        self.brightnessChanged(previous)
+        if self.metrics is not None:
+            self.metrics.change(time.perf_counter() - started)
+        return
+
+    # brightnessChanged is called after the brightness has changed from the given previous brightness. A clock which is
+    # turned off fades out, and then stops waking up for the slots, since nothing is shown (see showSlot and
+    # scheduleUpdate). A clock which is turned back on shows the current slot again at once, in a single frame, and
+    # starts waking up for the slots again.
+    def brightnessChanged(self, previous):
+        if (previous == Off) == (self.brightnessSelection == Off):
+            return
+        now = self.clock.now()
+        if previous == Off:
+            self.showSlot(now, wordface.slotAt(now), True)
+            self.requestRetarget(1)
+        if self.ownWakes:
+            self.scheduleUpdate(now)
+        return
+
+    # setSchedule sets the brightness schedule of the clock, a tuple of (minute of the day, brightness) in order of the
+    # time of day (see parseSchedule), such as dimming at 22:00, turning off at 00:30 and coming back on at 07:00.
+    # Every entry switches to its brightness when it comes round, and the entry which came round last is applied when
+    # the clock starts. Until the next entry, the brightness can be changed as usual. The schedule is only followed by
+    # a clock which schedules its own wake ups, so it has to be set before start.
+    def setSchedule(self, schedule):
+        self.schedule = tuple(schedule)
+        self.scheduleApplied = None
+        return
+
+    # followSchedule applies the entry of the brightness schedule which came round last before now, unless it has
+    # already been applied.
+    def followSchedule(self, now):
+        if len(self.schedule) == 0:
+            return
+        minute = now.hour * 60 + now.minute
+        past = [entry for entry in self.schedule if entry[0] <= minute]
+        if len(past) > 0:
+            applied = (now.date(), past[-1])
+        else:
+            applied = (now.date() - datetime.timedelta(days=1), self.schedule[-1])
+        if applied == self.scheduleApplied:
+            return
+        self.scheduleApplied = applied
+        if applied[1][1] != self.brightnessSelection:
+            self.selectBrightness(applied[1][1])
+        return
+
+    # loopAdd takes the length of an array (maxloop) and the current index of the array being used (currentvalue) and
+    # increments UP to the next value. If the currentvalue is the max value of the array, then loopAdd returns 0 to go
+    # back to the beginning of the array. loopAdd is used in changeBrightness and changeColor in order to loop through
+    # the options of the colors and brightness.
+    def loopAdd(self, maxloop, currentvalue):
+        if currentvalue < maxloop - 1:
+            return currentvalue + 1
+        else:
+            return 0
+
+    # getLetter returns the letter instance with the given letter index (see letterIndex in wordface.py).
+    def getLetter(self, index):
+        return self.Letters[index // wordface.Columns][index % wordface.Columns]
+
+    # plan is the transition planner. It compares the mask of the letters which are currently lit (the active letters)
+    # with the mask of the letters which should be lit (newMask). The letters which stay lit are not touched at all, so
+    # letters shared between the old and the new words, such as the N in ELEVEN and NOON, do not blink. The activity
+    # of the face is updated right away, and the letters to turn on and off are then faded at the same time on the next
+    # frame (see requestRetarget), so a transition always takes the same time, no matter how many letters change. Only
+    # the letters which changed are retargeted, so a new minute dot only touches the dot. If nothing has changed,
+    # nothing is faded. When animate is False, the fade is a single frame, so every letter snaps straight to its color.
+    def plan(self, newMask, animate=True):
+        if newMask == self.face.active:
+            return
+        changed = newMask ^ self.face.active
+        self.face.active = newMask
+        if animate:
+            self.requestRetarget(self.transitionFrames, changed)
+        else:
+            self.requestRetarget(1)
+
+    # requestRetarget asks for every letter to be faded to its target color in the given number of frames, on the next
+    # frame of the animator. Until then, any further requests are merged with it, and the shortest fade asked for wins.
+    # This way a burst of clicks, or a click during a change of time, results in a single fade to the final target,
+    # and the face responds within one frame no matter what is already fading. cells is the mask of the letters whose
+    # target may have changed, or None for every letter, as after a change of color.
+    def requestRetarget(self, frames, cells=None):
+        if self.pendingFrames is None or frames < self.pendingFrames:
+            self.pendingFrames = frames
+        if cells is None or self.pendingCells is None:
+            self.pendingCells = None
+        else:
+            self.pendingCells |= cells
+        if not self.fading:
+            self.fading = True
+            self.animator.queue(self.fadeLoop())
+        return
+
+    # retarget works out the target color of every letter, which is the selected color for active letters, and #333333
+    # for the rest, from the transition plan for the active mask (see targetPlan). Every letter which is not already
+    # heading to its target color, or which would take longer than the given number of frames to get there, is
+    # redirected to it by the fader. Letters with the same target are faded together. When cells is given, only the
+    # letters in that mask are looked at, and the rest of the face is left alone.
+    def retarget(self, frames, cells=None):
+        lit, unlit = targetPlan(self.face.active, cells)
+        for target, indexes in (("#" + self.color.lower(), lit), ("#333333", unlit)):
+            letters = []
+            for index in indexes:
+                letter = self.getLetter(index)
+                if letter.target != target or (letter.track is not None and letter.track.getRemaining() > frames):
+                    letters.append(letter)
+            if len(letters) > 0:
+                self.fader.fadeTo(letters, target, frames)
+        return
+
+    # fadeLoop is the timeline queued by requestRetarget. On every frame, any pending retarget is applied first, and
+    # then one frame of every fade is run. It ends once nothing is fading and nothing more has been asked for.
+    def fadeLoop(self):
+        while True:
+            if self.pendingFrames is not None:
+                frames = self.pendingFrames
+                cells = self.pendingCells
+                self.pendingFrames = None
+                self.pendingCells = 0
+                self.retarget(frames, cells)
+            busy = self.fader.step()
+            yield
+            if not busy and self.pendingFrames is None:
+                break
+        self.fading = False
+
+    # start shows the current time at once, and then plays the given intro animation, if any. The time is painted
+    # straight away, in a single frame (see updatetime), before start returns, so the window shows the correct time as
+    # soon as the Tk mainloop is entered. The intro is only queued on the animator, so it runs from the mainloop
+    # without holding anything up.
+    def start(self, intro="none"):
+        self.updatetime()
+        self.animator.flush()
+        if intro != "none" and self.brightnessSelection != Off:
+            self.animator.queue(self.intros[intro]())
+        return
+
+    # columnLetters returns the letters in the given column of the face which are not lit.
+    def columnLetters(self, column):
+        return [row[column] for row in self.Letters if not row[column].getActive()]
+
+    # introSweep is the "sweep" intro: a band of light sweeps across the face from left to right, over the letters
+    # which are not lit, while the time stays lit. It stops as soon as anything else asks for the letters to fade (see
+    # requestRetarget), so a change of time or a click is never held up by the intro. At the end, or when it is
+    # stopped, every letter is faded back to its target color.
+    def introSweep(self):
+        litColor = "#" + self.color.lower()
+        width = 3  # Columns in the band of light
+        for frame in range(0, 2 * (wordface.Columns + width) + 6):
+            if self.pendingFrames is not None:
+                self.requestRetarget(self.transitionFrames)
+                return
+            if frame % 2 == 0:
+                column = frame // 2
+                if column < wordface.Columns:
+                    self.fader.fadeTo(self.columnLetters(column), litColor, 6)
+                if 0 <= column - width < wordface.Columns:
+                    self.fader.fadeTo(self.columnLetters(column - width), "#333333", 6)
+            self.fader.step()
+            yield
+        self.requestRetarget(self.transitionFrames)
+
+    # updatetime is the "bread and butter" of the program. This is where the time is evaluated, and the correct letters
+    # are faded to grey and color as appropriate.
+    #
+    # First, the mask of letters which should be lit for the current time is looked up from wordface (see maskAt in
+    # wordface.py), which has already worked out the face for every slot of the day.
+    #
+    # Next, the lit letters are handed to the transition planner (see the plan function), which fades out the letters
+    # which are no longer needed and fades in the new ones. When the time has not changed since the last run, the
+    # planner finds nothing to do, so there is no "blinking" every time the clock re-checks the time.
+    #
+    # The transition is normally animated. It is not animated the first time updatetime runs, so the time shows up at
+    # once when the clock starts (see start), or when the wall clock has jumped since the last run (see clockJumped), or
+    # when the new slot is not the one right after the slot shown so far, for example after the machine was suspended.
+    # In those cases the face snaps straight to the correct time instead of animating through the missed slots.
+    #
+    # The fades themselves are only run by the animator, so updatetime returns right away, and a full transition
+    # takes under a second. updatetime then schedules itself for the next boundary where the face can change (see
+    # scheduleUpdate), so it wakes up about 12 times an hour and starts transitions right on time. Every wake up
+    # checks the wall clock for jumps, so a jump is caught at the next boundary at the latest.
+    #
+    # The face itself is changed by showSlot, which a ClockGroup calls directly for the faces it drives. With
+    # instrumentation on, the time showSlot takes is recorded, and so is how long after the minute boundary a new slot
+    # was started (see the Metrics class). Any entry of the brightness schedule which has come round is applied first
+    # (see followSchedule).
+    def updatetime(self):
+        now = self.clock.now()
+        jumped = self.clockJumped()
+        self.followSchedule(now)
+        self.showSlot(now, wordface.slotAt(now), jumped)
+        self.scheduleUpdate(now)
+
+    # showSlot shows the given slot, looked up at the local time now, animated unless the clock has jumped (or it is
+    # the first slot shown, or not the one after the last). Nothing is shown while the clock is off, and the slot is
+    # shown again when it is turned back on (see brightnessChanged).
+    def showSlot(self, now, slot, jumped):
+        if self.brightnessSelection == Off:
+            return
+        started = time.perf_counter()
+        animate = self.lastSlot is not None and not jumped and self.lastSlot in (slot, (slot - 1) % wordface.Slots)
+        self.plan(wordface.SlotMasks[slot], animate)
+        if self.metrics is not None:
+            if self.lastSlot is not None and slot != self.lastSlot:
+                self.metrics.transitionStarted(self.resolution * 60 - wordface.secondsToBoundary(now, self.resolution))
+            self.metrics.update(time.perf_counter() - started)
+        self.lastSlot = slot
+        return
+
+    # clockJumped compares how far the wall clock and the monotonic clock have moved since the last time it was run.
+    # They should move together, so if they differ by more than jumpTolerance seconds, the wall clock has been changed,
+    # for example by NTP or by the machine being suspended and resumed.
+    def clockJumped(self):
+        wake = (self.clock.time(), self.clock.monotonic())
+        lastWake = self.lastWake
+        self.lastWake = wake
+        if lastWake is None:
+            return False
+        return abs((wake[0] - lastWake[0]) - (wake[1] - lastWake[1])) > self.jumpTolerance
+
+    # scheduleUpdate schedules the next run of updatetime for the next boundary of resolution minutes after now, or
+    # the next entry of the brightness schedule if that comes first. The wait is worked out from the wall clock once,
+    # and turned into a deadline on the monotonic clock, which the wake ups are timed against (see checkClock). If
+    # updatetime is woken early anyway, the slot has not changed yet, so it does nothing and schedules itself again
+    # for the rest of the time. While the clock is off, it only wakes up for the next entry of the schedule, and not at
+    # all without one.
+    def scheduleUpdate(self, now):
+        if self.updateJob is not None:
+            self.master.after_cancel(self.updateJob)
+            self.updateJob = None
+        waits = [wordface.secondsToTime(now, minute) for minute, brightness in self.schedule]
+        if self.brightnessSelection != Off:
+            waits.append(wordface.secondsToBoundary(now, self.resolution))
+        if len(waits) == 0:
+            self.deadline = None
+            return
+        self.deadline = self.clock.monotonic() + min(waits)
+        self.scheduleCheck()
+        return
+
+    # scheduleCheck schedules the next run of checkClock for the deadline, plus a millisecond so that the timer does
+    # not fire just short of it.
+    def scheduleCheck(self):
+        wait = self.deadline - self.clock.monotonic()
+        self.updateJob = self.master.after(max(0, int(wait * 1000)) + 1, self.checkClock)
+        return
+
+    # checkClock runs updatetime once the deadline has passed on the monotonic clock. A timer which fires before
+    # that, because it is timed by another clock, goes back to sleep until the deadline. updatetime then checks the
+    # wall clock again (see clockJumped), and snaps to the correct time if it has jumped.
+    def checkClock(self):
+        self.updateJob = None
+        if self.clock.monotonic() >= self.deadline:
+            self.updatetime()
+        else:
+            self.scheduleCheck()
+        return
+
+    # reportStats writes the numbers collected by the instrumentation as a single log line every interval seconds, and
+    # then starts collecting them afresh. It does nothing if instrumentation is off.
+    def reportStats(self, interval):
+        if self.metrics is None:
+            return
+        logging.getLogger("wordclock").info("stats %s", self.metrics.logLine())
+        self.metrics.reset()
+        self.master.after(int(interval * 1000), self.reportStats, interval)
+
+
+# ClockGroup class drives many clock faces, each a WordClock with its own time zone, color and brightness, from one
+# process. The faces share everything that does not need to be their own:
+#   The frames of every fade are run together, in one frame scheduled on master (see SharedFrames). The faces are
+#   created with frames set to the frames of the group.
+#   The faces are woken up together, by one wake up at the next boundary where any face can change, instead of one per
+#   face. Since every time zone is a whole number of quarter hours off UTC, that is one wake up every five minutes, for
+#   any number of faces in any number of time zones. wakes counts the wake ups.
+#   The faces are grouped by time zone, and the local time, slot, and whether the clock jumped are worked out once per
+#   time zone at every wake up (by the first face in the zone), and handed to every face in it (see showSlot). Faces
+#   moving on to the same slot from the same slot share the transition plan of the letters which change, and faces
+#   snapping to the same slot share the plan of the whole face (see targetPlan). Every face shares the precomputed
+#   masks in wordface.py and the palettes in wordcolor.py.
+# clock is the clock every face is driven by (see SystemClock and VirtualClock in wordface.py), and zoneClock gives
+# each face its own view of it in its time zone.
+class ClockGroup:
+    def __init__(self, master, clock=None):
+        self.master = master
+        if clock is None:
+            clock = wordface.SystemClock()
+        self.clock = clock
+        self.frames = SharedFrames(master)
+        self.faces = []
+        self.zones = {}  # The faces in every time zone, by tzinfo (None for the local time zone)
+        self.job = None
+        self.wakes = 0
+
+    # zoneClock returns the clock of the group, as seen in the time zone tz (a tzinfo, or None for the local time
+    # zone), for a new face.
+    def zoneClock(self, tz=None):
+        return wordface.ZoneClock(self.clock, tz)
+
+    # add adds a face made with a clock from zoneClock and frames set to frames, and returns it.
+    def add(self, face):
+        face.ownWakes = False
+        self.faces.append(face)
+        self.zones.setdefault(face.clock.tz, []).append(face)
+        return face
+
+    # start shows the current time on every face at once, plays the given intro on every face which is not off, and
+    # starts the wake ups (see WordClock.start).
+    def start(self, intro="none"):
+        self.wake()
+        for face in self.faces:
+            face.animator.flush()
+            if intro != "none" and face.brightnessSelection != Off:
+                face.animator.queue(face.intros[intro]())
+        return
+
+    # wake shows the current slot on every face, and schedules itself for the next boundary of any time zone.
+    def wake(self):
+        self.wakes = self.wakes + 1
+        wait = None
+        for faces in self.zones.values():
+            now = faces[0].clock.now()
+            slot = wordface.slotAt(now)
+            jumped = faces[0].clockJumped()
+            for face in faces:
+                face.showSlot(now, slot, jumped)
+            seconds = wordface.secondsToBoundary(now, faces[0].resolution)
+            if wait is None or seconds < wait:
+                wait = seconds
+        if self.job is not None:
+            self.master.after_cancel(self.job)
+            self.job = None
+        if wait is not None:
+            self.job = self.master.after(int(wait * 1000) + 1, self.wake)
+        return
@@ -0,0 +1,257 @@
+import time
+import datetime
+import wordlayout
+
+
+# wordface is the word layout of the clock face, kept apart from the Tk application so that it can be used without a
+# GUI. It knows which letters are on the face, which letters make up each word, and which words make up the time, and
+# turns any time into a "mask" of the letters which should be lit.
+#
+# A mask is a plain integer used as a bit array over the Letters grid, of 100 bits on the English face. Bit
+# (row * Columns + column) is set when the letter at that row and column is lit. Masks can be compared, combined, and
+# diffed with the usual integer operators, for example (old & ~new) is every letter which has to be turned off.
+
+
+# The layout of the face comes from a layout file (see wordlayout.py, and the layouts directory), the English 10x10
+# face by default, which is compiled into the tables below when the module is imported. useLayout switches every
+# clock in the process to another layout, and has to be called before any clock is made.
+#   Letters: the grid of letters on the face, one tuple per row. A letter may be more than one character, such as
+#   the two letters of the English face which also include an apostrophe.
+#   Columns, Rows and Cells: the size of the grid, and the number of letters on it.
+#   Words: the (row, column) of every letter of every word, by name. A word can share letters with another, such as
+#   the N shared by ELEVEN and NOON, and can run down the face instead of across it.
+#   Hours and Minutes: the "Hour Statements" and "Minute Statements", the words showing the hour for every hour of
+#   the day, and the words showing the minutes for every slot of the hour (see slotWords).
+#   SlotsPerHour, Slots and Resolution: the number of slots in an hour and in the day, and the number of minutes in a
+#   slot. The face only changes between slots: on the English face, there is one slot for every five minutes of the
+#   day, 288 in all, or one for every minute with minute dots (see addDots in wordlayout.py).
+#   WordMasks, WordIndexes and SlotMasks: the mask of every word, the letter indexes of every word, in order, and the
+#   mask of every slot of the day, so that looking up the face for any time is a single index into SlotMasks.
+#   SlotWords: the names of the words lit in every slot of the day.
+Layout = None
+
+
+# useLayout makes the given Layout (see wordlayout.py) the layout of the face.
+def useLayout(layout):
+    global Layout, Letters, Columns, Rows, Cells, Words, Hours, Minutes, SlotsPerHour, Slots, Resolution
+    global WordMasks, WordIndexes, SlotMasks, SlotWords
+    Layout = layout
+    Letters = layout.letters
+    Columns = layout.columns
+    Rows = layout.rows
+    Cells = layout.cells
+    Words = layout.words
+    Hours = layout.hours
+    Minutes = layout.minutes
+    SlotsPerHour = layout.slotsPerHour
+    Slots = layout.slots
+    Resolution = layout.resolution
+    WordMasks = layout.wordMasks
+    WordIndexes = layout.wordIndexes
+    SlotMasks = layout.slotMasks
+    SlotWords = layout.slotWords
+    return
+
+
+# letterIndex returns the bit of a mask used for the letter at the given row and column.
+def letterIndex(row, column):
+    return row * Columns + column
+
+
+# wordMask returns the mask of all letters of the given word.
+def wordMask(name):
+    return WordMasks[name]
+
+
+# adjustMinutes takes the actual minutes value, and modifies it to the correct index needed for the Minutes array, the
+# slot of the hour.
+def adjustMinutes(minutes):
+    return minutes // Resolution
+
+
+# adjustHours takes the actual hour and the adjusted minutes value, and modifies it to the correct index needed for the
+# Hours array. The next hour is used from the slot the layout gives as nextHour on, because at that point the minute
+# statement will be reading "ITS TWENTY TIL" or less on the English face. After 23:40, the next hour is MIDNIGHT, so
+# the index wraps back around to 0.
+def adjustHours(hour, minutes):
+    if minutes < Layout.nextHour:
+        return hour % len(Hours)
+    else:
+        return (hour + 1) % len(Hours)
+
+
+# slotWords returns the names of the words which are lit in the given slot. The minute statement comes first, followed
+# by the hour statement, leaving out any words the layout only lights in some slots of the hour, such as O'CLOCK,
+# which is only lit at :00 through :04 on the English face.
+def slotWords(slot):
+    return SlotWords[slot]
+
+
+# secondsToBoundary returns the number of seconds from the given datetime until the start of the next period of the
+# given number of minutes, for example the next :00, :05, :10 and so on for the default of 5 minutes. The face can only
+# change at these boundaries, so the clock only has to wake up then.
+def secondsToBoundary(when, resolution=5):
+    elapsed = (when.minute % resolution) * 60 + when.second + when.microsecond / 1000000
+    return resolution * 60 - elapsed
+
+
+# secondsToTime returns the number of seconds from the given datetime until the next time the clock reads the given
+# minute of the day (hour * 60 + minute), a whole day when it reads that minute right now.
+def secondsToTime(when, minute):
+    elapsed = when.hour * 3600 + when.minute * 60 + when.second + when.microsecond / 1000000
+    return (minute * 60 - elapsed) % 86400 or 86400
+
+
+# slotMask returns the mask of the letters which are lit in the given slot.
+def slotMask(slot):
+    return SlotMasks[slot]
+
+
+useLayout(wordlayout.loadLayout())
+
+
+# slotAt returns the slot for the given datetime (or time).
+def slotAt(when):
+    return when.hour * SlotsPerHour + adjustMinutes(when.minute)
+
+
+# maskAt returns the mask of the letters which should be lit at the given datetime (or time).
+def maskAt(when):
+    return SlotMasks[slotAt(when)]
+
+
+# maskIndexes returns the letter indexes of every lit letter in the given mask, in order. Only the lit letters are
+# visited, lowest bit first, so the few letters in the difference of two masks are found without going over the face.
+def maskIndexes(mask):
+    indexes = []
+    while mask:
+        low = mask & -mask
+        indexes.append(low.bit_length() - 1)
+        mask ^= low
+    return indexes
+
+
+# maskText draws the given mask as text, one line per row, with lit letters shown and unlit letters shown as ".". This
+# is handy for checking the face from the command line, for example print(maskText(maskAt(datetime.time(23, 45)))).
+def maskText(mask):
+    lines = []
+    for row in range(0, Rows):
+        lines.append(" ".join(Letters[row][column][0] if mask >> letterIndex(row, column) & 1 else "."
+                              for column in range(0, Columns)))
+    return "\n".join(lines)
+
+
+# wordsAt returns the names of the words which are lit at the given datetime (or time), for example
+# ("ITS", "QUARTER", "TIL", "MIDNIGHT") at 23:45.
+def wordsAt(when):
+    return slotWords(slotAt(when))
+
+
+# Face class holds the state of every letter of a clock face in a few flat arrays, rather than in an object per letter,
+# so that a face only takes a few hundred bytes and many faces fit in one process:
+#   active: a mask of the letters which are lit, like the masks above.
+#   colors: a bytearray of the red, green and blue values of the color every letter shows when it is not fading, three
+#   bytes per letter, in letter index order.
+#   targets: a bytearray of the colors every letter is fading to (or showing, when it is not fading), in the same order.
+# Colors are read and written as "#rrggbb" strings, the same as the renderers use. Every letter starts off (#333333).
+class Face:
+    __slots__ = ("active", "colors", "targets")
+
+    def __init__(self):
+        self.active = 0
+        self.colors = bytearray(b"\x33\x33\x33" * Cells)
+        self.targets = bytearray(b"\x33\x33\x33" * Cells)
+
+    def getActive(self, index):
+        return self.active >> index & 1 == 1
+
+    def setActive(self, index, active):
+        if active:
+            self.active |= 1 << index
+        else:
+            self.active &= ~(1 << index)
+        return
+
+    def getColor(self, index):
+        return "#" + self.colors[index * 3:index * 3 + 3].hex()
+
+    def setColor(self, index, color):
+        self.colors[index * 3:index * 3 + 3] = bytes.fromhex(color[1:])
+        return
+
+    def getTarget(self, index):
+        return "#" + self.targets[index * 3:index * 3 + 3].hex()
+
+    def setTarget(self, index, color):
+        self.targets[index * 3:index * 3 + 3] = bytes.fromhex(color[1:])
+        return
+
+
+# SystemClock and VirtualClock are the two clocks the clock face can be driven by. Both have the same functions:
+#   now(): the current local time, as a datetime.
+#   time(): the current wall clock time, in seconds since the epoch, like time.time().
+#   monotonic(): a clock which never jumps, in seconds, like time.monotonic().
+#
+# SystemClock reads the real clocks of the machine. The optional tz is a tzinfo (for example a zoneinfo.ZoneInfo) for
+# showing the time of another time zone than the machine's own.
+class SystemClock:
+    def __init__(self, tz=None):
+        self.tz = tz
+
+    def now(self):
+        return datetime.datetime.now(self.tz)
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+
+# ZoneClock is another clock (either of the two) seen in the time zone tz, so that many faces in different time zones
+# can be driven by the same clock (see ClockGroup in wordengine.py).
+class ZoneClock:
+    def __init__(self, clock, tz=None):
+        self.clock = clock
+        self.tz = tz
+
+    def now(self):
+        return datetime.datetime.fromtimestamp(self.clock.time(), self.tz)
+
+    def time(self):
+        return self.clock.time()
+
+    def monotonic(self):
+        return self.clock.monotonic()
+
+
+# VirtualClock is a clock which only moves when it is told to, for testing and for replaying a day (or any range of
+# dates) as fast as possible. It keeps the time as seconds since the epoch, so stepping it across a daylight saving
+# change in the given tz works the same as it does on a real clock: the wall clock keeps moving evenly, and the local
+# time jumps. The monotonic clock moves together with the wall clock, except when the wall clock is jumped on purpose
+# with jump, which is how a change by NTP or a suspend and resume can be simulated.
+class VirtualClock:
+    def __init__(self, start, tz=None):
+        self.timestamp = start.timestamp()
+        self.offset = 0.0  # How far the monotonic clock is from the wall clock
+        self.tz = tz
+
+    def now(self):
+        return datetime.datetime.fromtimestamp(self.timestamp, self.tz)
+
+    def time(self):
+        return self.timestamp
+
+    def monotonic(self):
+        return self.timestamp + self.offset
+
+    # advance moves both the wall clock and the monotonic clock forward by the given number of seconds.
+    def advance(self, seconds):
+        self.timestamp += seconds
+        return
+
+    # jump moves only the wall clock by the given number of seconds, forward or back.
+    def jump(self, seconds):
+        self.timestamp += seconds
+        self.offset -= seconds
+        return
@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import hashlib
+import argparse
+import datetime
+
+
+# wordlayout compiles clock face layouts from data files into the index tables wordface.py works from, so that faces
+# of any size and in any language can be added without touching the code. A layout is a JSON file (see the layouts
+# directory) with:
+#   name: the name of the layout.
+#   notes: anything worth knowing about the layout, as a list of lines. Ignored by the compiler.
+#   letters: the grid of letters, one string per row, with the letters of a row separated by spaces. A letter may be
+#   more than one character, such as "T'" for a T with an apostrophe after it. Every row has the same number of
+#   letters.
+#   words: the (row, column) of every letter of every word, by name, either as [row, column, "across" or "down",
+#   length], or as a list of [row, column] pairs for words which do not run straight. A name may end in "_" and
+#   anything else, to tell apart words which are spelled the same, such as FIVE_1 and FIVE_2. The letters of a word
+#   have to spell its name (without the ending), so mistakes in the coordinates are caught when the layout is compiled.
+#   minutes: the words showing the minutes, for every slot of the hour. The slots split the hour evenly, so there are
+#   12 slots of five minutes for 12 phrases, or 60 slots of a minute for 60.
+#   hours: the words showing the hour, for every hour of the day from midnight, either 24 of them, or 12 for a face
+#   which does not tell AM from PM.
+#   nextHour: the first slot of the hour in which the next hour is shown, such as 8 for "TWENTY TIL" at :40.
+#   only: words which are only lit in some slots of the hour, by name, with the list of those slots, such as
+#   {"OCLOCK": [0]} for O'CLOCK only being lit at :00 through :04.
+#
+# Compiling a layout checks it, and works out the letter indexes and mask of every word, and the words and mask of
+# every slot of the day (see Layout). The compiled tables are kept on disk, in the wordclock directory of the user's
+# cache directory, under the SHA-256 hash of the layout file (and CompilerVersion), so a layout is only compiled the
+# first time it is loaded, or after it has changed. The compiler itself only takes time in proportion to the number
+# of slots times the words in a phrase, so even a 16x16 face with a phrase for every minute compiles in milliseconds.
+#
+# Any layout with slots of two to five minutes can also be compiled with minute dots (see addDots), which light up
+# one by one in the corners of the face for every minute past the start of a slot, so the face shows the time to the
+# minute.
+#
+# From the command line, "python wordlayout.py layouts/english.json" compiles a layout and prints what it shows at
+# --time (12:55 by default), and --dots compiles it with minute dots.
+CompilerVersion = 1
+DefaultLayout = os.path.join(os.path.dirname(os.path.abspath(__file__)), "layouts", "english.json")
+Dot = "\u2022"  # The letter drawn for a minute dot, a bullet
+
+
+# Layout class holds the compiled tables of a layout, as read back from the cache or made by compileLayout:
+#   name: the name of the layout.
+#   letters: the grid of letters, one tuple per row.
+#   columns, rows, cells: the size of the grid, and the number of letters in it.
+#   words: the (row, column) of every letter of every word, by name.
+#   minutes, hours, nextHour, only: the phrase rules, as given in the layout file.
+#   wordIndexes and wordMasks: the letter indexes (row * columns + column) and mask of every word, by name.
+#   slotsPerHour, slots and resolution: the number of slots in an hour and in the day, and the minutes in a slot.
+#   slotWords and slotMasks: the names of the words and the mask of the letters lit in every slot of the day.
+class Layout:
+    def __init__(self, tables):
+        self.name = tables["name"]
+        self.letters = tuple(tuple(row) for row in tables["letters"])
+        self.rows = len(self.letters)
+        self.columns = len(self.letters[0])
+        self.cells = self.rows * self.columns
+        self.words = dict((name, tuple(tuple(cell) for cell in cells)) for name, cells in tables["words"].items())
+        self.minutes = tuple(tuple(phrase) for phrase in tables["minutes"])
+        self.hours = tuple(tuple(phrase) for phrase in tables["hours"])
+        self.nextHour = tables["nextHour"]
+        self.only = dict((name, frozenset(slots)) for name, slots in tables["only"].items())
+        self.wordIndexes = dict((name, tuple(indexes)) for name, indexes in tables["wordIndexes"].items())
+        self.wordMasks = dict(tables["wordMasks"])
+        self.slotsPerHour = len(self.minutes)
+        self.slots = 24 * self.slotsPerHour
+        self.resolution = 60 // self.slotsPerHour
+        self.slotWords = tuple(tuple(words) for words in tables["slotWords"])
+        self.slotMasks = tuple(tables["slotMasks"])
+
+
+# wordCells returns the (row, column) of every letter of a word, from the way it is given in a layout file.
+def wordCells(spec):
+    if len(spec) == 4 and isinstance(spec[0], int):
+        row, column, direction, length = spec
+        if direction == "across":
+            return [(row, column + i) for i in range(0, length)]
+        if direction == "down":
+            return [(row + i, column) for i in range(0, length)]
+        raise ValueError("words run across or down, not %r" % direction)
+    return [tuple(cell) for cell in spec]
+
+
+# addDots adds minute dots to a layout, from its letters, the cells of its words, and its phrase rules, and returns
+# them as they are with the dots. The letters are moved in by a row and a column, and the border around them is left
+# blank, apart from a dot in each of the first corners, clockwise from the top left, for every minute of a slot after
+# the first. Every slot of the hour is split into slots of a minute, with the words of the slot it was split from and
+# a dot lit for every minute past the start of that slot, so 12:58 shows "FIVE TIL ONE" and three dots.
+def addDots(letters, words, minutes, nextHour, only):
+    resolution = 60 // len(minutes)
+    if not 2 <= resolution <= 5:
+        raise ValueError("minute dots need slots of two to five minutes, not %d" % resolution)
+    rows = len(letters) + 2
+    columns = len(letters[0]) + 2
+    grid = [[" "] * columns for row in range(0, rows)]
+    for row in range(0, len(letters)):
+        grid[row + 1][1:columns - 1] = letters[row]
+    cells = dict((name, [(row + 1, column + 1) for row, column in wordCells]) for name, wordCells in words.items())
+    corners = ((0, 0), (0, columns - 1), (rows - 1, columns - 1), (rows - 1, 0))
+    dots = []
+    for row, column in corners[0:resolution - 1]:
+        grid[row][column] = Dot
+        dots.append("DOT_%d" % (len(dots) + 1))
+        cells[dots[-1]] = [(row, column)]
+    minutes = [minutes[minute // resolution] + dots[0:minute % resolution] for minute in range(0, 60)]
+    only = dict((name, [slot * resolution + minute for slot in slots for minute in range(0, resolution)])
+                for name, slots in only.items())
+    return grid, cells, minutes, nextHour * resolution, only
+
+
+# compileLayout checks the given layout (the contents of a layout file), and returns its compiled tables, in the form
+# they are cached in and a Layout is made from, with minute dots if dots is True (see addDots). A ValueError saying
+# what is wrong is raised if the layout does not hold together.
+def compileLayout(layout, dots=False):
+    letters = [row.split() for row in layout["letters"]]
+    rows = len(letters)
+    columns = len(letters[0]) if rows > 0 else 0
+    if columns == 0 or any(len(row) != columns for row in letters):
+        raise ValueError("every row of letters needs the same number of letters")
+    words = {}
+    for name, spec in layout["words"].items():
+        cells = wordCells(spec)
+        for row, column in cells:
+            if not (0 <= row < rows and 0 <= column < columns):
+                raise ValueError("word %s runs off the face at row %d, column %d" % (name, row, column))
+        spelled = "".join(letters[row][column][0] for row, column in cells)
+        if spelled.upper() != name.split("_")[0].upper():
+            raise ValueError("word %s is spelled %s on the face" % (name, spelled))
+        words[name] = cells
+    minutes = layout["minutes"]
+    hours = layout["hours"]
+    nextHour = layout.get("nextHour", len(minutes))
+    only = layout.get("only", {})
+    if len(minutes) == 0 or 60 % len(minutes) != 0:
+        raise ValueError("there are %d minute phrases, which do not split the hour evenly" % len(minutes))
+    if len(hours) not in (12, 24):
+        raise ValueError("there are %d hour phrases, rather than 12 or 24" % len(hours))
+    for phrase in list(minutes) + list(hours) + [list(only)]:
+        for name in phrase:
+            if name not in words:
+                raise ValueError("no such word %s" % name)
+    if dots:
+        letters, words, minutes, nextHour, only = addDots(letters, words, minutes, nextHour, only)
+        columns = len(letters[0])
+    wordIndexes = {}
+    wordMasks = {}
+    for name, cells in words.items():
+        wordIndexes[name] = [row * columns + column for row, column in cells]
+        wordMasks[name] = 0
+        for index in wordIndexes[name]:
+            wordMasks[name] |= 1 << index
+    slotWords = []
+    slotMasks = []
+    for slot in range(0, 24 * len(minutes)):
+        minute = slot % len(minutes)
+        hour = slot // len(minutes)
+        if minute >= nextHour:
+            hour = hour + 1
+        phrase = [name for name in minutes[minute] + hours[hour % len(hours)]
+                  if name not in only or minute in only[name]]
+        mask = 0
+        for name in phrase:
+            mask |= wordMasks[name]
+        slotWords.append(phrase)
+        slotMasks.append(mask)
+    return {"version": CompilerVersion, "name": layout.get("name", ""), "letters": letters, "words": words,
+            "minutes": minutes, "hours": hours, "nextHour": nextHour, "only": only, "wordIndexes": wordIndexes,
+            "wordMasks": wordMasks, "slotWords": slotWords, "slotMasks": slotMasks}
+
+
+# cacheDirectory returns the directory compiled layouts are kept in.
+def cacheDirectory():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "wordclock")
+
+
+# loadLayout returns the Layout of the layout file at path, with minute dots if dots is True, from the cache if it has
+# been compiled before, and compiles and caches it otherwise. Anything wrong with the cache, such as a cache directory
+# which cannot be written, only means the layout is compiled every time.
+def loadLayout(path=DefaultLayout, cache=True, dots=False):
+    with open(path, "rb") as source:
+        data = source.read()
+    key = hashlib.sha256(b"%d%s\n" % (CompilerVersion, b" dots" if dots else b"") + data).hexdigest()
+    cached = os.path.join(cacheDirectory(), key + ".json")
+    if cache:
+        try:
+            with open(cached, "r", encoding="utf-8") as source:
+                tables = json.load(source)
+            if tables.get("version") == CompilerVersion:
+                return Layout(tables)
+        except (OSError, ValueError, KeyError, IndexError, TypeError):
+            pass
+    tables = compileLayout(json.loads(data.decode("utf-8")), dots)
+    if cache:
+        try:
+            os.makedirs(cacheDirectory(), exist_ok=True)
+            temporary = "%s.%d" % (cached, os.getpid())
+            with open(temporary, "w", encoding="utf-8") as output:
+                json.dump(tables, output, ensure_ascii=False)
+            os.replace(temporary, cached)
+        except OSError:
+            pass
+    return Layout(tables)
+
+
+# main compiles the layout file given, and prints the words and face at --time, so a new layout can be checked.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Word Clock layout compiler")
+    parser.add_argument("layout", nargs="?", default=DefaultLayout, help="layout file (default: the English face)")
+    parser.add_argument("--time", default="12:55", help="time to show, such as 12:55 (default: 12:55)")
+    parser.add_argument("--dots", action="store_true", help="compile the layout with minute dots")
+    parser.add_argument("--no-cache", action="store_true", help="compile the layout even if it is in the cache")
+    args = parser.parse_args(argv)
+    try:
+        layout = loadLayout(args.layout, cache=not args.no_cache, dots=args.dots)
+    except ValueError as error:
+        sys.exit("%s: %s" % (args.layout, error))
+    when = datetime.datetime.strptime(args.time, "%H:%M")
+    slot = when.hour * layout.slotsPerHour + when.minute // layout.resolution
+    sys.stdout.write("%s: %d x %d letters, %d words, %d slots of %d minutes\n%s\n" % (
+        layout.name, layout.columns, layout.rows, len(layout.words), layout.slots, layout.resolution,
+        " ".join(layout.slotWords[slot])))
+    for row in range(0, layout.rows):
+        sys.stdout.write(" ".join(layout.letters[row][column][0] if layout.slotMasks[slot] >> row * layout.columns +
+                                  column & 1 else "." for column in range(0, layout.columns)) + "\n")
+
+
+if __name__ == "__main__":
+    main()
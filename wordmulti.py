@@ -0,0 +1,104 @@
+from tkinter import *
+import argparse
+import zoneinfo
+import wordcolor
+import wordengine
+import wordclockv2
+
+
+# wordmulti runs many clock faces in one window, and one process, each with its own time zone and color, for example
+# for a wall of clocks in the time zones of every office. The faces are driven together by a ClockGroup (see
+# wordengine.py), so the whole window wakes up once per five minute boundary, and runs the fades of every face in the
+# same frames, no matter how many faces there are. Each face has its own color and brightness: a left click on a face
+# changes its color, and a right click its brightness, like the buttons of the single clock in wordclockv2.py. With
+# --worker, the faces are run on a thread of their own by a RenderWorker (see wordengine.py), and the Tk thread only
+# draws the letters which changed, so a wall of many faces never holds up the window.
+
+
+# parseFace turns a "ZONE" or "ZONE=RRGGBB" string, such as "Europe/Berlin=FF8800", into a (tzinfo, color) tuple,
+# with None for the local time zone ("local") or the default color.
+def parseFace(text):
+    zone, separator, color = text.partition("=")
+    tz = None
+    if zone != "local":
+        try:
+            tz = zoneinfo.ZoneInfo(zone)
+        except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+            raise argparse.ArgumentTypeError("unknown time zone %r" % zone)
+    if separator == "":
+        return tz, None
+    try:
+        return tz, wordcolor.normalColor(color)
+    except ValueError:
+        raise argparse.ArgumentTypeError("colors are given as RRGGBB, not %r" % color)
+
+
+# addFace adds a face for the given time zone and color to the group, drawn on a canvas of its own in the given cell
+# of the window, with the name of its time zone under it, and returns it. When worker is given, the group is run by
+# that RenderWorker, and the face draws through it.
+def addFace(root, group, tz, color, column, row, blending, easing, worker=None):
+    frame = Frame(root, background="black")
+    frame.grid(column=column, row=row, padx=10, pady=10)
+    canvas = Canvas(frame, bd=0, highlightthickness=0, background="black")
+    canvas.pack()
+    Label(frame, text=str(tz or "local"), fg="#333333", bg="#000000").pack()
+    renderer = wordclockv2.CanvasRenderer(canvas)
+    if worker is None:
+        face = wordengine.WordClock(root, renderer, group.zoneClock(tz), blending=blending, easing=easing,
+                                    frames=group.frames)
+        canvas.bind("<Button-1>", lambda event: face.changeColor())
+        canvas.bind("<Button-3>", lambda event: face.changeBrightness())
+    else:
+        output = worker.output(renderer)
+        face = wordengine.WordClock(group.master, output, group.zoneClock(tz), blending=blending, easing=easing,
+                                    frames=group.frames)
+        face.animator.frameEnd.append(output.publish)
+        canvas.bind("<Button-1>", lambda event: worker.call(face.changeColor))
+        canvas.bind("<Button-3>", lambda event: worker.call(face.changeBrightness))
+    if color is not None:
+        face.addColor(color, select=True)
+    return group.add(face)
+
+
+# main creates one face for every --face given (or a single face in the local time zone), --columns to a row, and
+# runs them all from the same Tk mainloop.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Word Clock wall of clocks")
+    parser.add_argument("--face", action="append", default=[], type=parseFace, metavar="ZONE[=RRGGBB]",
+                        help="add a face showing the time in ZONE, such as Asia/Tokyo or local, optionally in a "
+                             "color of its own, such as Asia/Tokyo=FF8800 (may be repeated)")
+    parser.add_argument("--columns", type=int, default=4, help="faces in a row of the window (default: 4)")
+    parser.add_argument("--blend", choices=sorted(wordcolor.Blendings), default="linear",
+                        help="how colors are mixed during a fade (default: linear)")
+    parser.add_argument("--easing", choices=sorted(wordcolor.Easings), default="smooth",
+                        help="how a fade moves along over time (default: smooth)")
+    parser.add_argument("--intro", choices=("none", "sweep"), default="none",
+                        help="intro animation to play after the time is first shown (default: none)")
+    parser.add_argument("--worker", action="store_true",
+                        help="work out the frames on a thread of their own, apart from the window")
+    args = parser.parse_args(argv)
+    faces = args.face
+    if len(faces) == 0:
+        faces = [(None, None)]
+
+    root = Tk()
+    root.title("Word Clock")
+    root.configure(background="black")
+    worker = None
+    if args.worker:
+        worker = wordengine.RenderWorker(root)
+        group = wordengine.ClockGroup(worker.scheduler)
+    else:
+        group = wordengine.ClockGroup(root)
+    for i, (tz, color) in enumerate(faces):
+        addFace(root, group, tz, color, i % args.columns, i // args.columns, args.blend, args.easing, worker)
+    group.start(args.intro)
+    if worker is not None:
+        worker.start()
+    root.mainloop()
+    if worker is not None:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,436 @@
+import sys
+import os
+import struct
+import zlib
+import datetime
+import argparse
+import wordface
+import wordlayout
+import wordcolor
+import wordengine
+
+
+# wordraster draws the clock face into an RGB pixel buffer in memory, without Tk or a display, and writes frames out as
+# PNG images and whole fades as animated GIFs, for example to make previews on a build server. Everything it needs is
+# in the Python standard library: the letters are drawn with a small built-in bitmap font (or any BDF font), PNG images
+# are compressed with zlib, and GIF images with the LZW encoder below.
+#
+# From the command line:
+#   python wordraster.py --time 12:55 --png face.png: the face at 12:55, as a PNG image.
+#   python wordraster.py --time 12:55 --gif fade.gif: the transition from 12:55 to 13:00, as an animated GIF.
+#   python wordraster.py --time 12:55 --colors --gif colors.gif: a press of the color button for every color.
+#   python wordraster.py --day previews: every transition of the day, as one GIF per slot in the previews directory.
+
+
+# Glyphs is the built-in font, 5x7 dots for every capital letter (and the German umlauts), 1x7 for the apostrophe and
+# 3x3 for a minute dot (see addDots in wordlayout.py), drawn with "#" for a dot and "." for a gap.
+Glyphs = {"A": (".###.", "#...#", "#...#", "#####", "#...#", "#...#", "#...#"),
+          "B": ("####.", "#...#", "#...#", "####.", "#...#", "#...#", "####."),
+          "C": (".###.", "#...#", "#....", "#....", "#....", "#...#", ".###."),
+          "D": ("####.", "#...#", "#...#", "#...#", "#...#", "#...#", "####."),
+          "E": ("#####", "#....", "#....", "####.", "#....", "#....", "#####"),
+          "F": ("#####", "#....", "#....", "####.", "#....", "#....", "#...."),
+          "G": (".###.", "#...#", "#....", "#.###", "#...#", "#...#", ".###."),
+          "H": ("#...#", "#...#", "#...#", "#####", "#...#", "#...#", "#...#"),
+          "I": (".###.", "..#..", "..#..", "..#..", "..#..", "..#..", ".###."),
+          "J": ("..###", "...#.", "...#.", "...#.", "...#.", "#..#.", ".##.."),
+          "K": ("#...#", "#..#.", "#.#..", "##...", "#.#..", "#..#.", "#...#"),
+          "L": ("#....", "#....", "#....", "#....", "#....", "#....", "#####"),
+          "M": ("#...#", "##.##", "#.#.#", "#.#.#", "#...#", "#...#", "#...#"),
+          "N": ("#...#", "#...#", "##..#", "#.#.#", "#..##", "#...#", "#...#"),
+          "O": (".###.", "#...#", "#...#", "#...#", "#...#", "#...#", ".###."),
+          "P": ("####.", "#...#", "#...#", "####.", "#....", "#....", "#...."),
+          "Q": (".###.", "#...#", "#...#", "#...#", "#.#.#", "#..#.", ".##.#"),
+          "R": ("####.", "#...#", "#...#", "####.", "#.#..", "#..#.", "#...#"),
+          "S": (".####", "#....", "#....", ".###.", "....#", "....#", "####."),
+          "T": ("#####", "..#..", "..#..", "..#..", "..#..", "..#..", "..#.."),
+          "U": ("#...#", "#...#", "#...#", "#...#", "#...#", "#...#", ".###."),
+          "V": ("#...#", "#...#", "#...#", "#...#", "#...#", ".#.#.", "..#.."),
+          "W": ("#...#", "#...#", "#...#", "#.#.#", "#.#.#", "#.#.#", ".#.#."),
+          "X": ("#...#", "#...#", ".#.#.", "..#..", ".#.#.", "#...#", "#...#"),
+          "Y": ("#...#", "#...#", ".#.#.", "..#..", "..#..", "..#..", "..#.."),
+          "Z": ("#####", "....#", "...#.", "..#..", ".#...", "#....", "#####"),
+          "Ä": ("#...#", ".....", ".###.", "#...#", "#####", "#...#", "#...#"),
+          "Ö": ("#...#", ".....", ".###.", "#...#", "#...#", "#...#", ".###."),
+          "Ü": ("#...#", ".....", "#...#", "#...#", "#...#", "#...#", ".###."),
+          "'": ("#", "#", ".", ".", ".", ".", "."),
+          "\u2022": (".#.", "###", ".#.")}
+
+
+# loadBdf reads a bitmap font in the BDF format from the given file, and returns it in the same form as Glyphs, with
+# every glyph as tall as the font, so it can be used in place of the built-in font.
+def loadBdf(path):
+    glyphs = {}
+    ascent = None
+    height = None
+    with open(path) as bdf:
+        lines = iter(bdf.read().splitlines())
+    for line in lines:
+        words = line.split()
+        if len(words) == 0:
+            continue
+        if words[0] == "FONTBOUNDINGBOX":
+            height = int(words[2])
+            if ascent is None:
+                ascent = int(words[2]) + int(words[4])
+        elif words[0] == "FONT_ASCENT":
+            ascent = int(words[1])
+        elif words[0] == "STARTCHAR":
+            encoding = None
+            box = None
+            for line in lines:
+                words = line.split()
+                if words[0] == "ENCODING":
+                    encoding = int(words[1])
+                elif words[0] == "BBX":
+                    box = tuple(int(word) for word in words[1:5])
+                elif words[0] == "BITMAP":
+                    break
+            width, rows, xOffset, yOffset = box
+            bitmap = []
+            for line in lines:
+                if line.startswith("ENDCHAR"):
+                    break
+                bits = int(line, 16)
+                size = len(line.strip()) * 4
+                bitmap.append("".join("#" if bits >> (size - 1 - x) & 1 else "." for x in range(0, width)))
+            if encoding is None or encoding < 0:
+                continue
+            top = ascent - (rows + yOffset)
+            glyph = ["." * width] * height
+            for y, row in enumerate(bitmap):
+                if 0 <= top + y < height:
+                    glyph[top + y] = row
+            glyphs[chr(encoding)] = tuple(glyph)
+    return glyphs
+
+
+# RasterRenderer is a rendering backend which draws the face into pixels, a bytearray of red, green and blue values
+# (three bytes per pixel, row after row, width by height pixels). It has the same functions as the renderers in
+# wordclockv2.py, so a WordClock (see wordengine.py) can draw with it in place of Tk.
+#
+# Every letter is drawn in a cell of cellWidth by cellHeight pixels, with every dot of the font scale pixels wide and
+# high, centered in the cell. font is a table of glyphs like Glyphs (the default), for example from loadBdf.
+#
+# The pixels of a cell only depend on its letter and color, so every cell is drawn once, kept in cells, and from then
+# on a letter is recolored by copying its rows of pixels straight into the buffer (see getCell). Like the palette cache
+# in wordcolor.py, no more cells are kept once there are cellLimit of them. calls counts the cells copied.
+cellLimit = 4096
+
+
+class RasterRenderer:
+    def __init__(self, cellWidth=32, cellHeight=36, scale=3, font=None, background="#000000"):
+        self.cellWidth = cellWidth
+        self.cellHeight = cellHeight
+        self.scale = scale
+        if font is None:
+            font = Glyphs
+        self.font = font
+        self.background = bytes(wordcolor.parseColor(background))
+        self.width = 0
+        self.height = 0
+        self.pixels = bytearray()
+        self.letters = []  # The text and the top left pixel of every letter, by item
+        self.groups = {}
+        self.cells = {}
+        self.calls = 0
+
+    def setGridSize(self, columns, rows):
+        self.width = columns * self.cellWidth
+        self.height = rows * self.cellHeight
+        self.pixels = bytearray(self.background * (self.width * self.height))
+        return
+
+    def addLetter(self, text, column, row):
+        self.letters.append((text, column * self.cellWidth, row * self.cellHeight))
+        item = len(self.letters) - 1
+        self.setColor(item, "#333333")
+        return item
+
+    def setColor(self, item, color):
+        text, left, top = self.letters[item]
+        stride = self.width * 3
+        start = top * stride + left * 3
+        end = start + self.cellWidth * 3
+        for row in self.getCell(text, color):
+            self.pixels[start:end] = row
+            start = start + stride
+            end = end + stride
+        self.calls = self.calls + 1
+        return
+
+    def setGroup(self, tag, items):
+        self.groups[tag] = tuple(items)
+        return
+
+    def setGroupColor(self, tag, color):
+        for item in self.groups.get(tag, ()):
+            self.setColor(item, color)
+        return
+
+    # getCell returns the rows of pixels of a cell showing the given text in the given color, drawing it the first time
+    # it is asked for.
+    def getCell(self, text, color):
+        cell = self.cells.get((text, color))
+        if cell is None:
+            glyphs = [self.font.get(character, self.font.get("?", ())) for character in text]
+            columns = []  # Every column of dots of the text, with a gap between the glyphs
+            for glyph in glyphs:
+                if len(columns) > 0:
+                    columns.append(None)
+                for x in range(0, max((len(row) for row in glyph), default=0)):
+                    columns.append(tuple(x < len(row) and row[x] == "#" for row in glyph))
+            dotRows = max((len(glyph) for glyph in glyphs), default=0)
+            left = (self.cellWidth - len(columns) * self.scale) // 2
+            top = (self.cellHeight - dotRows * self.scale) // 2
+            ink = bytes(wordcolor.parseColor(color))
+            rows = []
+            for y in range(0, self.cellHeight):
+                row = bytearray(self.background * self.cellWidth)
+                dotRow = (y - top) // self.scale
+                if y >= top and dotRow < dotRows:
+                    for dotColumn, dots in enumerate(columns):
+                        if dots is not None and dotRow < len(dots) and dots[dotRow]:
+                            x = left + dotColumn * self.scale
+                            row[x * 3:(x + self.scale) * 3] = ink * self.scale
+                rows.append(bytes(row))
+            cell = tuple(rows)
+            if len(self.cells) < cellLimit:
+                self.cells[(text, color)] = cell
+        return cell
+
+    # getFrame returns a copy of the pixels as they are now.
+    def getFrame(self):
+        return bytes(self.pixels)
+
+
+# encodePng returns the given pixels (red, green and blue bytes, row after row) as a PNG image.
+def encodePng(width, height, pixels):
+    stride = width * 3
+    raw = b"".join(b"\x00" + pixels[y * stride:(y + 1) * stride] for y in range(0, height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) +
+            chunk(b"IDAT", zlib.compress(raw, 9)) + chunk(b"IEND", b""))
+
+
+# lzwEncode compresses a sequence of color indexes with the variable length LZW code of the GIF format, and returns the
+# packed bytes. minCodeSize is the number of bits of the color indexes (at least 2).
+def lzwEncode(indexes, minCodeSize):
+    clear = 1 << minCodeSize
+    codeSize = minCodeSize + 1
+    lastCode = clear + 1  # The code given out last, starting from the end of information code
+    overflow = clear << 1  # The first code which needs a bigger code size
+    table = {}
+    output = bytearray()
+    bits = clear  # The bits not yet written to output, which always start with a clear code
+    bitCount = codeSize
+    code = indexes[0]
+    for index in indexes[1:]:
+        key = code << 8 | index
+        known = table.get(key)
+        if known is not None:
+            code = known
+            continue
+        bits = bits | code << bitCount
+        bitCount = bitCount + codeSize
+        while bitCount >= 8:
+            output.append(bits & 0xFF)
+            bits = bits >> 8
+            bitCount = bitCount - 8
+        code = index
+        lastCode = lastCode + 1
+        if lastCode == overflow:
+            codeSize = codeSize + 1
+            overflow = overflow << 1
+        if lastCode == 4095:  # The table is full, so it is cleared and started afresh
+            bits = bits | clear << bitCount
+            bitCount = bitCount + codeSize
+            codeSize = minCodeSize + 1
+            lastCode = clear + 1
+            overflow = clear << 1
+            table = {}
+        else:
+            table[key] = lastCode
+    bits = bits | code << bitCount
+    bitCount = bitCount + codeSize
+    lastCode = lastCode + 1
+    if lastCode == overflow:
+        codeSize = codeSize + 1
+    if lastCode == 4095:
+        bits = bits | clear << bitCount
+        bitCount = bitCount + codeSize
+        codeSize = minCodeSize + 1
+    bits = bits | (clear + 1) << bitCount
+    bitCount = bitCount + codeSize
+    while bitCount > 0:
+        output.append(bits & 0xFF)
+        bits = bits >> 8
+        bitCount = bitCount - 8
+    return bytes(output)
+
+
+# encodeGif returns the given frames (each the pixels of a whole image, as for encodePng) as an animated GIF image,
+# which loops for ever and shows every frame for delay milliseconds. Every frame only stores the rectangle of pixels
+# which changed since the frame before, with a color table of its own. As the face has at most a few dozen colors
+# showing at a time, the colors always fit into the 256 colors a GIF frame can have.
+def encodeGif(width, height, frames, delay):
+    output = bytearray(b"GIF89a" + struct.pack("<HHBBB", width, height, 0, 0, 0))
+    output += b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00"
+    stride = width * 3
+    previous = None
+    for frame in frames:
+        left, top, right, bottom = 0, 0, width, height
+        if previous is not None:
+            changed = [y for y in range(0, height) if frame[y * stride:(y + 1) * stride] !=
+                       previous[y * stride:(y + 1) * stride]]
+            if len(changed) == 0:
+                left, top, right, bottom = 0, 0, 1, 1
+            else:
+                top, bottom = changed[0], changed[-1] + 1
+                left, right = width, 0
+                for y in changed:
+                    row = frame[y * stride:(y + 1) * stride]
+                    old = previous[y * stride:(y + 1) * stride]
+                    x = 0
+                    while row[x * 3:x * 3 + 3] == old[x * 3:x * 3 + 3]:
+                        x = x + 1
+                    left = min(left, x)
+                    x = width
+                    while row[x * 3 - 3:x * 3] == old[x * 3 - 3:x * 3]:
+                        x = x - 1
+                    right = max(right, x)
+        previous = frame
+        colors = {}
+        rows = {}  # The color indexes of every row of pixels seen in the frame, as most rows are repeated many times
+        indexes = bytearray()
+        for y in range(top, bottom):
+            row = frame[y * stride + left * 3:y * stride + right * 3]
+            rowIndexes = rows.get(row)
+            if rowIndexes is None:
+                rowIndexes = bytearray()
+                for x in range(0, len(row), 3):
+                    color = row[x:x + 3]
+                    index = colors.get(color)
+                    if index is None:
+                        index = colors[color] = len(colors)
+                    rowIndexes.append(index)
+                rows[row] = rowIndexes
+            indexes += rowIndexes
+        tableBits = max(1, (len(colors) - 1).bit_length())
+        table = b"".join(colors) + b"\x00\x00\x00" * ((1 << tableBits) - len(colors))
+        output += b"\x21\xf9\x04" + struct.pack("<BHBB", 0x04, (delay + 5) // 10, 0, 0)
+        output += b"\x2c" + struct.pack("<HHHHB", left, top, right - left, bottom - top, 0x80 | (tableBits - 1))
+        output += table
+        minCodeSize = max(2, tableBits)
+        data = lzwEncode(indexes, minCodeSize)
+        output.append(minCodeSize)
+        for start in range(0, len(data), 255):
+            block = data[start:start + 255]
+            output.append(len(block))
+            output += block
+        output.append(0)
+    output.append(0x3b)
+    return bytes(output)
+
+
+# Preview class is a WordClock drawn by a RasterRenderer on a VirtualClock, which records every frame the clock draws.
+# renderer is the RasterRenderer to draw with, and start the time (a datetime) the clock starts at.
+class Preview:
+    def __init__(self, renderer, start, blending="linear", easing="smooth"):
+        self.renderer = renderer
+        self.clock = wordface.VirtualClock(start)
+        self.wordclock = wordengine.WordClock(wordengine.Scheduler(), renderer, self.clock, blending=blending,
+                                              easing=easing)
+        self.wordclock.start()
+
+    # record runs every frame the clock has queued, and returns the pixels of every frame, starting with the frame shown
+    # before any of them.
+    def record(self):
+        frames = [self.renderer.getFrame()]
+        while self.wordclock.animator.step() is not None:
+            frames.append(self.renderer.getFrame())
+        return frames
+
+    # transition moves the clock on to the next slot, and returns the frames of the transition.
+    def transition(self):
+        self.clock.advance(wordface.secondsToBoundary(self.clock.now(), self.wordclock.resolution))
+        self.wordclock.updatetime()
+        return self.record()
+
+    # colorCycle presses the color button once for every color, and returns the frames of all the color changes.
+    def colorCycle(self):
+        frames = [self.renderer.getFrame()]
+        for i in range(0, len(self.wordclock.colorOptions)):
+            self.wordclock.changeColor()
+            frames.extend(self.record()[1:])
+        return frames
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Word Clock raster export")
+    parser.add_argument("--time", default="12:55", help="time the clock starts at, such as 12:55 (default: 12:55)")
+    parser.add_argument("--png", help="write the face at --time to this PNG file")
+    parser.add_argument("--gif", help="write the transition from --time to the next slot to this GIF file")
+    parser.add_argument("--colors", action="store_true", help="with --gif, cycle through the colors instead")
+    parser.add_argument("--day", metavar="DIRECTORY", help="write every transition of the day to DIRECTORY")
+    parser.add_argument("--cell-width", type=int, default=32, help="width of a letter cell in pixels")
+    parser.add_argument("--cell-height", type=int, default=36, help="height of a letter cell in pixels")
+    parser.add_argument("--scale", type=int, default=3, help="size of a dot of the font in pixels")
+    parser.add_argument("--layout", metavar="FILE",
+                        help="layout of the face, such as layouts/german.json (default: the English face)")
+    parser.add_argument("--dots", action="store_true",
+                        help="light a minute dot in a corner of the face for every minute past the words shown")
+    parser.add_argument("--font", help="BDF font file to use instead of the built-in font")
+    parser.add_argument("--blend", choices=sorted(wordcolor.Blendings), default="linear",
+                        help="how colors are mixed during a fade (default: linear)")
+    parser.add_argument("--easing", choices=sorted(wordcolor.Easings), default="smooth",
+                        help="how a fade moves along over time (default: smooth)")
+    args = parser.parse_args(argv)
+    if args.layout is not None or args.dots:
+        path = args.layout or wordlayout.DefaultLayout
+        try:
+            wordface.useLayout(wordlayout.loadLayout(path, dots=args.dots))
+        except (OSError, ValueError) as error:
+            parser.error("%s: %s" % (path, error))
+
+    font = None
+    if args.font is not None:
+        font = loadBdf(args.font)
+    hour, minute = (int(part) for part in args.time.split(":"))
+    start = datetime.datetime(2024, 1, 1, hour, minute)
+
+    def preview(when):
+        renderer = RasterRenderer(args.cell_width, args.cell_height, args.scale, font)
+        return Preview(renderer, when, args.blend, args.easing)
+
+    if args.png is not None:
+        clockPreview = preview(start)
+        with open(args.png, "wb") as output:
+            output.write(encodePng(clockPreview.renderer.width, clockPreview.renderer.height,
+                                   clockPreview.renderer.getFrame()))
+    if args.gif is not None:
+        clockPreview = preview(start)
+        if args.colors:
+            frames = clockPreview.colorCycle()
+        else:
+            frames = clockPreview.transition()
+        with open(args.gif, "wb") as output:
+            output.write(encodeGif(clockPreview.renderer.width, clockPreview.renderer.height, frames,
+                                   clockPreview.wordclock.animator.frameDelay))
+    if args.day is not None:
+        os.makedirs(args.day, exist_ok=True)
+        clockPreview = preview(datetime.datetime(2024, 1, 1, 0, 0))
+        for slot in range(0, wordface.Slots):
+            name = clockPreview.clock.now().strftime("%H%M")
+            frames = clockPreview.transition()
+            with open(os.path.join(args.day, "transition-%s.gif" % name), "wb") as output:
+                output.write(encodeGif(clockPreview.renderer.width, clockPreview.renderer.height, frames,
+                                       clockPreview.wordclock.animator.frameDelay))
+            sys.stdout.write("%s\n" % name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+import sys
+import os
+import time
+import mmap
+import struct
+import zoneinfo
+import argparse
+import wordface
+import wordengine
+import wordraster
+
+
+# wordshm shares the live clock face with other programs through a memory mapped file, so that a program such as a C
+# daemon driving a panel can read the frames straight from memory, without any socket in between.
+#
+# The file has a fixed layout, all numbers little endian:
+#   Header, 28 bytes (see Header), followed by unused bytes up to byte 64:
+#     0: magic, the 4 bytes "WCFB"
+#     4: version, uint16, 1
+#     6: format, uint16, 0 for cells (the colors of the letters, by letter index, see letterIndex in wordface.py)
+#        or 1 for raster (the pixels drawn by the RasterRenderer in wordraster.py, row after row)
+#     8: width, uint16: the columns of the face for cells, or the width of the image in pixels for raster
+#     10: height, uint16: the rows of the face for cells, or the height of the image in pixels for raster
+#     12: frameSize, uint32: the number of bytes of a frame, width * height * 3 (red, green and blue)
+#     16: generation, uint64: the number of frames written so far
+#     24: slotSize, uint32: the distance in bytes from the start of one slot to the next
+#
+#   Two slots, the first at byte 64 and the second slotSize bytes further on, each made of:
+#     0: generation, uint64: the generation of the frame in the slot, or 0 while the slot is being written
+#     8: timestamp, float64: the time the frame was drawn, in seconds since the epoch
+#     16: the frame, frameSize bytes
+#
+# Frames are double buffered: the frame of generation g is written to slot g % 2, so the frame readers are reading is
+# never the one being written. The writer first sets the generation of the slot to 0, then writes the timestamp and
+# the frame, then sets the generation of the slot to g, and only then sets the generation in the header to g. A
+# reader reads the generation g from the header, checks that slot g % 2 has the generation g, reads the frame in place
+# (with no copy), and then checks that the slot still has the generation g. If it does not, the writer has come round
+# to the slot again while it was being read, and the reader starts over with the new generation. Readers in C should
+# read both generations with acquire loads. Readers can poll the generation in the header for new frames, as
+# FramebufferReader does.
+Header = struct.Struct("<4sHHHHIQI")
+Slot = struct.Struct("<Qd")
+Magic = b"WCFB"
+Version = 1
+Cells = 0
+Raster = 1
+SlotsStart = 64
+
+
+# SharedFramebuffer class creates (or takes over) the file at path, with room for frames of width by height red,
+# green and blue values in the given format, and writes frames to it with publish. A file which is taken over is
+# resized in place rather than emptied first, so a reader which still has it mapped, such as one left over from a
+# writer which was restarted, does not lose the pages under it.
+class SharedFramebuffer:
+    def __init__(self, path, format, width, height):
+        self.path = path
+        self.frameSize = width * height * 3
+        self.slotSize = (Slot.size + self.frameSize + 63) // 64 * 64
+        self.generation = 0
+        descriptor = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        os.ftruncate(descriptor, SlotsStart + 2 * self.slotSize)
+        self.file = os.fdopen(descriptor, "r+b")
+        self.map = mmap.mmap(self.file.fileno(), SlotsStart + 2 * self.slotSize)
+        Header.pack_into(self.map, 0, Magic, Version, format, width, height, self.frameSize, 0, self.slotSize)
+
+    # publish writes the given frame (bytes of frameSize) as the next generation.
+    def publish(self, frame):
+        generation = self.generation + 1
+        start = SlotsStart + generation % 2 * self.slotSize
+        struct.pack_into("<Q", self.map, start, 0)
+        struct.pack_into("<d", self.map, start + 8, time.time())
+        self.map[start + Slot.size:start + Slot.size + self.frameSize] = frame
+        struct.pack_into("<Q", self.map, start, generation)
+        struct.pack_into("<Q", self.map, 16, generation)
+        self.generation = generation
+        return
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+        return
+
+
+# FramebufferOutput publishes the frames drawn by the given renderer (a CellRenderer or a RasterRenderer, anything
+# with getFrame) to the given SharedFramebuffer at the end of every frame of the animator in which anything changed.
+class FramebufferOutput:
+    def __init__(self, animator, renderer, framebuffer):
+        self.renderer = renderer
+        self.framebuffer = framebuffer
+        self.last = renderer.getFrame()
+        framebuffer.publish(self.last)
+        animator.frameEnd.append(self.frame)
+
+    def frame(self):
+        frame = self.renderer.getFrame()
+        if frame != self.last:
+            self.framebuffer.publish(frame)
+            self.last = frame
+        return
+
+
+# FramebufferReader class reads the frames from a file written by SharedFramebuffer, the same way a C reader would,
+# except that read hands back a copy of the frame, which is then checked, rather than the frame in place.
+class FramebufferReader:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.format, self.width, self.height, self.frameSize, self.generation, self.slotSize = (
+            Header.unpack_from(self.map, 0))
+        if magic != Magic or version != Version:
+            raise ValueError("%s is not a word clock framebuffer" % path)
+
+    def getGeneration(self):
+        return struct.unpack_from("<Q", self.map, 16)[0]
+
+    # read returns the generation, timestamp and frame (as bytes) of the latest frame, or None if nothing has been
+    # written yet.
+    def read(self):
+        while True:
+            generation = self.getGeneration()
+            if generation == 0:
+                return None
+            start = SlotsStart + generation % 2 * self.slotSize
+            slotGeneration, timestamp = Slot.unpack_from(self.map, start)
+            if slotGeneration != generation:
+                continue
+            frame = self.map[start + Slot.size:start + Slot.size + self.frameSize]
+            if struct.unpack_from("<Q", self.map, start)[0] == generation:
+                return generation, timestamp, frame
+
+    # wait polls the generation every interval seconds until a generation newer than the given one is written, or
+    # timeout seconds have passed (for ever if None), and returns the latest generation.
+    def wait(self, generation, timeout=None, interval=0.005):
+        deadline = None
+        if timeout is not None:
+            deadline = time.monotonic() + timeout
+        while True:
+            latest = self.getGeneration()
+            if latest != generation or (deadline is not None and time.monotonic() >= deadline):
+                return latest
+            time.sleep(interval)
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+        return
+
+
+# cellsText draws a frame of cells, width letters by height, as text, one line per row, with lit letters shown as "#"
+# and unlit letters as ".". The size is taken from the header of the file rather than from the face in this process,
+# since the writer may be showing another layout, or the minute dots.
+def cellsText(frame, width, height):
+    lines = []
+    for row in range(0, height):
+        lines.append(" ".join("." if frame[index * 3:index * 3 + 3] == b"\x33\x33\x33" else "#"
+                              for index in range(row * width, (row + 1) * width)))
+    return "\n".join(lines)
+
+
+# main runs the clock without a window, writing its frames to the file given with --write, or reads the frames from
+# the file given with --read, and prints the face every time it changes.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Word Clock shared memory framebuffer")
+    parser.add_argument("--write", metavar="PATH", help="write the frames to PATH, such as /dev/shm/wordclock")
+    parser.add_argument("--read", metavar="PATH", help="read the frames from PATH and print them")
+    parser.add_argument("--raster", action="store_true", help="write the pixels of the face instead of the letters")
+    parser.add_argument("--tz", help="time zone to show, such as Europe/Berlin (default: the local time zone)")
+    args = parser.parse_args(argv)
+
+    if args.read is not None:
+        reader = FramebufferReader(args.read)
+        generation = 0
+        while True:
+            generation = reader.wait(generation)
+            latest = reader.read()
+            if latest is not None:
+                generation, timestamp, frame = latest
+                text = "%d x %d pixels" % (reader.width, reader.height)
+                if reader.format == Cells:
+                    text = cellsText(frame, reader.width, reader.height)
+                sys.stdout.write("generation %d at %.3f\n%s\n\n" % (generation, timestamp, text))
+                sys.stdout.flush()
+    if args.write is None:
+        parser.error("nothing to do, give --write or --read")
+    tz = None
+    if args.tz is not None:
+        tz = zoneinfo.ZoneInfo(args.tz)
+    scheduler = wordengine.Scheduler()
+    if args.raster:
+        renderer = wordraster.RasterRenderer()
+    else:
+        renderer = wordengine.CellRenderer()
+    wordclock = wordengine.WordClock(scheduler, renderer, wordface.SystemClock(tz))
+    if args.raster:
+        framebuffer = SharedFramebuffer(args.write, Raster, renderer.width, renderer.height)
+    else:
+        framebuffer = SharedFramebuffer(args.write, Cells, wordface.Columns, wordface.Rows)
+    FramebufferOutput(wordclock.animator, renderer, framebuffer)
+    wordclock.start()
+    try:
+        scheduler.mainloop()
+    finally:
+        framebuffer.close()
+        os.remove(args.write)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import sys
+import time
+import struct
+import socket
+import zoneinfo
+import argparse
+import wordface
+import wordengine
+
+
+# wordstream sends the clock face to physical LED word clocks over UDP, so that they can be driven by the same clock as
+# the Tk application. Every frame the animator draws is sent as the colors of the letters of the face (wordface.Cells
+# of them, which depends on the layout), by letter index (see letterIndex in wordface.py), and a receiver is included
+# for testing on the same machine.
+#
+# The protocol is made of two kinds of packets, each starting with the same 14 byte header (see Header): the magic
+# bytes "WC", the protocol version (2), the kind of packet, the sequence number of the packet, the sequence number of
+# the keyframe it is based on, and the number of letters in it, all numbers big endian.
+#   Keyframe (kind 0): the color of every letter, as red, green and blue for each in turn. The base of a keyframe is
+#   itself.
+#   Delta (kind 1): only the letters which differ from the keyframe given as the base, each as its letter index in two
+#   bytes followed by red, green and blue (see DeltaEntry), so faces of more than 256 letters can be sent.
+# A delta holds every change since its keyframe, not just since the packet before, so a receiver which misses a
+# delta is back in step with the next one. Sequence numbers go up by one with every packet (wrapping around after
+# 2**32), so receivers drop packets which arrive late, after a newer one. A keyframe is sent at least every
+# keyInterval seconds, even when nothing changes, so a receiver which starts late or misses a keyframe catches up
+# within that time.
+Header = struct.Struct(">2sBBIIH")
+DeltaEntry = struct.Struct(">H3s")
+Magic = b"WC"
+Version = 2
+Keyframe = 0
+Delta = 1
+
+
+# parseAddress turns a "host:port" string into a (host, port) tuple, as used by sockets.
+def parseAddress(address):
+    host, separator, port = address.rpartition(":")
+    if separator == "" or not port.isdigit():
+        raise ValueError("addresses are given as HOST:PORT, not %r" % address)
+    return host or "127.0.0.1", int(port)
+
+
+# encodeKeyframe and encodeDelta return the packets for a keyframe of the given cells (a bytearray as kept by
+# CellRenderer in wordengine.py), and for a delta of the given changes, a list of (letter index, red green and blue
+# bytes), based on the keyframe with the sequence number base.
+def encodeKeyframe(sequence, cells):
+    return Header.pack(Magic, Version, Keyframe, sequence, sequence, len(cells) // 3) + bytes(cells)
+
+
+def encodeDelta(sequence, base, changes):
+    return Header.pack(Magic, Version, Delta, sequence, base, len(changes)) + b"".join(
+        DeltaEntry.pack(index, rgb) for index, rgb in changes)
+
+
+# decodePacket returns the kind, sequence number and base of a packet, and its letters as a list of (letter index,
+# red green and blue bytes). A ValueError is raised if the packet is not one of ours.
+def decodePacket(data):
+    if len(data) < Header.size:
+        raise ValueError("packet too short")
+    magic, version, kind, sequence, base, count = Header.unpack_from(data)
+    if magic != Magic or version != Version or kind not in (Keyframe, Delta):
+        raise ValueError("not a word clock packet")
+    body = data[Header.size:]
+    if kind == Keyframe:
+        if len(body) != count * 3:
+            raise ValueError("keyframe of the wrong length")
+        letters = [(index, body[index * 3:index * 3 + 3]) for index in range(0, count)]
+    else:
+        if len(body) != count * DeltaEntry.size:
+            raise ValueError("delta of the wrong length")
+        letters = list(DeltaEntry.iter_unpack(body))
+    return kind, sequence, base, letters
+
+
+# UdpStream class sends the letter colors kept by a CellRenderer (see wordengine.py) to every one of the given
+# destinations, a list of (host, port) tuples, so one clock can drive many panels. It sends a packet at the end of
+# every frame of the given animator in which any letter changed, so packets go out at the frame rate of the animation,
+# and nothing is sent between fades except a keyframe every keyInterval seconds (see the protocol above). A delta which
+# would be bigger than a keyframe is sent as a keyframe instead.
+#
+# Sending never holds up the clock: the socket does not block, and any error sending a packet (such as a panel which
+# is switched off) is only counted in errors. packets and bytesSent count what was sent, to every destination.
+class UdpStream:
+    def __init__(self, master, animator, renderer, destinations, keyInterval=1.0):
+        self.master = master
+        self.renderer = renderer
+        self.destinations = list(destinations)
+        self.keyInterval = keyInterval
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.sequence = 0
+        self.keySequence = 0
+        self.keyframe = bytes(renderer.cells)  # The cells as of the last keyframe
+        self.sent = self.keyframe  # The cells as of the last packet
+        self.lastKey = 0.0
+        self.packets = 0
+        self.bytesSent = 0
+        self.errors = 0
+        animator.frameEnd.append(self.frame)
+        self.sendKeyframe()
+        self.job = self.master.after(int(self.keyInterval * 1000), self.heartbeat)
+
+    # frame is called at the end of every frame of the animator, and sends whatever changed.
+    def frame(self):
+        cells = bytes(self.renderer.cells)
+        if cells == self.sent:
+            return
+        if time.monotonic() - self.lastKey >= self.keyInterval:
+            self.sendKeyframe()
+            return
+        changes = [(index, cells[index * 3:index * 3 + 3]) for index in range(0, len(cells) // 3)
+                   if cells[index * 3:index * 3 + 3] != self.keyframe[index * 3:index * 3 + 3]]
+        if len(changes) * DeltaEntry.size >= len(cells):
+            self.sendKeyframe()
+            return
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        self.send(encodeDelta(self.sequence, self.keySequence, changes))
+        self.sent = cells
+        return
+
+    def sendKeyframe(self):
+        cells = bytes(self.renderer.cells)
+        self.sequence = (self.sequence + 1) & 0xFFFFFFFF
+        self.send(encodeKeyframe(self.sequence, cells))
+        self.keySequence = self.sequence
+        self.keyframe = cells
+        self.sent = cells
+        self.lastKey = time.monotonic()
+        return
+
+    # heartbeat sends a keyframe when none has been sent for keyInterval seconds, and schedules itself again for
+    # whenever the next one is due.
+    def heartbeat(self):
+        wait = self.lastKey + self.keyInterval - time.monotonic()
+        if wait <= 0:
+            self.sendKeyframe()
+            wait = self.keyInterval
+        self.job = self.master.after(int(wait * 1000) + 1, self.heartbeat)
+        return
+
+    def send(self, packet):
+        for destination in self.destinations:
+            try:
+                self.socket.sendto(packet, destination)
+                self.packets = self.packets + 1
+                self.bytesSent = self.bytesSent + len(packet)
+            except OSError:
+                self.errors = self.errors + 1
+        return
+
+    def close(self):
+        self.master.after_cancel(self.job)
+        self.socket.close()
+        return
+
+
+# Receiver class receives the stream on the given port, the way an LED panel would, for testing. cells holds the
+# letter colors as of the last packet applied, in the same layout as CellRenderer. Packets which are older than the
+# newest packet seen are dropped as stale, and deltas based on a keyframe the receiver does not have are dropped until
+# the next keyframe arrives. frames counts the packets applied, and dropped the packets dropped (including any which
+# are not ours).
+class Receiver:
+    def __init__(self, port, host="127.0.0.1"):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.cells = bytearray(b"\x33\x33\x33" * wordface.Cells)
+        self.keyframe = None
+        self.keySequence = None
+        self.lastSequence = None
+        self.frames = 0
+        self.dropped = 0
+
+    # receive waits up to timeout seconds (for ever if None) for a packet, and applies it. It returns True if the cells
+    # were updated, and False if the packet was dropped or none arrived in time.
+    def receive(self, timeout=None):
+        self.socket.settimeout(timeout)
+        try:
+            data = self.socket.recv(65536)
+        except socket.timeout:
+            return False
+        return self.apply(data)
+
+    # apply applies a single packet to cells, and returns True if it was applied.
+    def apply(self, data):
+        try:
+            kind, sequence, base, letters = decodePacket(data)
+        except ValueError:
+            self.dropped = self.dropped + 1
+            return False
+        if self.lastSequence is not None and not 0 < (sequence - self.lastSequence) & 0xFFFFFFFF < 0x80000000:
+            self.dropped = self.dropped + 1
+            return False
+        if kind == Keyframe:
+            self.keyframe = bytearray(self.cells)
+            for index, rgb in letters:
+                self.keyframe[index * 3:index * 3 + 3] = rgb
+            self.keySequence = sequence
+            self.cells[:] = self.keyframe
+        else:
+            if base != self.keySequence:
+                self.dropped = self.dropped + 1
+                return False
+            cells = bytearray(self.keyframe)
+            for index, rgb in letters:
+                cells[index * 3:index * 3 + 3] = rgb
+            self.cells[:] = cells
+        self.lastSequence = sequence
+        self.frames = self.frames + 1
+        return True
+
+    # getText returns the face as received, as text like maskText in wordface.py, with the letters which are not
+    # showing the off color (#333333) shown.
+    def getText(self):
+        mask = 0
+        for index in range(0, wordface.Cells):
+            if self.cells[index * 3:index * 3 + 3] != b"\x33\x33\x33":
+                mask |= 1 << index
+        return wordface.maskText(mask)
+
+    def close(self):
+        self.socket.close()
+        return
+
+
+# main runs the clock without a window, streaming to every --send address, or runs a receiver on --receive, which
+# prints the face every time it changes.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Word Clock LED stream")
+    parser.add_argument("--send", action="append", default=[], type=parseAddress, metavar="HOST:PORT",
+                        help="send the face to a panel listening on HOST:PORT (may be repeated)")
+    parser.add_argument("--receive", type=int, metavar="PORT", help="receive the stream on PORT and print it")
+    parser.add_argument("--tz", help="time zone to show, such as Europe/Berlin (default: the local time zone)")
+    parser.add_argument("--key-interval", type=float, default=1.0, help="seconds between keyframes (default: 1)")
+    args = parser.parse_args(argv)
+
+    if args.receive is not None:
+        receiver = Receiver(args.receive)
+        shown = None
+        while True:
+            if receiver.receive() and receiver.cells != shown:
+                shown = bytearray(receiver.cells)
+                sys.stdout.write("frame %d (dropped %d)\n%s\n\n" % (receiver.lastSequence, receiver.dropped,
+                                                                    receiver.getText()))
+                sys.stdout.flush()
+    if len(args.send) == 0:
+        parser.error("nothing to do, give --send or --receive")
+    tz = None
+    if args.tz is not None:
+        tz = zoneinfo.ZoneInfo(args.tz)
+    scheduler = wordengine.Scheduler()
+    renderer = wordengine.CellRenderer()
+    wordclock = wordengine.WordClock(scheduler, renderer, wordface.SystemClock(tz))
+    UdpStream(scheduler, wordclock.animator, renderer, args.send, args.key_interval)
+    wordclock.start()
+    scheduler.mainloop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import sys
+import zoneinfo
+import argparse
+import wordface
+import wordlayout
+import wordcolor
+import wordengine
+
+
+# wordterm draws the clock face in a terminal, for example on a headless server or over SSH, with 24 bit color escape
+# codes, which most terminals understand. The face is the same WordClock, with the same fades, as the Tk application
+# in wordclockv2.py, only drawn by a TerminalRenderer instead of on a Tk canvas.
+#
+# The screen is never redrawn as a whole. At the end of every frame, only the letters whose color changed in that
+# frame are written again: a cursor move to the letter (left out when the cursor is already there, after the letter
+# before it in the same row), a color change (left out when the color is already set, as for every letter of a word
+# fading together), and the letter itself. A frame of a fade is then only a few hundred bytes, so fades stay smooth
+# over a slow link.
+
+
+# Escape codes used by TerminalRenderer.
+Escape = "\x1b["
+ClearScreen = Escape + "2J"
+HideCursor = Escape + "?25l"
+ShowCursor = Escape + "?25h"
+Reset = Escape + "0m"
+Background = Escape + "48;2;0;0;0m"
+
+
+# TerminalRenderer is a rendering backend which draws the letters as text on a terminal, with the top left letter at
+# the given (1 based) row and column of the screen, and every letter cellWidth columns apart. It keeps the colors of
+# the letters like CellRenderer (see wordengine.py), and writes out what changed when flush is called, which has to be
+# done at the end of every frame of the animator (see main). The first flush clears the screen and draws every letter.
+# frames counts the flushes which wrote anything, and bytesWritten the bytes written, for the --stats line.
+class TerminalRenderer(wordengine.CellRenderer):
+    def __init__(self, output=None, top=1, left=1, cellWidth=3):
+        wordengine.CellRenderer.__init__(self)
+        if output is None:
+            output = sys.stdout
+        self.output = output
+        self.top = top
+        self.left = left
+        self.cellWidth = cellWidth
+        self.texts = [" "] * wordface.Cells
+        self.drawn = None  # The cells as they are on the screen, or None before the first flush
+        self.frames = 0
+        self.bytesWritten = 0
+
+    def addLetter(self, text, column, row):
+        index = wordface.letterIndex(row, column)
+        self.texts[index] = text
+        return index
+
+    # flush writes every letter whose color is not the same as on the screen, and returns the number of letters
+    # written.
+    def flush(self):
+        parts = []
+        if self.drawn is None:
+            parts.append(HideCursor + Background + ClearScreen)
+            self.drawn = bytearray(len(self.cells))
+            drawn = None
+        else:
+            drawn = self.drawn
+        cells = self.cells
+        cursor = None  # Where the cursor is left by the last letter written, as (row, column)
+        color = None
+        letters = 0
+        for index in range(0, wordface.Cells):
+            rgb = cells[index * 3:index * 3 + 3]
+            if drawn is not None and drawn[index * 3:index * 3 + 3] == rgb:
+                continue
+            row, column = divmod(index, wordface.Columns)
+            position = (self.top + row, self.left + column * self.cellWidth)
+            if position != cursor:
+                parts.append("%s%d;%dH" % (Escape, position[0], position[1]))
+            if rgb != color:
+                parts.append("%s38;2;%d;%d;%dm" % (Escape, rgb[0], rgb[1], rgb[2]))
+                color = rgb
+            parts.append(self.texts[index].ljust(self.cellWidth))
+            cursor = (position[0], position[1] + self.cellWidth)
+            self.drawn[index * 3:index * 3 + 3] = rgb
+            letters = letters + 1
+        if len(parts) == 0:
+            return 0
+        data = "".join(parts)
+        self.output.write(data)
+        self.output.flush()
+        self.frames = self.frames + 1
+        self.bytesWritten = self.bytesWritten + len(data.encode())
+        return letters
+
+    # close puts the terminal back the way it was, with the cursor below the face.
+    def close(self):
+        self.output.write("%s%s%d;1H%s\n" % (Reset, Escape, self.top + wordface.Rows, ShowCursor))
+        self.output.flush()
+        return
+
+
+# main runs the clock in the terminal until it is interrupted with Ctrl-C. With --stats, the number of frames written
+# and the bytes they took are printed below the face on the way out.
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Word Clock in a terminal")
+    parser.add_argument("--layout", metavar="FILE",
+                        help="layout of the face, such as layouts/german.json (default: the English face)")
+    parser.add_argument("--dots", action="store_true",
+                        help="light a minute dot in a corner of the face for every minute past the words shown")
+    parser.add_argument("--tz", help="time zone to show, such as Europe/Berlin (default: the local time zone)")
+    parser.add_argument("--color", type=wordcolor.normalColor, metavar="RRGGBB",
+                        help="color of the lit letters, such as FF8800 (default: white)")
+    parser.add_argument("--blend", choices=sorted(wordcolor.Blendings), default="linear",
+                        help="how colors are mixed during a fade (default: linear)")
+    parser.add_argument("--easing", choices=sorted(wordcolor.Easings), default="smooth",
+                        help="how a fade moves along over time (default: smooth)")
+    parser.add_argument("--fps", type=float, default=33,
+                        help="frames per second of the fades, lower for a slow link (default: 33)")
+    parser.add_argument("--fade", type=float, default=0.75, metavar="SECONDS",
+                        help="how long a transition takes, in seconds (default: 0.75)")
+    parser.add_argument("--intro", choices=("none", "sweep"), default="none",
+                        help="intro animation to play after the time is first shown (default: none)")
+    parser.add_argument("--schedule", type=wordengine.parseSchedule, metavar="HH:MM=LEVEL,...",
+                        help="brightness schedule, such as 22:00=dim,00:30=off,07:00=bright")
+    parser.add_argument("--stats", action="store_true", help="print the frames and bytes written on the way out")
+    args = parser.parse_args(argv)
+    if args.layout is not None or args.dots:
+        path = args.layout or wordlayout.DefaultLayout
+        try:
+            wordface.useLayout(wordlayout.loadLayout(path, dots=args.dots))
+        except (OSError, ValueError) as error:
+            parser.error("%s: %s" % (path, error))
+    tz = None
+    if args.tz is not None:
+        tz = zoneinfo.ZoneInfo(args.tz)
+
+    scheduler = wordengine.Scheduler()
+    renderer = TerminalRenderer()
+    wordclock = wordengine.WordClock(scheduler, renderer, wordface.SystemClock(tz), blending=args.blend,
+                                     easing=args.easing, fps=args.fps, fade=args.fade)
+    wordclock.animator.frameEnd.append(renderer.flush)
+    if args.color is not None:
+        wordclock.addColor(args.color, select=True)
+    if args.schedule is not None:
+        wordclock.setSchedule(args.schedule)
+    wordclock.start(args.intro)
+    try:
+        scheduler.mainloop()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        renderer.close()
+    if args.stats:
+        sys.stdout.write("%d frames, %d bytes, %.1f bytes per frame\n" % (
+            renderer.frames, renderer.bytesWritten, renderer.bytesWritten / max(renderer.frames, 1)))
+
+
+if __name__ == "__main__":
+    main()